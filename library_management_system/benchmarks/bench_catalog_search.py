@@ -0,0 +1,124 @@
+"""
+Catalog search at scale: index build time and memory, then query latency
+for the CatalogIndex against scanning every Book.
+
+Titles draw from a Zipf-distributed vocabulary, so some words are in a
+large share of the catalog and most are rare, like real titles.
+
+    python -m library_management_system.benchmarks.bench_catalog_search --books 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from library_management_system.models.book import Book
+from library_management_system.models.catalog_search import CatalogIndex
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "to", "ne", "su", "vi", "da", "pe", "shi", "gor", "an", "el", "un"]
+
+
+def words(count, rng):
+    syllables = rng.integers(0, len(SYLLABLES), size=(count, 4))
+    lengths = rng.integers(2, 5, size=count)
+    vocabulary = {
+        "".join(SYLLABLES[s] for s in row[:length]) for row, length in zip(syllables, lengths)
+    }
+    return sorted(vocabulary)
+
+
+def catalog(count, seed):
+    rng = np.random.default_rng(seed)
+    # shuffled, so the common words don't all share a prefix
+    vocabulary = [str(word) for word in rng.permutation(words(60_000, rng))]
+    surnames = words(20_000, rng)
+    publishers = [f"{word} press" for word in words(3_000, rng)]
+    subjects = words(500, rng)
+    languages = ["english", "hindi", "spanish", "french", "german", "tamil", "japanese"]
+
+    title_words = np.minimum(rng.zipf(1.3, size=(count, 6)), len(vocabulary)) - 1
+    title_lengths = rng.integers(2, 7, size=count)
+    author_ids = rng.integers(0, len(surnames), size=(count, 2))
+    for number in range(count):
+        yield Book(
+            {
+                "isbn": f"978{number:010d}",
+                "title": " ".join(vocabulary[w] for w in title_words[number, : title_lengths[number]]),
+                "subject": subjects[number % len(subjects)],
+                "publisher": publishers[number % len(publishers)],
+                "language": languages[number % len(languages)],
+                "authors": [f"{surnames[a]} {surnames[(a * 7) % len(surnames)]}" for a in author_ids[number, : 1 + number % 2]],
+                "publication_year": 1900 + number % 125,
+                "number_of_pages": 100 + number % 900,
+            }
+        )
+
+
+def scan(books, query):
+    terms = CatalogIndex.tokenize(query)
+    hits = []
+    for book in books:
+        text = " ".join([book.title, *book.authors, book.subject, book.publisher, book.language]).lower()
+        if all(term in CatalogIndex.tokenize(text) for term in terms):
+            hits.append(book)
+    return hits
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--scan-repeat", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    books = list(catalog(args.books, args.seed))
+    index = CatalogIndex()
+    started = time.perf_counter()
+    for book in books:
+        index.add(book)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.books} books  build {elapsed:6.1f} s ({elapsed / args.books * 1e6:.1f} us/book)  "
+        f"index {index.memory_bytes() / 2**20:7.1f} MiB  vocabulary {len(index._vocabulary)}"
+    )
+
+    sample = books[args.books // 3]
+    title_words = sorted(sample.title.split(), key=index._document_frequency.__getitem__)
+    queries = {
+        "rare title word": title_words[0],
+        "common word": index.complete("", limit=1)[0],
+        "title + author": f"{title_words[-1]} {sample.authors[0].split()[0]}",
+        "whole title": f"{sample.title} {sample.language}",
+        "prefix": f"{title_words[-1]} {title_words[0][:3]}",
+    }
+    for label, query in queries.items():
+        prefix = label == "prefix"
+        hits = len(index.search(query, limit=10**9, prefix=prefix))
+        p50, p99 = timed(lambda: index.search(query, prefix=prefix), args.repeat)
+        print(f"  {label:16} {query!r:40} {hits:8d} hits  p50 {p50 * 1e3:8.3f} ms  p99 {p99 * 1e3:8.3f} ms")
+
+    for label in ("rare title word", "title + author"):
+        query = queries[label]
+        p50, _ = timed(lambda: scan(books, query), args.scan_repeat)
+        print(f"  scan {label:11} {query!r:40} p50 {p50 * 1e3:10.1f} ms")
+
+    started = time.perf_counter()
+    for book in books[: args.books // 100]:
+        index.remove(book.isbn)
+    print(f"  remove 1%        {(time.perf_counter() - started) / (args.books // 100) * 1e6:8.1f} us/book")
+
+
+if __name__ == "__main__":
+    main()
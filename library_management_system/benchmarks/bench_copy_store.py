@@ -0,0 +1,163 @@
+"""
+Memory and lookups for millions of book copies: the CopyStore columns
+against one object per copy the way BookItem used to be, a full Book with
+its own attribute dict, borrower dict and reservation line.
+
+Copies of the old kind at the full count don't fit in a small machine's
+memory, so they're measured at --baseline-copies and scaled up linearly.
+Their metadata strings are shared between copies of a title, which flatters
+them: rows loaded from a database would each have their own.
+
+    python -m library_management_system.benchmarks.bench_copy_store --copies 5000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from library_management_system.models.book import CopyStore
+from library_management_system.models.enums import BookStatus
+
+COPIES_PER_TITLE = 10
+
+
+class OldBook:
+    def __init__(self, book):
+        self._isbn = book["isbn"]
+        self._title = book["title"]
+        self._subject = book["subject"]
+        self._publisher = book["publisher"]
+        self._language = book["language"]
+        self._authors = book["authors"]
+        self._publication_year = book["publication_year"]
+        self._number_of_pages = book["number_of_pages"]
+
+
+class OldBookItem(OldBook):
+    def __init__(self, book):
+        super().__init__(book)
+        self._book_id = book["book_id"]
+        self._rack_number = book["rack_number"]
+        self._reserved_by = []
+        self._borrowed_by = {}
+        self._borrowed_date = ""
+        self._due_date = ""
+        self._book_status = BookStatus.AVAILABLE.value
+        self._book_format = book["book_format"]
+        self._price = book["price"]
+
+    @property
+    def book_status(self):
+        return self._book_status
+
+    @property
+    def title(self):
+        return self._title
+
+
+def copies(count):
+    titles = {}
+    for book_id in range(count):
+        number = book_id // COPIES_PER_TITLE
+        title = titles.get(number)
+        if title is None:
+            titles.clear()
+            title = titles[number] = {
+                "isbn": f"978{number:010d}",
+                "title": f"A Title Number {number}",
+                "subject": f"subject {number % 500}",
+                "publisher": f"publisher {number % 3000}",
+                "language": "english",
+                "authors": [f"author {number % 20000}"],
+                "publication_year": 1900 + number % 125,
+                "number_of_pages": 100 + number % 900,
+            }
+        yield {
+            **title,
+            "book_id": book_id,
+            "rack_number": f"R{book_id % 5000}",
+            "book_format": "paperback" if book_id % 3 else "hardcover",
+            "price": 5.0 + book_id % 40,
+        }
+
+
+def measured(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built, size, elapsed
+
+
+def lookups(get, book_ids, attribute):
+    started = time.perf_counter()
+    for book_id in book_ids:
+        getattr(get(book_id), attribute)
+    return (time.perf_counter() - started) / len(book_ids) * 1e9
+
+
+def load_objects(count):
+    return {book["book_id"]: OldBookItem(book) for book in copies(count)}
+
+
+def load_store(count):
+    store = CopyStore()
+    for book in copies(count):
+        store.add(book)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=5_000_000)
+    parser.add_argument("--baseline-copies", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    scale = args.copies / args.baseline_copies
+
+    old, old_size, _ = measured(lambda: load_objects(args.baseline_copies))
+    store, store_size, _ = measured(lambda: load_store(args.copies))
+    print(
+        f"objects  {args.baseline_copies} copies  {old_size / 2**20:8.1f} MiB  "
+        f"{old_size / args.baseline_copies:6.0f} B/copy  {old_size * scale / 2**30:5.2f} GiB at {args.copies}"
+    )
+    print(
+        f"store    {args.copies} copies  {store_size / 2**20:8.1f} MiB  "
+        f"{store_size / args.copies:6.0f} B/copy  {store_size / 2**30:5.2f} GiB"
+    )
+    # load times untraced, tracemalloc slows allocation down a lot
+    for label, load in (("objects", load_objects), ("store", load_store)):
+        started = time.perf_counter()
+        load(args.baseline_copies)
+        elapsed = time.perf_counter() - started
+        print(f"  load {label:8} {elapsed / args.baseline_copies * 1e6:6.2f} us/copy")
+
+    old_ids = rng.integers(0, args.baseline_copies, size=args.lookups).tolist()
+    store_ids = rng.integers(0, args.copies, size=args.lookups).tolist()
+    for attribute in ("book_status", "title"):
+        print(
+            f"  {attribute:12} lookup  objects {lookups(old.__getitem__, old_ids, attribute):6.0f} ns  "
+            f"store {lookups(store.get, store_ids, attribute):6.0f} ns"
+        )
+
+    started = time.perf_counter()
+    counts = {}
+    for book_item in old.values():
+        counts[book_item.book_status] = counts.get(book_item.book_status, 0) + 1
+    old_count = (time.perf_counter() - started) * scale
+    started = time.perf_counter()
+    store.count_by_status()
+    print(
+        f"  count by status  objects {old_count * 1e3:8.1f} ms (scaled)  "
+        f"store {(time.perf_counter() - started) * 1e3:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
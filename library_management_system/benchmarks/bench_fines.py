@@ -0,0 +1,96 @@
+"""
+Nightly fine assessment over every open loan: OpenLoans in one vectorized
+pass, against assessing one loan at a time through Fine.calculate_fine and
+through plain datetime arithmetic on the stored date strings.
+
+    python -m library_management_system.benchmarks.bench_fines --loans 5000000
+"""
+
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+
+from library_management_system.models.enums import Constants
+from library_management_system.models.fines import OpenLoans
+from library_management_system.models.transactions import Fine
+from library_management_system.utils.date_time_utils import DateTimeUtils
+
+TODAY = "2026-06-30"
+
+
+def per_loan_datetime(lent_on, today):
+    """The one-by-one computation on date strings, without the kernel."""
+    today = date.fromisoformat(today)
+    total = 0
+    for lending_date in lent_on:
+        overdue = (today - date.fromisoformat(lending_date)).days - Constants.MAX_BORROW_DAYS
+        if overdue > 0:
+            total += overdue * Constants.LATE_FEE_PER_DAY
+    return total
+
+
+def open_loans(lent_on, user_ids):
+    loans = OpenLoans()
+    loans.add_many(np.arange(len(lent_on)), user_ids, lent_on)
+    return loans
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=5_000_000)
+    parser.add_argument("--sample", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=1 << 20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    today = DateTimeUtils.ordinal(TODAY)
+    # lent within the last 60 days, so roughly three in four are overdue
+    lent_on = (today - rng.integers(0, 60, size=args.loans)).astype(np.int32)
+    user_ids = rng.integers(1, args.loans // 3 + 2, size=args.loans)
+
+    started = time.perf_counter()
+    loans = open_loans(lent_on, user_ids)
+    print(f"{args.loans} open loans  load {time.perf_counter() - started:6.2f} s")
+
+    started = time.perf_counter()
+    overdue = fines = batches = 0
+    for batch in loans.assess(TODAY, chunk_size=args.chunk_size):
+        batches += 1
+        overdue += len(batch.book_ids)
+        fines += int(batch.fines.sum())
+    elapsed = time.perf_counter() - started
+    print(
+        f"  vectorized       {elapsed * 1e3:9.1f} ms  ({elapsed / args.loans * 1e9:6.1f} ns/loan)  "
+        f"{overdue} overdue in {batches} batches, fines {fines}"
+    )
+
+    sample = min(args.sample, args.loans)
+    dates = [DateTimeUtils.from_ordinal(day) for day in lent_on[:sample].tolist()]
+    expected = sum(
+        int(batch.fines.sum()) for batch in open_loans(lent_on[:sample], user_ids[:sample]).assess(TODAY)
+    )
+    for label, assess in (
+        ("Fine per loan", lambda: sum(Fine(0, 0, day).calculate_fine(TODAY) for day in dates)),
+        ("datetime per loan", lambda: per_loan_datetime(dates, TODAY)),
+    ):
+        started = time.perf_counter()
+        total = assess()
+        elapsed = time.perf_counter() - started
+        assert total == expected, (label, total, expected)
+        print(
+            f"  {label:16} {elapsed / sample * args.loans * 1e3:9.1f} ms  "
+            f"({elapsed / sample * 1e9:6.1f} ns/loan, timed on {sample})"
+        )
+
+    returned = rng.choice(args.loans, size=args.loans // 100, replace=False).tolist()
+    started = time.perf_counter()
+    for book_id in returned:
+        loans.remove(book_id)
+    print(f"  return 1%        {(time.perf_counter() - started) / len(returned) * 1e6:9.2f} us/loan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Reservations for popular titles: joining, checking and cancelling in lines
+of 10k+ members, against the list the reservations used to live in, then
+daily expiry sweeps of uncollected holds across the whole catalog, from
+the expiry heap against checking every copy.
+
+    python -m library_management_system.benchmarks.bench_reservations --waiters 20000
+"""
+
+import argparse
+import random
+import time
+
+from library_management_system.models.book import BookItem, CopyStore
+from library_management_system.models.enums import BookStatus
+from library_management_system.models.reservations import ReservationExpiry, ReservationQueue
+from library_management_system.models.transactions import BookReservation
+from library_management_system.utils.date_time_utils import DateTimeUtils
+
+START = "2026-01-01"
+
+
+def copy(book_id, store):
+    return BookItem(
+        {
+            "isbn": f"978{book_id:010d}",
+            "title": f"Title {book_id}",
+            "subject": "fiction",
+            "publisher": "press",
+            "language": "english",
+            "authors": ["an author"],
+            "publication_year": 2000,
+            "number_of_pages": 300,
+            "book_id": book_id,
+            "rack_number": "A1",
+            "book_format": "paperback",
+            "price": 10,
+        },
+        store,
+    )
+
+
+class ListLine:
+    """Reservations the way BookItem kept them before: a list of user ids."""
+
+    def __init__(self):
+        self.users = []
+
+    def add(self, user_id):
+        if user_id in self.users:
+            raise RuntimeError("Book already reserved by this user")
+        self.users.append(user_id)
+
+    def cancel(self, user_id):
+        self.users.remove(user_id)
+
+    def pop(self):
+        return self.users.pop(0)
+
+
+def per_op(fn, items):
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / max(len(items), 1) * 1e6
+
+
+def lines(args, rng):
+    users = list(range(1, args.waiters + 1))
+    rng.shuffle(users)
+    cancelled = rng.sample(users, args.waiters // 10)
+    for label, make in (("queue", ReservationQueue), ("list", lambda n: ListLine())):
+        titles = args.titles if label == "queue" else args.baseline_titles
+        join = check = cancel = serve = 0.0
+        for number in range(titles):
+            line = make(number)
+            if label == "queue":
+                join += per_op(lambda u: line.add(BookReservation(number, u, START)), users)
+                check += per_op(lambda u: u in line, users)
+                cancel += per_op(line.cancel, cancelled)
+                serve += per_op(lambda _: line.expire_head(), range(len(line)))
+            else:
+                join += per_op(line.add, users)
+                check += per_op(lambda u: u in line.users, users)
+                cancel += per_op(line.cancel, cancelled)
+                serve += per_op(lambda _: line.pop(), range(len(line.users)))
+        print(
+            f"  {label:5} {titles:3d} titles x {args.waiters} waiting  "
+            f"join {join / titles:9.2f} us  member? {check / titles:9.2f} us  "
+            f"cancel {cancel / titles:9.2f} us  next {serve / titles:9.2f} us"
+        )
+
+
+def expiry(args, rng):
+    """A catalog of --copies, the first --titles of them with long lines, all held on day 0."""
+    store = CopyStore()
+    copies = [copy(book_id, store) for book_id in range(args.copies)]
+    holds = ReservationExpiry(notify=False)
+    user = 0
+    for book_item in copies:
+        waiting = args.waiters if book_item.book_id < args.titles else rng.randint(0, 3)
+        for _ in range(waiting):
+            user += 1
+            book_item.add_reservation(BookReservation(book_item.book_id, user, START))
+        holds.hold(book_item, START)
+    held = sum(book_item.book_status == BookStatus.RESERVED.value for book_item in copies)
+    print(f"  {args.copies} copies, {user} reservations, {held} copies held on {START}")
+
+    heap_time = scan_time = 0.0
+    expired = 0
+    first = DateTimeUtils.ordinal(START)
+    for day in range(first + 1, first + args.days + 1):
+        today = DateTimeUtils.from_ordinal(day)
+        # members pick up some of their holds, the rest run out
+        for book_item in rng.sample(copies, args.copies // 50):
+            held = book_item.reserved_by.held
+            if held is not None and rng.random() < 0.5:
+                book_item.reserved_by.fulfil(held.user_id)
+                holds.hold(book_item, today)
+
+        started = time.perf_counter()
+        # what expiry costs without the heap: look at every copy's hold
+        due = [
+            book_item
+            for book_item in copies
+            if (held := book_item.reserved_by.held) is not None and held.expiry_date < today
+        ]
+        scan_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        expired_today = holds.expire(today)
+        heap_time += time.perf_counter() - started
+        expired += len(expired_today)
+        assert len(due) >= len(expired_today)
+    print(
+        f"  {args.days} daily sweeps, {expired} holds expired and passed on  "
+        f"heap {heap_time / args.days * 1e3:8.2f} ms/day  scan {scan_time / args.days * 1e3:8.2f} ms/day"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=20)
+    parser.add_argument("--baseline-titles", type=int, default=2)
+    parser.add_argument("--waiters", type=int, default=10_000)
+    parser.add_argument("--copies", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("reservation lines, per operation:")
+    lines(args, rng)
+    print("hold expiry:")
+    expiry(args, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,33 @@
-from typing import Any, Dict
+from array import array
+from typing import Any, Dict, Optional
+
+import numpy as np
 
 from library_management_system.models.enums import BookFormat, BookStatus, Constants
-from library_management_system.models.notify import Notify
+from library_management_system.models.reservations import NO_RESERVATIONS, ReservationQueue
+from library_management_system.models.transactions import BookReservation
 from library_management_system.utils.date_time_utils import DateTimeUtils
 
+# column codes, by position
+_STATUS_VALUES = [status.value for status in BookStatus]
+_FORMAT_VALUES = [book_format.value for book_format in BookFormat]
+_STATUS_CODES = {value: code for code, value in enumerate(_STATUS_VALUES)}
+_FORMAT_CODES = {value: code for code, value in enumerate(_FORMAT_VALUES)}
+_NOT_DUE = 0  # due date ordinal of a copy that isn't lent out
+
 
 class Book:
+    __slots__ = (
+        "_isbn",
+        "_title",
+        "_subject",
+        "_publisher",
+        "_language",
+        "_authors",
+        "_publication_year",
+        "_number_of_pages",
+    )
+
     def __init__(self, book: Dict[str, Any]):
         self._isbn: str = book["isbn"]
         self._title: str = book["title"]
@@ -16,60 +38,255 @@ class Book:
         self._publication_year: int = book["publication_year"]
         self._number_of_pages: int = book["number_of_pages"]
 
+    @property
+    def isbn(self) -> str:
+        return self._isbn
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @property
+    def subject(self) -> str:
+        return self._subject
+
+    @property
+    def publisher(self) -> str:
+        return self._publisher
+
+    @property
+    def language(self) -> str:
+        return self._language
+
+    @property
+    def authors(self) -> list[str]:
+        return self._authors
+
+
+class CopyStore:
+    """
+    Every physical copy of every book, stored compactly. A title's Book is
+    kept once per ISBN; each copy is a row across typed array columns (book
+    id, title, rack, status and format codes, due date ordinal, price).
+    Borrowers and reservation lines are kept only for the copies that have
+    them.
+
+    Rows never move, so a BookItem is just the store and a row number.
+    Removing a copy blanks its row rather than reusing it, and views of a
+    blanked row raise.
+    """
+
+    def __init__(self):
+        self._book_ids = array("q")
+        self._titles = array("i")  # -1 once removed
+        self._racks = array("i")
+        self._statuses = array("B")
+        self._formats = array("B")
+        self._due = array("i")
+        self._prices = array("d")
+        self._rows: dict = {}  # book id -> row
+        self._books: list = []  # title -> Book
+        self._title_ids: dict = {}  # isbn -> title
+        self._rack_numbers: list = []  # rack -> rack number
+        self._rack_ids: dict = {}  # rack number -> rack
+        self._borrowed_by: dict = {}  # row -> {user id: date}, while lent out
+        self._reserved_by: dict = {}  # row -> ReservationQueue, once reserved
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, book_id) -> bool:
+        return book_id in self._rows
+
+    def __title(self, book: Dict[str, Any]) -> int:
+        title = self._title_ids.get(book["isbn"])
+        if title is None:
+            title = self._title_ids[book["isbn"]] = len(self._books)
+            self._books.append(Book(book))
+        return title
+
+    def __rack(self, rack_number: str) -> int:
+        rack = self._rack_ids.get(rack_number)
+        if rack is None:
+            rack = self._rack_ids[rack_number] = len(self._rack_numbers)
+            self._rack_numbers.append(rack_number)
+        return rack
+
+    def add(self, book: Dict[str, Any]) -> int:
+        """Store a copy described like a BookItem's dict, returning its row."""
+        if book["book_id"] in self._rows:
+            raise RuntimeError("Book id already in the store")
+        row = self._rows[book["book_id"]] = len(self._book_ids)
+        self._book_ids.append(book["book_id"])
+        self._titles.append(self.__title(book))
+        self._racks.append(self.__rack(book["rack_number"]))
+        self._statuses.append(_STATUS_CODES[BookStatus.AVAILABLE.value])
+        self._formats.append(_FORMAT_CODES[book["book_format"]])
+        self._due.append(_NOT_DUE)
+        self._prices.append(book["price"])
+        return row
+
+    def get(self, book_id) -> Optional["BookItem"]:
+        row = self._rows.get(book_id)
+        return None if row is None else BookItem.view(self, row)
+
+    def remove(self, book_id) -> None:
+        row = self._rows.pop(book_id, None)
+        if row is None:
+            return
+        self._titles[row] = -1
+        self._borrowed_by.pop(row, None)
+        self._reserved_by.pop(row, None)
+
+    def count_by_status(self) -> Dict[str, int]:
+        """How many copies are available, borrowed, reserved and lost."""
+        kept = np.frombuffer(self._titles, dtype=np.int32) >= 0
+        statuses = np.frombuffer(self._statuses, dtype=np.uint8)[kept]
+        counts = np.bincount(statuses, minlength=len(_STATUS_VALUES))
+        return dict(zip(_STATUS_VALUES, counts.tolist()))
+
 
 class BookItem(Book):
-    def __init__(self, book: Dict[str, Any]):
-        super().__init__(book)
-        self._book_id: int = book["book_id"]
-        self._rack_number: str = book["rack_number"]
-        self._reserved_by: set[int] = []
-        self._borrowed_by: Dict[int, str] = {}
-        self._borrowed_date: str = ""
-        self._due_date: str = ""
-        self._book_status: BookStatus = BookStatus.AVAILABLE.value
-        self._book_format: BookFormat = book["book_format"]
-        self._price = book["price"]
+    """
+    A physical copy of a book: a view over its row in a CopyStore, which
+    holds the title's metadata and the copy's own state.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, book: Dict[str, Any], store: CopyStore):
+        self._store = store
+        self._row = store.add(book)
+
+    @classmethod
+    def view(cls, store: CopyStore, row: int) -> "BookItem":
+        book_item = cls.__new__(cls)
+        book_item._store = store
+        book_item._row = row
+        return book_item
+
+    @property
+    def removed(self) -> bool:
+        """Whether the copy was taken out of its store; its other fields then raise."""
+        return self._store._titles[self._row] < 0
+
+    def __live_row(self) -> int:
+        if self.removed:
+            raise RuntimeError("Book copy was removed")
+        return self._row
+
+    @property
+    def book(self) -> Book:
+        """The title this is a copy of."""
+        return self._store._books[self._store._titles[self.__live_row()]]
+
+    @property
+    def isbn(self) -> str:
+        return self.book.isbn
+
+    @property
+    def title(self) -> str:
+        return self.book.title
+
+    @property
+    def subject(self) -> str:
+        return self.book.subject
+
+    @property
+    def publisher(self) -> str:
+        return self.book.publisher
+
+    @property
+    def language(self) -> str:
+        return self.book.language
+
+    @property
+    def authors(self) -> list[str]:
+        return self.book.authors
 
     @property
     def book_id(self) -> int:
-        return self._book_id
+        return self._store._book_ids[self.__live_row()]
+
+    @property
+    def rack_number(self) -> str:
+        return self._store._rack_numbers[self._store._racks[self.__live_row()]]
+
+    @property
+    def book_format(self) -> BookFormat:
+        return _FORMAT_VALUES[self._store._formats[self.__live_row()]]
+
+    @property
+    def price(self) -> float:
+        return self._store._prices[self.__live_row()]
+
+    @property
+    def due_date(self) -> str:
+        due = self._store._due[self.__live_row()]
+        return "" if due == _NOT_DUE else DateTimeUtils.from_ordinal(due)
 
     @property
     def borrowed_by(self) -> Dict[int, str]:
-        return self._borrowed_by
+        return self._store._borrowed_by.get(self.__live_row(), {})
 
     @property
-    def reserved_by(self) -> list[int]:
-        return self._reserved_by
+    def reserved_by(self) -> ReservationQueue:
+        """Members waiting for this copy, NO_RESERVATIONS if nobody is."""
+        return self._store._reserved_by.get(self.__live_row(), NO_RESERVATIONS)
+
+    def add_reservation(self, reservation: BookReservation) -> None:
+        """Put a member in line for this copy, starting its queue if need be."""
+        queue = self._store._reserved_by.get(self.__live_row())
+        if queue is None:
+            queue = self._store._reserved_by[self._row] = ReservationQueue(self.book_id)
+        queue.add(reservation)
 
     @property
     def book_status(self) -> BookStatus:
-        return self._book_status
+        return _STATUS_VALUES[self._store._statuses[self.__live_row()]]
+
+    def __set_status(self, status: BookStatus) -> None:
+        self._store._statuses[self._row] = _STATUS_CODES[status.value]
 
     @borrowed_by.setter
     def borrowed_by(self, user_id: int) -> None:
-        if user_id in self._borrowed_by:
+        borrowed_by = self._store._borrowed_by.setdefault(self.__live_row(), {})
+        if user_id in borrowed_by:
             raise RuntimeError("Book already borrowed by this user")
-        self._borrowed_by[user_id] = DateTimeUtils.today()
-        self._book_status = BookStatus.BORROWED.value
-        self._due_date = DateTimeUtils.due_date(Constants.MAX_BORROW_DAYS)
+        borrowed_by[user_id] = DateTimeUtils.today()
+        self.__set_status(BookStatus.BORROWED)
+        self._store._due[self._row] = DateTimeUtils.ordinal(
+            DateTimeUtils.due_date(Constants.MAX_BORROW_DAYS)
+        )
 
     @reserved_by.setter
     def reserved_by(self, user_id: int) -> None:
-        if user_id in self._reserved_by:
-            raise RuntimeError("Book already reserved by this user")
-        self._reserved_by.append(user_id)
+        self.add_reservation(BookReservation(self.book_id, user_id, DateTimeUtils.today()))
 
     def return_book(self, user_id: int) -> None:
-        if user_id not in self._borrowed_by:
+        borrowed_by = self._store._borrowed_by.get(self.__live_row(), {})
+        if user_id not in borrowed_by:
             raise RuntimeError("Book not borrowed by this user")
-        self._borrowed_by.pop(user_id)
-        self._book_status = BookStatus.AVAILABLE.value
-        self._due_date = ""
-        if len(self._reserved_by) > 0:
-            self._book_status = BookStatus.RESERVED.value
-            Notify(
-                user_id,
-                self.book_id,
-                f"Book {self.title} is now available for you to borrow.",
-            ).send_notification()
+        borrowed_by.pop(user_id)
+        if not borrowed_by:
+            self._store._borrowed_by.pop(self._row, None)
+        self.__set_status(BookStatus.AVAILABLE)
+        self._store._due[self._row] = _NOT_DUE
+
+    def hold_for_next(self, expiry_date: str) -> Optional[BookReservation]:
+        """
+        Hold this copy for the first member waiting for it until `expiry_date`,
+        or put it back on the shelf if nobody is. Returns the new hold, if any.
+        """
+        queue = self._store._reserved_by.get(self.__live_row())
+        if queue is None:
+            self.__set_status(BookStatus.AVAILABLE)
+            return None
+        reservation = queue.hold(expiry_date)
+        if queue.held is not None:
+            self.__set_status(BookStatus.RESERVED)
+        else:
+            self.__set_status(BookStatus.AVAILABLE)
+            if not queue:
+                del self._store._reserved_by[self._row]
+        return reservation
@@ -0,0 +1,225 @@
+import bisect
+import math
+import re
+from array import array
+
+import numpy as np
+
+from library_management_system.models.book import Book
+
+# how much a match in each field counts towards a book's score
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "authors": 2.0,
+    "subject": 1.5,
+    "publisher": 1.0,
+    "language": 0.5,
+}
+# most tokens a prefix term expands to, the most common ones
+MAX_PREFIX_EXPANSIONS = 64
+_TOKEN = re.compile(r"\w+")
+
+
+class CatalogIndex:
+    """
+    Inverted index over the catalog: for every field, token -> ids of the
+    books containing it, ids kept as compact int32 arrays in ascending order.
+
+    Queries match books containing every term (the last one may be a prefix,
+    for search-as-you-type) and rank them by the weighted, idf scaled fields
+    the terms hit. Adding a book appends to the postings of its tokens;
+    removing one only marks it dead, and the postings are compacted once a
+    quarter of the ids are dead.
+    """
+
+    def __init__(self):
+        self._books: list = []  # id -> Book, None once removed
+        self._ids: dict = {}  # isbn -> id
+        self._alive = bytearray()
+        self._dead = 0
+        self._postings = {field: {} for field in FIELD_WEIGHTS}
+        self._vocabulary: list = []  # every token, sorted, for prefix lookups
+        self._document_frequency: dict = {}  # token -> books containing it, any field
+
+    @staticmethod
+    def tokenize(text) -> list:
+        if not text:
+            return []
+        if not isinstance(text, str):
+            text = " ".join(text)
+        return _TOKEN.findall(text.lower())
+
+    @staticmethod
+    def __fields(book: Book):
+        return {
+            "title": book.title,
+            "authors": book.authors,
+            "subject": book.subject,
+            "publisher": book.publisher,
+            "language": book.language,
+        }
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, book: Book) -> None:
+        if book.isbn in self._ids:
+            self.remove(book.isbn)
+        book_id = len(self._books)
+        self._books.append(book)
+        self._alive.append(1)
+        self._ids[book.isbn] = book_id
+
+        seen = set()
+        for field, text in self.__fields(book).items():
+            postings = self._postings[field]
+            for token in set(self.tokenize(text)):
+                ids = postings.get(token)
+                if ids is None:
+                    ids = postings[token] = array("i")
+                ids.append(book_id)
+                seen.add(token)
+        for token in seen:
+            count = self._document_frequency.get(token)
+            if count is None:
+                bisect.insort(self._vocabulary, token)
+                count = 0
+            self._document_frequency[token] = count + 1
+
+    def remove(self, isbn: str) -> None:
+        book_id = self._ids.pop(isbn, None)
+        if book_id is None:
+            return
+        book = self._books[book_id]
+        self._books[book_id] = None
+        self._alive[book_id] = 0
+        self._dead += 1
+        tokens = set()
+        for text in self.__fields(book).values():
+            tokens.update(self.tokenize(text))
+        for token in tokens:
+            self._document_frequency[token] -= 1
+        if self._dead > 1000 and self._dead * 4 > len(self._books):
+            self.__compact()
+
+    def __compact(self):
+        alive = np.frombuffer(self._alive, dtype=np.bool_)
+        # old id -> new id, valid where alive
+        new_ids = (np.cumsum(alive) - 1).astype(np.int32)
+        for postings in self._postings.values():
+            for token, ids in list(postings.items()):
+                old = np.frombuffer(ids, dtype=np.int32)
+                kept = new_ids[old[alive[old]]]
+                if len(kept):
+                    postings[token] = array("i", kept.tobytes())
+                else:
+                    del postings[token]
+        del alive
+        self._vocabulary = [
+            token for token in self._vocabulary if self._document_frequency[token] > 0
+        ]
+        self._document_frequency = {
+            token: self._document_frequency[token] for token in self._vocabulary
+        }
+        self._books = [book for book in self._books if book is not None]
+        self._ids = {book.isbn: book_id for book_id, book in enumerate(self._books)}
+        self._alive = bytearray(b"\x01" * len(self._books))
+        self._dead = 0
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """Most common tokens starting with `prefix`, for autocomplete."""
+        return self.__expand(prefix.lower())[:limit]
+
+    def __expand(self, prefix):
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", start)
+        tokens = self._vocabulary[start:end]
+        tokens = [token for token in tokens if self._document_frequency[token] > 0]
+        tokens.sort(key=self._document_frequency.__getitem__, reverse=True)
+        return tokens
+
+    def search(self, query: str, limit: int = 10, prefix: bool = False) -> list:
+        """
+        Books matching every term of `query`, best first. With `prefix` the
+        last term also matches longer tokens, e.g. "harry pot" finds
+        "Harry Potter".
+        """
+        terms = list(dict.fromkeys(self.tokenize(query)))
+        if not terms:
+            return []
+        groups = [[term] for term in terms]
+        if prefix:
+            groups[-1] = self.__expand(terms[-1])[:MAX_PREFIX_EXPANSIONS]
+        # start from the rarest term, the rest only narrow its candidates down
+        groups.sort(key=lambda tokens: sum(map(self.__frequency, tokens)))
+        ids, scores = self.__score(groups[0])
+        for tokens in groups[1:]:
+            if not len(ids):
+                return []
+            ids, scores = self.__narrow(ids, scores, tokens)
+
+        alive = np.frombuffer(self._alive, dtype=np.bool_)[ids]
+        ids, scores = ids[alive], scores[alive]
+        del alive
+        if len(ids) > limit:
+            # ties at the cut go to the older books too; ids are ascending here
+            cutoff = -np.partition(-scores, limit - 1)[limit - 1]
+            above = np.flatnonzero(scores > cutoff)
+            tied = np.flatnonzero(scores == cutoff)[: limit - len(above)]
+            top = np.concatenate([above, tied])
+            ids, scores = ids[top], scores[top]
+        # best score first, older books first among equals
+        order = np.lexsort((ids, -scores))
+        return [self._books[book_id] for book_id in ids[order].tolist()]
+
+    def __frequency(self, token):
+        return self._document_frequency.get(token, 0)
+
+    def __postings(self, tokens):
+        """(ids, weight) for every field postings list of `tokens`."""
+        total = max(len(self._ids), 1)
+        for token in tokens:
+            frequency = self.__frequency(token)
+            if not frequency:
+                continue
+            idf = math.log(1 + total / frequency)
+            for field, weight in FIELD_WEIGHTS.items():
+                ids = self._postings[field].get(token)
+                if ids is not None:
+                    yield np.frombuffer(ids, dtype=np.int32), weight * idf
+
+    def __score(self, tokens):
+        """Sorted unique ids of books containing any of `tokens`, and their scores."""
+        parts = list(self.__postings(tokens))
+        if not parts:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        if len(parts) == 1:
+            # one field's postings are already sorted and unique
+            ids, weight = parts[0]
+            return ids.copy(), np.full(len(ids), weight)
+        ids, inverse = np.unique(
+            np.concatenate([ids for ids, _ in parts]), return_inverse=True
+        )
+        weights = np.concatenate([np.full(len(ids), weight) for ids, weight in parts])
+        return ids, np.bincount(inverse, weights=weights, minlength=len(ids))
+
+    def __narrow(self, ids, scores, tokens):
+        """The `ids` that also contain one of `tokens`, with those matches scored in."""
+        found_any = np.zeros(len(ids), dtype=np.bool_)
+        scores = scores.copy()
+        for postings, weight in self.__postings(tokens):
+            positions = np.minimum(np.searchsorted(postings, ids), len(postings) - 1)
+            found = postings[positions] == ids
+            scores[found] += weight
+            found_any |= found
+        return ids[found_any], scores[found_any]
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the index itself, not counting the books."""
+        size = self._alive.__sizeof__() + self._ids.__sizeof__() + self._books.__sizeof__()
+        size += self._vocabulary.__sizeof__() + self._document_frequency.__sizeof__()
+        size += sum(token.__sizeof__() for token in self._vocabulary)
+        for postings in self._postings.values():
+            size += postings.__sizeof__()
+            size += sum(ids.__sizeof__() for ids in postings.values())
+        return size
@@ -0,0 +1,118 @@
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from library_management_system.models.enums import Constants
+from library_management_system.utils.date_time_utils import DateTimeUtils
+
+
+def overdue_days(due_ordinals, today: int) -> np.ndarray:
+    """Days past the due date on `today`, 0 for loans not yet due."""
+    return np.maximum(np.int32(today) - np.asarray(due_ordinals, dtype=np.int32), 0)
+
+
+def accrued_fines(overdue) -> np.ndarray:
+    return np.asarray(overdue, dtype=np.int64) * Constants.LATE_FEE_PER_DAY
+
+
+class OverdueBatch(NamedTuple):
+    """Overdue loans from one chunk of OpenLoans.assess(), row for row."""
+
+    book_ids: np.ndarray
+    user_ids: np.ndarray
+    due_dates: np.ndarray  # day ordinals
+    overdue_days: np.ndarray
+    fines: np.ndarray
+
+
+class OpenLoans:
+    """
+    Every book currently lent out, as columns of NumPy arrays: book id, user
+    id, lending day and due day, days kept as ordinals. Lending a book adds a
+    row and returning it swaps the last row into its place, so the columns
+    stay dense and a whole night's assessment is one vectorized pass.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._book_ids = np.empty(capacity, dtype=np.int64)
+        self._user_ids = np.empty(capacity, dtype=np.int64)
+        self._lent_on = np.empty(capacity, dtype=np.int32)
+        self._due_on = np.empty(capacity, dtype=np.int32)
+        self._rows: dict = {}  # book id -> row
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, book_id) -> bool:
+        return book_id in self._rows
+
+    def __reserve(self, size):
+        capacity = len(self._book_ids)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name in ("_book_ids", "_user_ids", "_lent_on", "_due_on"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            setattr(self, name, grown)
+
+    def add(self, lending, due_date: str = None) -> None:
+        """Track a BookLending, due Constants.MAX_BORROW_DAYS after it unless `due_date` says otherwise."""
+        lent_on = DateTimeUtils.ordinal(lending.lending_date)
+        due_on = DateTimeUtils.ordinal(due_date) if due_date else lent_on + Constants.MAX_BORROW_DAYS
+        self.add_many([lending.book_id], [lending.user_id], [lent_on], [due_on])
+
+    def add_many(self, book_ids, user_ids, lent_on, due_on=None) -> None:
+        """Track many loans at once, days given as ordinals."""
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        if len(np.unique(book_ids)) != len(book_ids):
+            # a copy can only be out on one loan, the batch is wrong somewhere
+            raise RuntimeError("Book id lent more than once in the batch")
+        lent_on = np.asarray(lent_on, dtype=np.int32)
+        if due_on is None:
+            due_on = lent_on + Constants.MAX_BORROW_DAYS
+        for book_id in book_ids.tolist():
+            if book_id in self._rows:
+                self.remove(book_id)
+        start, end = self._size, self._size + len(book_ids)
+        self.__reserve(end)
+        self._book_ids[start:end] = book_ids
+        self._user_ids[start:end] = user_ids
+        self._lent_on[start:end] = lent_on
+        self._due_on[start:end] = due_on
+        self._rows.update(zip(book_ids.tolist(), range(start, end)))
+        self._size = end
+
+    def remove(self, book_id) -> None:
+        row = self._rows.pop(book_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            for column in (self._book_ids, self._user_ids, self._lent_on, self._due_on):
+                column[row] = column[last]
+            self._rows[int(self._book_ids[row])] = row
+        self._size = last
+
+    def assess(self, today: str = None, chunk_size: int = 1 << 20) -> Iterator[OverdueBatch]:
+        """
+        Overdue loans and their fines as of `today`, a batch per `chunk_size`
+        loans, for the fine collection step to consume as they come.
+        """
+        today = DateTimeUtils.ordinal(today or DateTimeUtils.today())
+        for start in range(0, self._size, chunk_size):
+            end = min(start + chunk_size, self._size)
+            overdue = overdue_days(self._due_on[start:end], today)
+            rows = np.flatnonzero(overdue) + start
+            if not len(rows):
+                continue
+            overdue = overdue[rows - start]
+            yield OverdueBatch(
+                self._book_ids[rows],
+                self._user_ids[rows],
+                self._due_on[rows],
+                overdue,
+                accrued_fines(overdue),
+            )
@@ -1,7 +1,10 @@
 from library_management_system.models.accounts import Account
-from library_management_system.models.book import BookItem
+from library_management_system.models.book import Book, BookItem, CopyStore
+from library_management_system.models.catalog_search import CatalogIndex
 from library_management_system.models.enums import AccountStatus, BookStatus
+from library_management_system.models.fines import OpenLoans
 from library_management_system.models.member import Member
+from library_management_system.models.reservations import ReservationExpiry
 from library_management_system.models.transactions import (
     BookLending,
     BookReservation,
@@ -11,7 +14,7 @@ from library_management_system.utils.date_time_utils import DateTimeUtils
 
 
 class Librarian(Account):
-    def __init__(self, name, email, phone_number, address, password):
+    def __init__(self, name, email, phone_number, address, password, copy_store: CopyStore = None):
         super().__init__(name, email, phone_number, address, password)
         self.librarian_id: int = 0
         self.account_status: bool = AccountStatus.ACTIVE.value
@@ -21,15 +24,57 @@ class Librarian(Account):
         self._books: dict = {}
         self._book_items: dict = {}
         self._borrowed_books: dict = {}
-        self._reserved_books: dict = {}
-
-    def add_book(self, book):
-        # Logic to add a book to the library
-        pass
-
-    def remove_book(self, book_id):
-        # Logic to remove a book from the library
-        pass
+        self._loans = OpenLoans()
+        self._holds = ReservationExpiry()
+        self._copies: dict = {}  # isbn -> book ids of its copies
+        self._catalog = CatalogIndex()
+        self._copy_store = copy_store if copy_store is not None else CopyStore()
+
+    @property
+    def copy_store(self) -> CopyStore:
+        """The store this library's copies live in, to create BookItems in."""
+        return self._copy_store
+
+    def add_book(self, book: Book) -> None:
+        """Add a title, or a copy of one (a BookItem), to the catalog."""
+        if isinstance(book, BookItem):
+            if book._store is not self._copy_store:
+                raise RuntimeError("Copy belongs to another library's store")
+            self._book_items[book.book_id] = book
+            self._copies.setdefault(book.isbn, set()).add(book.book_id)
+            book = book.book
+        if book.isbn not in self._books:
+            self._books[book.isbn] = book
+            self._catalog.add(book)
+
+    def remove_book(self, book_id) -> None:
+        """
+        Remove a copy by its book id, or a title and all its copies by its
+        ISBN. A title whose last copy goes is no longer found by searches.
+        """
+        book_item = self._book_items.pop(book_id, None)
+        if book_item is not None:
+            isbn = book_item.isbn
+            self._copy_store.remove(book_id)
+            copies = self._copies.get(isbn, set())
+            copies.discard(book_id)
+            if copies:
+                return
+        else:
+            isbn = book_id
+            for copy_id in self._copies.get(isbn, ()):
+                self._book_items.pop(copy_id, None)
+                self._copy_store.remove(copy_id)
+        self._copies.pop(isbn, None)
+        if self._books.pop(isbn, None) is not None:
+            self._catalog.remove(isbn)
+
+    def search_catalog(self, query: str, limit: int = 10, prefix: bool = False) -> list:
+        """Books matching every word of `query` in any field, best first."""
+        return self._catalog.search(query, limit=limit, prefix=prefix)
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> list:
+        return self._catalog.complete(prefix, limit=limit)
 
     def add_member(self, member):
         # Logic to add a member to the library
@@ -45,22 +90,26 @@ class Librarian(Account):
 
     def checkout_book(self, book_item: BookItem, user_id: int) -> None:
         member = self.get_user_by_id(user_id)
-        if book_item.book_status != BookStatus.AVAILABLE.value:
+        if book_item.book_status == BookStatus.RESERVED.value:
+            held = book_item.reserved_by.held
+            if held is None or held.user_id != user_id:
+                raise RuntimeError("Book is reserved by another user")
+        elif book_item.book_status != BookStatus.AVAILABLE.value:
             raise RuntimeError("Book is not available for checkout")
 
         if member.id in book_item.borrowed_by:
             raise RuntimeError("Book already borrowed by this user")
 
-        if book_item.reserved_by and self._member_id not in book_item.reserved_by:
-            raise RuntimeError("Book is reserved by another user")
-
         if len(member.borrowed_books) >= 5:
             raise RuntimeError("Borrow limit reached")
 
-        member.borrowed_books(book_item)
-        lending = BookLending(book_item.book_id, self._member_id, DateTimeUtils.today())
-        book_item.borrowed_by(self._member_id)
+        member.borrowed_books = book_item
+        lending = BookLending(book_item.book_id, user_id, DateTimeUtils.today())
+        book_item.borrowed_by = user_id
+        book_item.reserved_by.fulfil(user_id)
+        member.reserved_books.pop(book_item.book_id, None)
         self._borrowed_books[book_item.book_id] = lending
+        self._loans.add(lending)
 
     def return_book(self, book_item: BookItem, user_id: int) -> None:
         member = self.get_user_by_id(user_id)
@@ -83,24 +132,58 @@ class Librarian(Account):
         book_item.return_book(user_id)
         member.borrowed_books.pop(book_item.book_id, None)
         self._borrowed_books.pop(book_item.book_id, None)
+        self._loans.remove(book_item.book_id)
+        self._holds.hold(book_item)
 
-    def reserve_book(self, book_item: BookItem, user_id: int) -> None:
+    def reserve_book(self, book_item: BookItem, user_id: int) -> BookReservation:
         member = self.get_user_by_id(user_id)
 
-        if book_item.book_id in member.reserved_books:
+        if user_id in book_item.reserved_by:
             raise RuntimeError("Book already reserved by this user")
 
         if len(member.reserved_books) >= 5:
             raise RuntimeError("Reservation limit reached")
 
-        reserve = BookReservation(book_item.book_id, user_id, DateTimeUtils.today())
-        book_item.reserved_by(user_id)
+        reservation = BookReservation(book_item.book_id, user_id, DateTimeUtils.today())
+        book_item.add_reservation(reservation)
         member.reserved_books[book_item.book_id] = book_item
-        self._reserved_books[book_item.book_id] = reserve
+        if book_item.book_status == BookStatus.AVAILABLE.value:
+            self._holds.hold(book_item)
+        return reservation
+
+    def cancel_reservation(self, book_item: BookItem, user_id: int) -> None:
+        was_held = book_item.reserved_by.held
+        reservation = book_item.reserved_by.cancel(user_id)
+        if reservation is None:
+            raise RuntimeError("Book not reserved by this user")
+        member = self.get_user_by_id(user_id)
+        if member is not None:
+            member.reserved_books.pop(book_item.book_id, None)
+        if reservation is was_held:
+            self._holds.hold(book_item)
+
+    def expire_reservations(self, today: str = None) -> list:
+        """
+        Expire the holds nobody picked up within Constants.MAX_RESERVE_DAYS
+        and hold those copies for the next members in line. Meant to run
+        daily; returns the expired reservations.
+        """
+        expired = self._holds.expire(today)
+        for reservation in expired:
+            member = self.get_user_by_id(reservation.user_id)
+            if member is not None:
+                member.reserved_books.pop(reservation.book_id, None)
+        return expired
+
+    def assess_fines(self, today: str = None):
+        """
+        Overdue books and the fines accrued on them so far, across every open
+        loan, streamed as OverdueBatch chunks. Meant to run nightly.
+        """
+        return self._loans.assess(today)
 
     def __fetch_lending_details(self, book_item: BookItem) -> BookLending:
         return self._borrowed_books.get(book_item.book_id, None)
 
-    @staticmethod
     def get_user_by_id(self, user_id: int) -> Member:
         return self._members.get(user_id, None)
@@ -0,0 +1,143 @@
+import heapq
+import itertools
+from collections import OrderedDict
+from typing import Optional
+
+from library_management_system.models.enums import Constants, ReservationStatus
+from library_management_system.models.notify import Notify
+from library_management_system.models.transactions import BookReservation
+from library_management_system.utils.date_time_utils import DateTimeUtils
+
+
+class ReservationQueue:
+    """
+    Members waiting for one book, served first come first served. Keyed by
+    user id in arrival order, so membership, joining, cancelling from
+    anywhere in the line and taking the head are all O(1).
+
+    The head's reservation is confirmed once a copy is held for them; the
+    rest stay pending.
+    """
+
+    def __init__(self, book_id: int):
+        self.book_id = book_id
+        self._waiting: OrderedDict = OrderedDict()  # user id -> BookReservation
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._waiting
+
+    def __len__(self) -> int:
+        return len(self._waiting)
+
+    def __iter__(self):
+        """User ids, first in line first."""
+        return iter(self._waiting)
+
+    def get(self, user_id: int) -> Optional[BookReservation]:
+        return self._waiting.get(user_id)
+
+    def add(self, reservation: BookReservation) -> None:
+        if reservation.user_id in self._waiting:
+            raise RuntimeError("Book already reserved by this user")
+        self._waiting[reservation.user_id] = reservation
+
+    def head(self) -> Optional[BookReservation]:
+        return next(iter(self._waiting.values()), None)
+
+    @property
+    def held(self) -> Optional[BookReservation]:
+        """The reservation a copy is being held for, if any."""
+        head = self.head()
+        if head is not None and head.reservation_status == ReservationStatus.CONFIRMED.value:
+            return head
+        return None
+
+    def hold(self, expiry_date: str) -> Optional[BookReservation]:
+        """Confirm the head's reservation until `expiry_date`; None if nobody new is waiting."""
+        head = self.head()
+        if head is None or head.reservation_status != ReservationStatus.PENDING.value:
+            return None
+        head.reservation_status = ReservationStatus.CONFIRMED.value
+        head.expiry_date = expiry_date
+        return head
+
+    def cancel(self, user_id: int) -> Optional[BookReservation]:
+        reservation = self._waiting.pop(user_id, None)
+        if reservation is not None:
+            reservation.reservation_status = ReservationStatus.CANCELLED.value
+        return reservation
+
+    def fulfil(self, user_id: int) -> Optional[BookReservation]:
+        """The member borrowed the book, so they leave the line."""
+        return self._waiting.pop(user_id, None)
+
+    def expire_head(self) -> BookReservation:
+        _, reservation = self._waiting.popitem(last=False)
+        reservation.reservation_status = ReservationStatus.EXPIRED.value
+        return reservation
+
+
+class _NoReservations(ReservationQueue):
+    """The line of every copy nobody has reserved: one shared, empty queue."""
+
+    def add(self, reservation: BookReservation) -> None:
+        raise RuntimeError("Reserve a copy through BookItem.add_reservation")
+
+
+NO_RESERVATIONS = _NoReservations(book_id=None)
+
+
+class ReservationExpiry:
+    """
+    Copies held for pickup across every book, in a min-heap by the day the
+    hold runs out. expire() pops everything due in one pass, expires those
+    reservations and holds each freed copy for the next member in line.
+
+    Holds that end early (the member borrowed the book or cancelled, or the
+    copy was removed) are left in the heap and skipped when they come due.
+    """
+
+    def __init__(self, hold_days: int = Constants.MAX_RESERVE_DAYS, notify: bool = True):
+        self.hold_days = hold_days
+        self.notify = notify
+        self._heap: list = []  # (expiry ordinal, sequence, book item, reservation)
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def hold(self, book_item, today: str = None) -> Optional[BookReservation]:
+        """Hold `book_item` for the first member waiting for it, if any."""
+        today = today or DateTimeUtils.today()
+        expires = DateTimeUtils.ordinal(today) + self.hold_days
+        return self.__hold(book_item, expires, DateTimeUtils.from_ordinal(expires))
+
+    def __hold(self, book_item, expires: int, expiry_date: str) -> Optional[BookReservation]:
+        reservation = book_item.hold_for_next(expiry_date)
+        if reservation is None:
+            return None
+        heapq.heappush(self._heap, (expires, next(self._sequence), book_item, reservation))
+        if self.notify:
+            Notify(
+                reservation.user_id,
+                book_item.book_id,
+                f"Book {book_item.title} is held for you until {reservation.expiry_date}.",
+            ).send_notification()
+        return reservation
+
+    def expire(self, today: str = None) -> list:
+        """Expire every hold that ran out before `today`, returning those reservations."""
+        today = today or DateTimeUtils.today()
+        cutoff = DateTimeUtils.ordinal(today)
+        expired, freed = [], {}
+        while self._heap and self._heap[0][0] < cutoff:
+            _, _, book_item, reservation = heapq.heappop(self._heap)
+            if book_item.removed or book_item.reserved_by.held is not reservation:
+                continue
+            expired.append(book_item.reserved_by.expire_head())
+            freed[book_item.book_id] = book_item
+        expires = cutoff + self.hold_days
+        expiry_date = DateTimeUtils.from_ordinal(expires)
+        for book_item in freed.values():
+            self.__hold(book_item, expires, expiry_date)
+        return expired
@@ -1,6 +1,6 @@
-from datetime import datetime
-
 from library_management_system.models.enums import Constants, ReservationStatus
+from library_management_system.models.fines import accrued_fines, overdue_days
+from library_management_system.utils.date_time_utils import DateTimeUtils
 
 
 class BookReservation:
@@ -8,7 +8,9 @@ class BookReservation:
         self.book_id = book_id
         self.user_id = user_id
         self.reservation_date = reservation_date
-        self.reservation_status: ReservationStatus = ReservationStatus.CONFIRMED.value
+        # pending while waiting in the queue, confirmed once a copy is held for them
+        self.reservation_status: ReservationStatus = ReservationStatus.PENDING.value
+        self.expiry_date: str = None  # last day to pick the held copy up
 
     def __repr__(self):
         return f"BookReservation(book_id={self.book_id}, user_id={self.user_id}, reservation_date={self.reservation_date})"
@@ -19,6 +21,7 @@ class BookReservation:
             "user_id": self.user_id,
             "reservation_date": self.reservation_date,
             "reservation_status": self.reservation_status,
+            "expiry_date": self.expiry_date,
         }
 
 
@@ -50,11 +53,11 @@ class Fine:
         self.book_id = book_id
         self.creation_date = creation_date
 
-    def calculate_fine(self):
-        today = datetime.date.today()
-        overdue_days = (today - self.creation_date).days
-        if overdue_days > Constants.MAX_BORROW_DAYS:
-            return overdue_days * Constants.LATE_FEE_PER_DAY
+    def calculate_fine(self, today: str = None) -> int:
+        """Late fee for a book lent on `creation_date`, for each day past its due date."""
+        due = DateTimeUtils.ordinal(self.creation_date) + Constants.MAX_BORROW_DAYS
+        today = DateTimeUtils.ordinal(today or DateTimeUtils.today())
+        return int(accrued_fines(overdue_days([due], today))[0])
 
     def initiate_fine_collection_transaction(self):
         return
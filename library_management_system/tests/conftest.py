@@ -0,0 +1,40 @@
+import pytest
+
+from library_management_system.models.book import BookItem
+from library_management_system.models.library import Librarian
+from library_management_system.models.member import Member
+
+
+@pytest.fixture
+def librarian():
+    librarian = Librarian("librarian", "librarian@example.com", "100", None, "secret")
+    # add_member is still a stub, so members are registered directly
+    for user_id in (1, 2, 3):
+        member = Member(f"member{user_id}", f"member{user_id}@example.com", str(user_id), None, "pw")
+        member._member_id = user_id
+        librarian._members[user_id] = member
+    return librarian
+
+
+@pytest.fixture
+def new_copy(librarian):
+    def new_copy(book_id, isbn="9780000000001", title="A Popular Book"):
+        return BookItem(
+            {
+                "isbn": isbn,
+                "title": title,
+                "subject": "fiction",
+                "publisher": "press",
+                "language": "english",
+                "authors": ["an author"],
+                "publication_year": 2000,
+                "number_of_pages": 300,
+                "book_id": book_id,
+                "rack_number": "A1",
+                "book_format": "paperback",
+                "price": 10.0,
+            },
+            librarian.copy_store,
+        )
+
+    return new_copy
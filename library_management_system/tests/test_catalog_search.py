@@ -0,0 +1,89 @@
+from library_management_system.models.book import Book
+from library_management_system.models.catalog_search import CatalogIndex
+
+
+def book(isbn, title, authors=("an author",), subject="fiction", publisher="press"):
+    return Book(
+        {
+            "isbn": isbn,
+            "title": title,
+            "subject": subject,
+            "publisher": publisher,
+            "language": "english",
+            "authors": list(authors),
+            "publication_year": 2000,
+            "number_of_pages": 300,
+        }
+    )
+
+
+def isbns(books):
+    return [found.isbn for found in books]
+
+
+def test_every_term_must_match_in_some_field():
+    index = CatalogIndex()
+    index.add(book("1", "The Hobbit", ["J. R. R. Tolkien"], subject="fantasy"))
+    index.add(book("2", "The Silmarillion", ["J. R. R. Tolkien"], subject="mythology"))
+    index.add(book("3", "Earthsea", ["Ursula K. Le Guin"], subject="fantasy"))
+
+    assert isbns(index.search("tolkien fantasy")) == ["1"]
+    assert sorted(isbns(index.search("tolkien"))) == ["1", "2"]
+    assert index.search("tolkien dragons") == []
+    assert index.search("") == []
+
+
+def test_last_term_expands_as_a_prefix():
+    index = CatalogIndex()
+    index.add(book("1", "Harry Potter and the Philosopher's Stone"))
+    index.add(book("2", "Harry Pottinger's Almanac"))
+    index.add(book("3", "Harry Dresden"))
+
+    assert index.search("harry pot") == []
+    assert sorted(isbns(index.search("harry pot", prefix=True))) == ["1", "2"]
+    # only the last term is a prefix
+    assert index.search("har potter", prefix=True) == []
+    assert sorted(index.complete("pot")) == ["potter", "pottinger"]
+
+
+def test_weightier_fields_rank_first_and_ties_keep_insertion_order():
+    index = CatalogIndex()
+    index.add(book("publisher", "Collected Essays", publisher="Ocean Press"))
+    index.add(book("title", "The Ocean"))
+    index.add(book("subject", "Tides", subject="ocean"))
+    index.add(book("title again", "Ocean Deep"))
+
+    assert isbns(index.search("ocean")) == ["title", "title again", "subject", "publisher"]
+    assert isbns(index.search("ocean", limit=2)) == ["title", "title again"]
+
+
+def test_compaction_remaps_ids_of_the_books_left():
+    index = CatalogIndex()
+    for number in range(2000):
+        index.add(book(str(number), f"Volume {number}", subject="odd" if number % 2 else "even"))
+    # over a quarter of the ids dead and more than 1000 of them compacts
+    for number in range(0, 2000, 2):
+        index.remove(str(number))
+    index.remove("1")
+    assert index._dead == 0
+    assert len(index._books) == len(index) == 999
+
+    assert index.search("even") == []
+    assert isbns(index.search("volume 1999")) == ["1999"]
+    assert isbns(index.search("odd", limit=3)) == ["3", "5", "7"]
+    assert index.complete("ev") == []
+    # ids handed out after compaction don't collide with the remapped ones
+    index.add(book("new", "Volume Extra", subject="odd"))
+    assert isbns(index.search("volume extra")) == ["new"]
+    assert len(index.search("odd", limit=2000)) == 1000
+
+
+def test_adding_an_isbn_again_replaces_the_book():
+    index = CatalogIndex()
+    index.add(book("1", "First Edition Title"))
+    index.add(book("1", "Revised Title"))
+
+    assert len(index) == 1
+    assert index.search("first") == []
+    assert [found.title for found in index.search("title")] == ["Revised Title"]
+    assert index.complete("fir") == []
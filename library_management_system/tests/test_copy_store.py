@@ -0,0 +1,87 @@
+import pytest
+
+from library_management_system.models.book import BookItem, CopyStore
+from library_management_system.models.enums import BookStatus
+from library_management_system.models.library import Librarian
+
+
+def test_copies_share_their_title(new_copy):
+    first, second = new_copy(1), new_copy(2)
+    other = new_copy(3, isbn="9780000000002", title="Another Book")
+    store = first._store
+
+    assert first.book is second.book
+    assert (first.title, other.title) == ("A Popular Book", "Another Book")
+    assert store.get(2).book_id == 2
+    assert store.get(4) is None
+    assert len(store) == 3
+    with pytest.raises(RuntimeError):
+        new_copy(1)
+
+
+def test_views_of_a_removed_copy_raise(new_copy):
+    removed, kept = new_copy(1), new_copy(2, isbn="9780000000002", title="Kept")
+    store = removed._store
+    store.remove(1)
+
+    for attribute in ("title", "book_id", "book_status", "price", "reserved_by"):
+        with pytest.raises(RuntimeError):
+            getattr(removed, attribute)
+    assert store.get(1) is None
+    assert 1 not in store and len(store) == 1
+    assert kept.title == "Kept"
+    assert store.count_by_status()[BookStatus.AVAILABLE.value] == 1
+
+
+def test_librarian_removing_copies_removes_them_from_the_store(librarian, new_copy):
+    copies = [new_copy(book_id) for book_id in (1, 2, 3)]
+    other = new_copy(4, isbn="9780000000002", title="Another Book")
+    for book_item in copies + [other]:
+        librarian.add_book(book_item)
+    store = librarian.copy_store
+
+    librarian.remove_book(1)
+    assert 1 not in store
+    with pytest.raises(RuntimeError):
+        copies[0].title
+    assert [book.isbn for book in librarian.search_catalog("popular")] == ["9780000000001"]
+
+    # a title goes with all of its copies
+    librarian.remove_book("9780000000001")
+    assert 2 not in store and 3 not in store
+    assert librarian.search_catalog("popular") == []
+    assert other.title == "Another Book"
+
+
+def test_each_librarian_has_its_own_store(librarian, new_copy):
+    librarian.add_book(new_copy(1))
+    other = Librarian("other", "other@example.com", "200", None, "secret")
+    assert other.copy_store is not librarian.copy_store
+    assert 1 not in other.copy_store
+
+    # the same book id can be a copy in both, but only added where it lives
+    elsewhere = BookItem(
+        {
+            "isbn": "9780000000009",
+            "title": "Elsewhere",
+            "subject": "fiction",
+            "publisher": "press",
+            "language": "english",
+            "authors": ["an author"],
+            "publication_year": 2000,
+            "number_of_pages": 300,
+            "book_id": 1,
+            "rack_number": "B2",
+            "book_format": "paperback",
+            "price": 10.0,
+        },
+        other.copy_store,
+    )
+    with pytest.raises(RuntimeError):
+        librarian.add_book(elsewhere)
+    other.add_book(elsewhere)
+    assert librarian.copy_store.get(1).title == "A Popular Book"
+    assert other.copy_store.get(1).title == "Elsewhere"
+
+    shared = CopyStore()
+    assert Librarian("third", "t@example.com", "300", None, "pw", copy_store=shared).copy_store is shared
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from library_management_system.models.enums import Constants
+from library_management_system.models.fines import OpenLoans
+from library_management_system.models.transactions import BookLending, Fine
+from library_management_system.utils.date_time_utils import DateTimeUtils
+
+LENT_ON = "2026-03-01"
+
+
+def day(offset):
+    return DateTimeUtils.from_ordinal(DateTimeUtils.ordinal(LENT_ON) + offset)
+
+
+def test_fine_counts_only_days_past_the_due_date():
+    fine = Fine(1, 1, LENT_ON)
+    assert fine.calculate_fine(LENT_ON) == 0
+    assert fine.calculate_fine(day(Constants.MAX_BORROW_DAYS)) == 0
+    assert fine.calculate_fine(day(Constants.MAX_BORROW_DAYS + 1)) == Constants.LATE_FEE_PER_DAY
+    assert fine.calculate_fine(day(Constants.MAX_BORROW_DAYS + 10)) == 10 * Constants.LATE_FEE_PER_DAY
+    assert type(fine.calculate_fine(day(Constants.MAX_BORROW_DAYS + 3))) is int
+
+
+def test_assess_yields_overdue_loans_a_chunk_at_a_time():
+    loans = OpenLoans(capacity=2)
+    start = DateTimeUtils.ordinal(LENT_ON)
+    # book n was lent n days before LENT_ON, so it's n days overdue on `today`
+    loans.add_many(range(6), [10, 11, 12, 13, 14, 15], [start - n for n in range(6)])
+    loans.add(BookLending(6, 16, LENT_ON), due_date=day(-1))
+    today = day(Constants.MAX_BORROW_DAYS)
+
+    batches = list(loans.assess(today, chunk_size=3))
+    assert [batch.book_ids.tolist() for batch in batches] == [[1, 2], [3, 4, 5], [6]]
+    assert [batch.user_ids.tolist() for batch in batches] == [[11, 12], [13, 14, 15], [16]]
+    assert [batch.overdue_days.tolist() for batch in batches] == [[1, 2], [3, 4, 5], [15]]
+    assert batches[1].fines.tolist() == [30, 40, 50]
+    assert batches[2].due_dates.tolist() == [start - 1]
+
+    # the batches and Fine, one loan at a time, agree
+    total = sum(int(batch.fines.sum()) for batch in batches)
+    assert total == sum(Fine(0, n, day(-n)).calculate_fine(today) for n in range(6)) + 150
+
+    # chunks without an overdue loan yield nothing
+    assert [batch.book_ids.tolist() for batch in loans.assess(LENT_ON, chunk_size=3)] == [[6]]
+    assert list(OpenLoans().assess(today)) == []
+
+
+def test_returned_loans_leave_the_assessment():
+    loans = OpenLoans()
+    start = DateTimeUtils.ordinal(LENT_ON)
+    loans.add_many([1, 2, 3], [10, 20, 30], [start, start, start])
+    loans.remove(1)
+    loans.remove(7)
+    assert len(loans) == 2 and 1 not in loans
+
+    (batch,) = loans.assess(day(Constants.MAX_BORROW_DAYS + 1))
+    assert sorted(zip(batch.book_ids.tolist(), batch.user_ids.tolist())) == [(2, 20), (3, 30)]
+
+
+def test_lending_a_book_again_replaces_its_loan():
+    loans = OpenLoans()
+    start = DateTimeUtils.ordinal(LENT_ON)
+    loans.add_many([1, 2], [10, 20], [start, start])
+    loans.add_many([1], [30], [start + 5])
+    assert len(loans) == 2
+
+    (batch,) = loans.assess(day(Constants.MAX_BORROW_DAYS + 1))
+    assert batch.book_ids.tolist() == [2]
+
+
+def test_duplicate_book_ids_in_one_batch_are_rejected():
+    loans = OpenLoans()
+    start = DateTimeUtils.ordinal(LENT_ON)
+    loans.add_many([1], [10], [start])
+    with pytest.raises(RuntimeError):
+        loans.add_many(np.array([2, 3, 2]), [20, 30, 40], [start] * 3)
+    assert len(loans) == 1 and 2 not in loans
+    assert [batch.book_ids.tolist() for batch in loans.assess(day(30))] == [[1]]
@@ -0,0 +1,108 @@
+import pytest
+
+from library_management_system.models.enums import BookStatus, ReservationStatus
+from library_management_system.models.reservations import ReservationQueue
+from library_management_system.models.transactions import BookReservation
+from library_management_system.utils.date_time_utils import DateTimeUtils
+
+
+def days_from_now(days):
+    return DateTimeUtils.from_ordinal(DateTimeUtils.ordinal(DateTimeUtils.today()) + days)
+
+
+def test_queue_serves_members_first_come_first_served():
+    queue = ReservationQueue(book_id=1)
+    for user_id in (3, 1, 2):
+        queue.add(BookReservation(1, user_id, "2026-01-01"))
+    with pytest.raises(RuntimeError):
+        queue.add(BookReservation(1, 1, "2026-01-02"))
+
+    assert list(queue) == [3, 1, 2]
+    assert queue.cancel(1).reservation_status == ReservationStatus.CANCELLED.value
+    assert queue.expire_head().user_id == 3
+    assert queue.head().user_id == 2
+    assert 1 not in queue and len(queue) == 1
+
+
+def test_copy_is_held_for_the_first_member_and_fulfilled_on_checkout(librarian, new_copy):
+    book_item = new_copy(1)
+    first = librarian.reserve_book(book_item, 1)
+    second = librarian.reserve_book(book_item, 2)
+
+    assert book_item.book_status == BookStatus.RESERVED.value
+    assert book_item.reserved_by.held is first
+    assert first.reservation_status == ReservationStatus.CONFIRMED.value
+    assert second.reservation_status == ReservationStatus.PENDING.value
+
+    librarian.checkout_book(book_item, 1)
+    assert book_item.book_status == BookStatus.BORROWED.value
+    assert list(book_item.reserved_by) == [2]
+    assert book_item.book_id not in librarian.get_user_by_id(1).reserved_books
+
+
+def test_only_the_member_a_copy_is_held_for_can_borrow_it(librarian, new_copy):
+    book_item = new_copy(1)
+    librarian.reserve_book(book_item, 1)
+    with pytest.raises(RuntimeError, match="reserved by another user"):
+        librarian.checkout_book(book_item, 2)
+    assert book_item.book_status == BookStatus.RESERVED.value
+
+
+def test_expired_hold_passes_to_the_next_member(librarian, new_copy):
+    book_item = new_copy(1)
+    first = librarian.reserve_book(book_item, 1)
+    second = librarian.reserve_book(book_item, 2)
+
+    # holds last MAX_RESERVE_DAYS, nothing is due the day before they run out
+    assert librarian.expire_reservations(days_from_now(14)) == []
+    assert librarian.expire_reservations(days_from_now(15)) == [first]
+    assert first.reservation_status == ReservationStatus.EXPIRED.value
+    assert book_item.reserved_by.held is second
+    assert second.expiry_date == days_from_now(29)
+    assert book_item.book_id not in librarian.get_user_by_id(1).reserved_books
+    librarian.checkout_book(book_item, 2)
+
+
+def test_removed_copy_does_not_stop_other_holds_expiring(librarian, new_copy):
+    removed, kept = new_copy(1), new_copy(2)
+    librarian.add_book(removed)
+    librarian.add_book(kept)
+    librarian.reserve_book(removed, 1)
+    first = librarian.reserve_book(kept, 2)
+    second = librarian.reserve_book(kept, 3)
+
+    librarian.remove_book(1)
+    assert librarian.expire_reservations(days_from_now(15)) == [first]
+    assert kept.reserved_by.held is second
+
+
+def test_queue_is_dropped_once_nobody_is_waiting(librarian, new_copy):
+    book_item = new_copy(1)
+    store, row = book_item._store, book_item._row
+    librarian.reserve_book(book_item, 1)
+    assert row in store._reserved_by
+
+    librarian.expire_reservations(days_from_now(15))
+    assert book_item.book_status == BookStatus.AVAILABLE.value
+    assert row not in store._reserved_by
+    assert len(book_item.reserved_by) == 0
+
+    # cancelling the last hold puts the copy back on the shelf as well
+    librarian.reserve_book(book_item, 2)
+    librarian.cancel_reservation(book_item, 2)
+    assert book_item.book_status == BookStatus.AVAILABLE.value
+    assert row not in store._reserved_by
+
+
+def test_reading_an_empty_line_does_not_start_a_queue(new_copy):
+    book_item = new_copy(1)
+    store, row = book_item._store, book_item._row
+    assert len(book_item.reserved_by) == 0 and 1 not in book_item.reserved_by
+    assert book_item.reserved_by is new_copy(2).reserved_by
+    assert row not in store._reserved_by
+    with pytest.raises(RuntimeError):
+        book_item.reserved_by.add(BookReservation(1, 1, "2026-01-01"))
+
+    book_item.reserved_by = 1
+    assert list(book_item.reserved_by) == [1]
+    assert row in store._reserved_by
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 class DateTimeUtils:
@@ -11,3 +11,12 @@ class DateTimeUtils:
     def due_date(days: int) -> str:
         due_date = datetime.now() + timedelta(days=days)
         return due_date.strftime("%Y-%m-%d")
+
+    @staticmethod
+    def ordinal(day: str) -> int:
+        """Day number of a "%Y-%m-%d" date, for comparing and adding days."""
+        return date.fromisoformat(day).toordinal()
+
+    @staticmethod
+    def from_ordinal(ordinal: int) -> str:
+        return date.fromordinal(ordinal).strftime("%Y-%m-%d")
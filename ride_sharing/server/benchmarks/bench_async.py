@@ -0,0 +1,182 @@
+"""
+Many requests in flight at once against a database with a network round
+trip, served two ways:
+
+  sync   the Flask app, one thread per in-flight request (the thread pool
+         of a threaded WSGI server), blocking DB-API calls
+  async  the ASGI app on one event loop, every database call awaited
+
+Both run the same services against the SQLite stand-in with the same
+injected per-statement latency and the same connection pool size. The mix
+is user lookups and ride history pages, each for a different user so every
+request reaches the database.
+
+    python -m benchmarks.bench_async --in-flight 1000 --requests 10000 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RIDES_PER_USER = 3
+
+
+def seed(path, users):
+    from src.database.databaseObject import DatabaseObject
+    from src.database.sqlite_standin import SQLiteStandIn
+
+    db = DatabaseObject(connection_factory=SQLiteStandIn(path).load_schema())
+    db.execute_many(
+        "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+        [(user_id, f"user{user_id}", user_id, "india") for user_id in range(1, users + 1)],
+    )
+    db.execute_many(
+        """insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare)
+        values (%s, %s, %s, %s, %s, %s, %s)""",
+        [
+            (user_id, 1, 0.0, 0.0, 0.01, 0.01, 42)
+            for user_id in range(1, users + 1)
+            for _ in range(RIDES_PER_USER)
+        ],
+    )
+    DatabaseObject.close_pools()
+
+
+def workload(requests, offset):
+    # even requests look a user up, odd ones fetch a history page
+    for request in range(requests):
+        user_id = offset + request // 2 + 1
+        if request % 2:
+            yield "GET", "/api/v1/ride/get_ride_history", f"user_id={user_id}"
+        else:
+            yield "GET", f"/api/v1/users/{user_id}", ""
+
+
+def summarise(label, in_flight, results, elapsed, threads):
+    # a request that waited too long for a pooled connection fails with a 500
+    latencies = sorted(seconds for status, seconds in results if status == 200)
+    errors = len(results) - len(latencies)
+    print(
+        f"{label:5}  in flight {in_flight:5}  threads {threads:5}  "
+        f"{len(latencies) / elapsed:8.0f} req/s  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:7.1f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.1f} ms  "
+        f"errors {errors}"
+    )
+
+
+def run_sync(path, requests, in_flight, latency):
+    from flask import Flask
+
+    from src.app.routes import initialise_routes
+    from src.app.services import AppServices, init_app_services
+    from src.database.databaseObject import DatabaseObject
+    from src.database.sqlite_standin import SQLiteStandIn
+
+    app = Flask(__name__)
+    factory = SQLiteStandIn(path, statement_latency=latency)
+    init_app_services(app, AppServices(lambda: DatabaseObject(connection_factory=factory)))
+    initialise_routes(app)
+    local = threading.local()
+
+    def send(request):
+        method, path, query = request
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        started = time.perf_counter()
+        response = client.open(path, method=method, query_string=query)
+        return response.status_code, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=in_flight) as pool:
+        # start every thread before the clock does
+        list(pool.map(lambda _: time.sleep(0.01), range(in_flight)))
+        started = time.perf_counter()
+        results = list(pool.map(send, workload(requests, 0)))
+        elapsed = time.perf_counter() - started
+        threads = threading.active_count()
+    summarise("sync", in_flight, results, elapsed, threads)
+    DatabaseObject.close_pools()
+
+
+async def run_async(path, requests, in_flight, latency):
+    from src.app.asgi import AsyncAppServices, create_asgi_app
+    from src.cache.lru_cache import LRUCache
+    from src.database.async_database import AsyncDatabaseObject
+    from src.database.databaseObject import DatabaseObject
+    from src.database.sqlite_standin import AsyncSQLiteStandIn, SQLiteStandIn
+
+    factory = AsyncSQLiteStandIn(path, statement_latency=latency)
+    app = create_asgi_app(
+        AsyncAppServices(
+            db_factory=lambda: AsyncDatabaseObject(connection_factory=factory),
+            sync_db_factory=lambda: DatabaseObject(connection_factory=SQLiteStandIn(path)),
+            cache=LRUCache(),
+        )
+    )
+
+    async def send(request):
+        method, path, query = request
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def respond(message):
+            sent.append(message)
+
+        started = time.perf_counter()
+        scope = {"type": "http", "method": method, "path": path, "query_string": query.encode()}
+        await app(scope, receive, respond)
+        return sent[0]["status"], time.perf_counter() - started
+
+    requests_left = iter(workload(requests, requests // 2))
+    results = []
+
+    async def client():
+        for request in requests_left:
+            results.append(await send(request))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(in_flight)))
+    elapsed = time.perf_counter() - started
+    summarise("async", in_flight, results, elapsed, threading.active_count())
+    await AsyncDatabaseObject.close_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--in-flight", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ridesharing.db")
+        # the two modes look up different users, so neither warms the other's cache
+        seed(path, args.requests)
+        os.environ.update(
+            DATABASE_POOL_SIZE=str(args.pool_size),
+            RIDE_UPDATE_FLUSH_MS="0",
+            DRIVER_LOCATION_PERSIST_SECONDS="3600",
+        )
+        latency = args.latency_ms / 1000
+        print(
+            f"{args.requests} requests, {args.latency_ms} ms per statement, "
+            f"pool of {args.pool_size} connections"
+        )
+        modes = args.modes.split(",")
+        if "sync" in modes:
+            run_sync(path, args.requests, args.in_flight, latency)
+        if "async" in modes:
+            asyncio.run(run_async(path, args.requests, args.in_flight, latency))
+
+
+if __name__ == "__main__":
+    main()
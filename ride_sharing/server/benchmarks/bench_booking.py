@@ -0,0 +1,155 @@
+"""
+Booking throughput and correctness with many concurrent riders:
+
+Every rider books from the same spot, so they all compete for the same
+nearest drivers.
+
+  naive        select a free driver, flip it, insert the ride; three
+               autocommitted statements, the race the old code had
+  two-step     claim the driver in one transaction, insert the ride in
+               another (two connections per booking)
+  transaction  lock the driver and insert the ride in one transaction,
+               what RideService.create_ride does
+  RideService  the same through create_ride, including fare and surge
+
+    python -m benchmarks.bench_booking --bookings 4000 --threads 16
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.geo.driver_index import NoDriverAvailable
+from src.services.ride_service import RideService
+from src.utils.constants import BOOKING_CANDIDATES, VehicleType
+
+CAR = VehicleType.CAR.value
+
+SELECT_FREE = """select driver_id from driver_availability
+where driver_id in ({}) and is_available = %s limit 1"""
+INSERT_RIDE = """insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare)
+values (%s, %s, %s, %s, %s, %s, %s)"""
+
+
+def nearest_candidates(service):
+    return [
+        driver_id
+        for _, driver_id in service.driver_index.nearest(
+            [0.0, 0.0], CAR, k=BOOKING_CANDIDATES
+        )
+    ]
+
+
+def naive(service, rider_id):
+    candidates = nearest_candidates(service)
+    if not candidates:
+        raise NoDriverAvailable()
+    db = service.db
+    rows = db.fetch_all(
+        SELECT_FREE.format(", ".join(["%s"] * len(candidates))), (*candidates, True)
+    )
+    if not rows:
+        raise NoDriverAvailable()
+    driver_id = rows[0][0]
+    db.execute(
+        "update driver_availability set is_available=%s where driver_id=%s",
+        (False, driver_id),
+    )
+    db.execute(INSERT_RIDE, (rider_id, driver_id, 0, 0, 1, 1, 14))
+    service.driver_index.claim(driver_id)
+
+
+def two_step(service, rider_id):
+    candidates = nearest_candidates(service)
+    if not candidates:
+        raise NoDriverAvailable()
+    with service.db.transaction() as tx:
+        driver_id = service.driver_repository.claim_first_available(candidates, tx)
+    if driver_id is None:
+        raise NoDriverAvailable()
+    service.db.execute(INSERT_RIDE, (rider_id, driver_id, 0, 0, 1, 1, 14))
+    service.driver_index.claim(driver_id)
+
+
+def single_transaction(service, rider_id):
+    candidates = nearest_candidates(service)
+    if not candidates:
+        raise NoDriverAvailable()
+    with service.db.transaction() as tx:
+        driver_id = service.driver_repository.claim_first_available(candidates, tx)
+        if driver_id is None:
+            raise NoDriverAvailable()
+        tx.execute(INSERT_RIDE, (rider_id, driver_id, 0, 0, 1, 1, 14))
+    service.driver_index.claim(driver_id)
+
+
+BOOKERS = {"naive": naive, "two-step": two_step, "transaction": single_transaction}
+
+
+def run(mode, args, directory):
+    path = os.path.join(directory, f"{mode}.db")
+    db = DatabaseObject(connection_factory=SQLiteStandIn(path).load_schema())
+    service = RideService(db)
+    if service.ride_updates is not None:
+        service.ride_updates.stop()
+    for driver_id in range(1, args.drivers + 1):
+        service.update_driver_location(driver_id, {"location": [0.0001 * driver_id, 0.0]})
+
+    def book(rider_id):
+        try:
+            if mode == "RideService":
+                service.create_ride(
+                    {
+                        "user_id": rider_id,
+                        "source_location": [0.0, 0.0],
+                        "destination_location": [1.0, 1.0],
+                    }
+                )
+            else:
+                BOOKERS[mode](service, rider_id)
+            return True
+        except NoDriverAvailable:
+            return False
+
+    started = time.perf_counter()
+    booked = 0
+    # rounds of bookings, freeing the fleet between rounds
+    for offset in range(0, args.bookings, args.drivers):
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            batch = range(offset, min(offset + args.drivers, args.bookings))
+            booked += sum(pool.map(book, batch))
+        db.execute("update driver_availability set is_available=%s", (True,))
+        for driver_id in range(1, args.drivers + 1):
+            service.driver_index.mark_available(driver_id)
+        rides = [row[0] for row in db.fetch_all("select driver_id from rides")]
+        db.execute("delete from rides")
+        run.duplicates += sum(count - 1 for count in Counter(rides).values() if count > 1)
+    elapsed = time.perf_counter() - started
+    DatabaseObject.close_pools()
+    return booked / elapsed, booked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=4000)
+    parser.add_argument("--drivers", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in (*BOOKERS, "RideService"):
+            run.duplicates = 0
+            throughput, booked = run(mode, args, directory)
+            print(
+                f"{mode:<12}: {throughput:>7,.0f} bookings/s, {booked:>5} booked, "
+                f"{run.duplicates} drivers double-booked"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Onboarding a fleet of drivers through the API, against the SQLite stand-in:
+
+  one by one  POST /users then POST /users/<id>/update_to_driver per driver,
+              each an autocommitted statement
+  bulk        POST /drivers/bulk with every driver in one request: compiled
+              validation, then executemany in chunked transactions
+
+The one-by-one run onboards --sample drivers and is scaled to --drivers.
+
+    python -m benchmarks.bench_bulk_onboarding --drivers 10000 --sample 500
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from src.app.routes import initialise_routes
+from src.app.services import AppServices, init_app_services
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+
+
+def make_client(path):
+    app = Flask(__name__)
+    factory = SQLiteStandIn(path).load_schema()
+    init_app_services(app, AppServices(lambda: DatabaseObject(connection_factory=factory)))
+    initialise_routes(app)
+    return app.test_client()
+
+
+def drivers(count, first_phone):
+    return [
+        {
+            "user_name": f"driver{number}",
+            "phone_number": first_phone + number,
+            "country": "india",
+            "email": f"driver{number}@fleet.example",
+        }
+        for number in range(count)
+    ]
+
+
+def one_by_one(client, records):
+    for record in records:
+        client.post("/api/v1/users", json=record)
+    # create_user doesn't return the id, the stand-in numbers rows from 1
+    for user_id in range(1, len(records) + 1):
+        client.post(f"/api/v1/users/{user_id}/update_to_driver")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=500)
+    args = parser.parse_args()
+    os.environ["ADMISSION_ENABLED"] = "0"
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = make_client(os.path.join(directory, "one_by_one.db"))
+        started = time.perf_counter()
+        one_by_one(client, drivers(args.sample, 9_000_000_000))
+        per_driver = (time.perf_counter() - started) / args.sample
+        print(
+            f"one by one  {per_driver * 1e6:8.0f} us/driver  "
+            f"{args.drivers} drivers ~{per_driver * args.drivers:7.2f} s"
+        )
+        DatabaseObject.close_pools()
+
+        client = make_client(os.path.join(directory, "bulk.db"))
+        records = drivers(args.drivers, 9_000_000_000)
+        started = time.perf_counter()
+        response = client.post("/api/v1/drivers/bulk", json={"users": records})
+        elapsed = time.perf_counter() - started
+        data = response.get_json()["data"]
+        print(
+            f"bulk        {elapsed / args.drivers * 1e6:8.0f} us/driver  "
+            f"{args.drivers} drivers  {elapsed:7.2f} s  "
+            f"created {data['created']}  errors {len(data['errors'])}"
+        )
+        DatabaseObject.close_pools()
+
+
+if __name__ == "__main__":
+    main()
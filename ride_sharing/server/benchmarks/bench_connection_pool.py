@@ -0,0 +1,102 @@
+"""
+Compares queries/sec of the pooled DatabaseObject against the old
+connect-per-query behaviour, using the SQLite stand-in with a simulated
+connection handshake.
+
+    python -m benchmarks.bench_connection_pool --threads 8 --queries 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+
+QUERY = "select id, user_name from users where id=%s"
+
+
+def setup_database(path):
+    conn = SQLiteStandIn(path)()
+    cursor = conn.cursor()
+    cursor.execute(
+        "create table users (id integer primary key, user_name varchar(16))"
+    )
+    cursor.executemany(
+        "insert into users (id, user_name) values (%s, %s)",
+        [(i, f"user{i}") for i in range(1, 1001)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def connect_per_query(factory):
+    def run(i):
+        conn = factory()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(QUERY, (i % 1000 + 1,))
+            cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+    return run
+
+
+def pooled(db):
+    def run(i):
+        db.fetch_all(QUERY, (i % 1000 + 1,))
+
+    return run
+
+
+def measure(run, queries, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(run, range(queries)))
+    return queries / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument(
+        "--connect-latency-ms",
+        type=float,
+        default=2.0,
+        help="simulated TCP + auth handshake per new connection",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup_database(path)
+        factory = SQLiteStandIn(path, connect_latency=args.connect_latency_ms / 1000)
+
+        baseline = measure(connect_per_query(factory), args.queries, args.threads)
+
+        os.environ["DATABASE_POOL_SIZE"] = str(args.pool_size)
+        db = DatabaseObject(connection_factory=factory)
+        pooled_qps = measure(pooled(db), args.queries, args.threads)
+        stats = db.pool_stats()
+        DatabaseObject.close_pools()
+
+    print(f"connect-per-query : {baseline:10.0f} queries/sec")
+    print(f"pooled            : {pooled_qps:10.0f} queries/sec")
+    print(f"speedup           : {pooled_qps / baseline:10.1f}x")
+    print(
+        "pool stats        : "
+        f"size={stats['pool_size']} created={stats['created']} "
+        f"checkouts={stats['checkouts']} "
+        f"avg_wait={stats['avg_wait_seconds'] * 1e6:.1f}us "
+        f"max_wait={stats['max_wait_seconds'] * 1e6:.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Nearest-driver assignment latency with a large simulated fleet.
+
+    python -m benchmarks.bench_driver_index --drivers 100000 --bookings 20000
+"""
+
+import argparse
+import random
+import time
+
+from src.geo.driver_index import DriverLocationIndex
+from src.utils.constants import VehicleType
+
+# roughly a 50km x 50km city
+CITY = (12.80, 77.40, 13.25, 77.85)
+
+
+def random_point(rng):
+    return [rng.uniform(CITY[0], CITY[2]), rng.uniform(CITY[1], CITY[3])]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=20_000)
+    parser.add_argument("--cell-size", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vehicle_types = [vehicle_type.value for vehicle_type in VehicleType]
+    index = DriverLocationIndex(cell_size=args.cell_size)
+
+    started = time.perf_counter()
+    for driver_id in range(args.drivers):
+        index.upsert(driver_id, rng.choice(vehicle_types), random_point(rng))
+    build_seconds = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(args.bookings):
+        pickup = random_point(rng)
+        vehicle_type = rng.choice(vehicle_types)
+        started = time.perf_counter()
+        driver_id = index.claim_nearest(pickup, vehicle_type)
+        latencies.append(time.perf_counter() - started)
+        # the driver finishes a trip somewhere else and comes back online
+        index.upsert(driver_id, vehicle_type, random_point(rng))
+
+    print(f"drivers        : {args.drivers}")
+    print(f"index build    : {build_seconds * 1000:.0f} ms")
+    print(f"assignment p50 : {percentile(latencies, 50) * 1e6:.1f} us")
+    print(f"assignment p99 : {percentile(latencies, 99) * 1e6:.1f} us")
+    print(f"assignment max : {max(latencies) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
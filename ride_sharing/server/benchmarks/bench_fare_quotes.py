@@ -0,0 +1,66 @@
+"""
+Bulk fare quoting: the vectorized kernel against the old one-ride-at-a-time
+scalar calculation.
+
+    python -m benchmarks.bench_fare_quotes --trips 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.geo.routing import haversine_km
+from src.utils.constants import VehicleType
+from src.utils.fare_calculator import quote_trip_fares
+
+
+def scalar_fare(source, destination, vehicle_type):
+    distance = haversine_km(source, destination)
+    total_fare = 10
+    if vehicle_type == VehicleType.CAR.value:
+        total_fare += distance * 4
+    elif vehicle_type == VehicleType.AUTO.value:
+        total_fare += distance * 3
+    elif vehicle_type == VehicleType.BIKE.value:
+        total_fare += distance * 2
+    else:
+        raise Exception(f"unknow vehicle type {vehicle_type}")
+    return total_fare
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    sources = rng.uniform(0, 50, size=(args.trips, 2))
+    destinations = rng.uniform(0, 50, size=(args.trips, 2))
+    vehicle_types = rng.integers(1, 4, size=args.trips)
+
+    started = time.perf_counter()
+    vectorized = quote_trip_fares(sources, destinations, vehicle_types)
+    vectorized_seconds = time.perf_counter() - started
+
+    source_list, destination_list = sources.tolist(), destinations.tolist()
+    type_list = vehicle_types.tolist()
+    started = time.perf_counter()
+    scalar = [
+        scalar_fare(source, destination, vehicle_type)
+        for source, destination, vehicle_type in zip(
+            source_list, destination_list, type_list
+        )
+    ]
+    scalar_seconds = time.perf_counter() - started
+
+    assert np.allclose(vectorized, scalar)
+    print(f"trips      : {args.trips}")
+    print(f"scalar     : {args.trips / scalar_seconds:14,.0f} quotes/sec")
+    print(f"vectorized : {args.trips / vectorized_seconds:14,.0f} quotes/sec")
+    print(f"speedup    : {scalar_seconds / vectorized_seconds:14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Size and encode time of a ride history response in each format:
+
+  legacy   pretty-printed JSON with "[lat, lon]" strings, as served before
+  json     compact JSON with numeric [lat, lon] pairs
+  msgpack  MessagePack with typed columns
+
+Sizes are raw and gzipped (what most mobile stacks negotiate anyway).
+
+    python -m benchmarks.bench_history_formats --rides 10,100,1000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import timeit
+
+from src.services.ride_service import RideService
+from src.utils.serializers import compact_json, history_msgpack, msgpack
+
+
+def history_rows(count, seed=7):
+    rng = random.Random(seed)
+
+    def point():
+        # GPS fixes carry about six decimals
+        return round(rng.uniform(12.85, 13.1), 6), round(rng.uniform(77.45, 77.75), 6)
+
+    return [
+        (100_000 - ride, *point(), *point(), round(rng.uniform(30, 400), 2), f"driver{ride % 97}")
+        for ride in range(count)
+    ]
+
+
+def legacy_json(response):
+    rides = [
+        [ride[0], str(ride[1]), str(ride[2]), ride[3], ride[4]]
+        for ride in response["data"]["rides"]
+    ]
+    payload = {**response, "data": {**response["data"], "rides": rides}}
+    return (json.dumps(payload, indent=2, sort_keys=True) + "\n").encode()
+
+
+def measure(label, encode, response):
+    body = encode(response)
+    runs = 200
+    seconds = min(timeit.repeat(lambda: encode(response), number=runs, repeat=5)) / runs
+    print(
+        f"  {label:8} {len(body):9,d} B  gzip {len(gzip.compress(body)):8,d} B  "
+        f"encode {seconds * 1e6:9.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", default="10,100,1000")
+    args = parser.parse_args()
+
+    for count in map(int, args.rides.split(",")):
+        # pages hold PAGE_LIMIT rides, larger counts show how each format scales
+        response = RideService.history_response(1, [])
+        response["data"]["rides"] = [
+            [row[0], [row[1], row[2]], [row[3], row[4]], row[5], row[6]]
+            for row in history_rows(count)
+        ]
+        response["data"]["next_cursor"] = "MTo5OTk5MA"
+        print(f"{count} rides")
+        measure("legacy", legacy_json, response)
+        measure("json", compact_json, response)
+        if msgpack is not None:
+            measure("msgpack", history_msgpack, response)
+        else:
+            print("  msgpack  not installed")
+
+
+if __name__ == "__main__":
+    main()
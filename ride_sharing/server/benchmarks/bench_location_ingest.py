@@ -0,0 +1,109 @@
+"""
+Driver GPS ping ingestion throughput: the in-memory store on its own, the
+service with the dispatch index and SQLite persistence, and the full HTTP
+path through the Flask test client.
+
+    python -m benchmarks.bench_location_ingest --drivers 50000 --pings 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.geo.driver_index import DriverLocationIndex
+from src.geo.location_store import LocationStore
+from src.repositories.driver_location_repository import DriverLocationRepository
+from src.services.location_service import LocationService
+from src.utils.constants import VehicleType
+
+CITY = (12.80, 77.40, 13.25, 77.85)
+
+
+def ping_batches(rng, homes, pings, batch_size, started_at):
+    """Pings a few tens of metres around each driver's position, like real GPS."""
+    for offset in range(0, pings, batch_size):
+        size = min(batch_size, pings - offset)
+        driver_ids = rng.integers(0, len(homes), size)
+        batch = np.empty((size, 4))
+        batch[:, 0] = driver_ids
+        batch[:, 1:3] = homes[driver_ids] + rng.normal(0, 0.0003, (size, 2))
+        batch[:, 3] = started_at + (offset + np.arange(size)) / 1000
+        yield batch
+
+
+def report(label, pings, seconds):
+    print(f"{label:<24}: {pings / seconds:>12,.0f} pings/s  ({seconds:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=50_000)
+    parser.add_argument("--pings", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--http-pings", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    homes = np.column_stack(
+        [
+            rng.uniform(CITY[0], CITY[2], args.drivers),
+            rng.uniform(CITY[1], CITY[3], args.drivers),
+        ]
+    )
+    started_at = time.time()
+    batches = list(ping_batches(rng, homes, args.pings, args.batch_size, started_at))
+
+    store = LocationStore()
+    started = time.perf_counter()
+    for batch in batches:
+        store.ingest(batch)
+    report("store only", args.pings, time.perf_counter() - started)
+
+    with tempfile.TemporaryDirectory() as directory:
+        factory = SQLiteStandIn(os.path.join(directory, "ridesharing.db"))
+        db = DatabaseObject(connection_factory=factory.load_schema())
+        index = DriverLocationIndex()
+        for driver_id in range(args.drivers):
+            index.upsert(driver_id, VehicleType.CAR.value, homes[driver_id].tolist())
+        service = LocationService(DriverLocationRepository(db), index)
+
+        started = time.perf_counter()
+        persisted = 0
+        for number, batch in enumerate(batches, 1):
+            service.ingest(batch)
+            if number % 20 == 0:  # persist roughly every 100k pings
+                persisted += service.persist()
+        persisted += service.persist()
+        report("service + index + db", args.pings, time.perf_counter() - started)
+        print(f"{'rows persisted':<24}: {persisted:>12,}")
+
+        import src.app.routes as routes
+        from flask import Flask
+
+        routes.location_service = service
+        app = Flask(__name__)
+        routes.initialise_routes(app)
+        client = app.test_client()
+        http_batches = [
+            batch.tolist()
+            # later than every ping above so none of them are dropped as stale
+            for batch in ping_batches(
+                rng, homes, args.http_pings, args.batch_size, started_at + args.pings
+            )
+        ]
+        started = time.perf_counter()
+        for batch in http_batches:
+            response = client.post("/api/v1/drivers/locations", json={"pings": batch})
+            assert response.status_code == 202, response.get_json()
+        report("http (test client)", args.http_pings, time.perf_counter() - started)
+        DatabaseObject.close_pools()
+
+
+if __name__ == "__main__":
+    main()
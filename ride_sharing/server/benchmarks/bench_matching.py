@@ -0,0 +1,164 @@
+"""
+Greedy per-request driver assignment against batched min-cost matching.
+
+Concurrent riders book through RideService on the SQLite stand-in. In the
+batched mode bookings return at once and the benchmark polls for every ride
+until a driver is assigned, so latency covers the whole matching window.
+
+    python -m benchmarks.bench_matching --riders 2000 --rate 1000 --window-ms 100
+"""
+
+import argparse
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from math import hypot
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.services.matching_engine import ASSIGNED, UNMATCHED, BatchMatcher
+from src.services.ride_service import RideService
+from src.utils.constants import VehicleType
+
+CITY = (12.80, 77.40, 13.25, 77.85)
+CAR = VehicleType.CAR.value
+
+
+def random_point(rng):
+    return [rng.uniform(CITY[0], CITY[2]), rng.uniform(CITY[1], CITY[3])]
+
+
+def build_service(factory, drivers, window_ms, seed):
+    db = DatabaseObject(connection_factory=factory)
+    service = RideService(db)
+    rng = random.Random(seed)
+    for driver_id in range(1, drivers + 1):
+        service.driver_index.upsert(driver_id, CAR, random_point(rng))
+        service.driver_repository.set_availability(driver_id, CAR, True)
+    if window_ms:
+        service.matcher = BatchMatcher(
+            service.ride_repository, service.driver_index, window_ms=window_ms
+        )
+        service.matcher.start()
+    return service
+
+
+def book(service, request, booked_rides):
+    # requests arrive at a steady rate instead of all at once
+    delay = request.pop("arrives_at") - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+    started = time.perf_counter()
+    ride_id = service.create_ride(request)["data"]["ride_id"]
+    booked_rides.put((ride_id, started))
+    return started, time.perf_counter(), ride_id
+
+
+def poll_assignments(service, booked_rides, expected, latencies):
+    pending = {}
+    while len(latencies) < expected:
+        while not booked_rides.empty():
+            ride_id, booked = booked_rides.get()
+            pending[ride_id] = booked
+        now = time.perf_counter()
+        for ride_id in list(pending):
+            if service.matcher.assignment(ride_id)["status"] in (ASSIGNED, UNMATCHED):
+                latencies[ride_id] = now - pending.pop(ride_id)
+        time.sleep(0.001)
+
+
+def run(factory, mode, args):
+    window_ms = args.window_ms if mode == "batched" else 0
+    service = build_service(factory, args.drivers, window_ms, args.seed)
+    positions = {
+        driver_id: service.driver_index.location_of(driver_id)
+        for driver_id in range(1, args.drivers + 1)
+    }
+    rng = random.Random(args.seed + 1)
+    requests = [
+        {
+            "user_id": rng.randint(1, 1000),
+            "vehicle_type": CAR,
+            "source_location": random_point(rng),
+            "destination_location": random_point(rng),
+        }
+        for _ in range(args.riders)
+    ]
+
+    booked_rides, assigned_latencies = queue.Queue(), {}
+    poller = None
+    if service.matcher is not None:
+        poller = threading.Thread(
+            target=poll_assignments,
+            args=(service, booked_rides, args.riders, assigned_latencies),
+        )
+        poller.start()
+
+    started = time.perf_counter()
+    for i, request in enumerate(requests):
+        request["arrives_at"] = started + i / args.rate
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(
+            executor.map(lambda request: book(service, request, booked_rides), requests)
+        )
+    if poller is not None:
+        poller.join()
+        service.matcher.stop()
+        latencies = list(assigned_latencies.values())
+    else:
+        latencies = [finished - booked for booked, finished, _ in results]
+    elapsed = time.perf_counter() - started
+
+    pickup = []
+    for (_, _, ride_id), request in zip(results, requests):
+        driver_id = service.ride_repository.get_driver_id(ride_id)
+        if driver_id is not None:
+            x, y = positions[driver_id]
+            source = request["source_location"]
+            pickup.append(hypot(x - source[0], y - source[1]))
+    latencies.sort()
+    return {
+        "bookings/sec": args.riders / elapsed,
+        "p50 ms": latencies[len(latencies) // 2] * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "matched": len(pickup),
+        "mean pickup": sum(pickup) / max(len(pickup), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--riders", type=int, default=2000)
+    parser.add_argument("--drivers", type=int, default=2500)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=1000, help="ride requests/sec")
+    parser.add_argument("--window-ms", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = SQLiteStandIn(os.path.join(tmp, "bench.db")).load_schema()
+        conn = factory()
+        cursor = conn.cursor()
+        cursor.executemany(
+            "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+            [(i, f"user{i}", i, "india") for i in range(1, args.drivers + 1001)],
+        )
+        conn.commit()
+        conn.close()
+
+        print(f"{'mode':<8} " + " ".join(f"{column:>13}" for column in (
+            "bookings/sec", "p50 ms", "p99 ms", "matched", "mean pickup"
+        )))
+        for mode in ("greedy", "batched"):
+            result = run(factory, mode, args)
+            print(f"{mode:<8} " + " ".join(f"{value:>13.4f}" for value in result.values()))
+        DatabaseObject.close_pools()
+
+
+if __name__ == "__main__":
+    main()
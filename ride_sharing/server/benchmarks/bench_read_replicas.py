@@ -0,0 +1,152 @@
+"""
+Primary load under a read-heavy mix, with and without read replicas.
+
+Threads each act for a random rider through a RideService set up as the
+app sets it up, cache included: mostly ride history pages, sometimes a
+booking. The primary and every replica are SQLite stand-ins over the same
+file (replicas read only, so no lag) with the same injected per-statement
+latency and pool size. Bookings bind the rider's session, so their next
+reads within --sticky-seconds stay on the primary; cache misses of other
+riders go to the replicas.
+
+The stand-in has one writer at a time, so with replicas taking the reads
+bookings queue on the file lock instead and set the p99; MySQL doesn't
+serialise writes that way.
+
+    python -m benchmarks.bench_read_replicas --replicas 2 --write-ratio 0.05
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache.lru_cache import LRUCache
+from src.database.connection_pool import PoolTimeoutError
+from src.database.databaseObject import DatabaseObject
+from src.database.replicas import ReadYourWrites, bind_session
+from src.database.sqlite_standin import SQLiteStandIn
+from src.services.ride_service import RideService
+
+RIDERS = 1000
+DRIVERS = 50
+
+
+def seed(path, rides_per_rider, rng):
+    conn = SQLiteStandIn(path).load_schema()()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "insert into users (id, user_name, phone_number, country, user_role) values (%s, %s, %s, %s, %s)",
+        [
+            (i, f"user{i}", i, "india", 2 if i > RIDERS else 1)
+            for i in range(1, RIDERS + DRIVERS + 1)
+        ],
+    )
+    cursor.executemany(
+        "insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare) values (%s, %s, 0, 0, 1, 1, 14)",
+        [
+            (rider, rng.randint(RIDERS + 1, RIDERS + DRIVERS))
+            for rider in range(1, RIDERS + 1)
+            for _ in range(rides_per_rider)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(path, replicas, args):
+    latency = args.latency_ms / 1000
+    db = DatabaseObject(
+        connection_factory=SQLiteStandIn(path, statement_latency=latency),
+        replica_factories=[
+            # distinct connect latencies keep the replicas in separate pools
+            SQLiteStandIn(path, connect_latency=n * 1e-6, statement_latency=latency, read_only=True)
+            for n in range(replicas)
+        ],
+        read_your_writes=ReadYourWrites(window_seconds=args.sticky_seconds),
+    )
+    cache = LRUCache()
+    service = RideService(db, cache=cache)
+    rng = random.Random(args.seed)
+    operations = [
+        (rng.randint(1, RIDERS), rng.random() < args.write_ratio)
+        for _ in range(args.operations)
+    ]
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def act(operation):
+        rider, write = operation
+        bind_session(rider)
+        started = time.perf_counter()
+        try:
+            if write:
+                service.ride_repository.create_ride(
+                    rider, RIDERS + 1 + rider % DRIVERS, [0, 0], [1, 1], 14
+                )
+            else:
+                service.get_all_rides(rider)
+        except PoolTimeoutError:
+            # waited too long for a pooled connection, a 500 in the app
+            with lock:
+                errors.append(operation)
+            return
+        finally:
+            bind_session(None)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        started = time.perf_counter()
+        list(pool.map(act, operations))
+        elapsed = time.perf_counter() - started
+
+    primary = db.pool_stats()
+    replica_checkouts = [stats["checkouts"] for stats in db.replica_stats()]
+    total = primary["checkouts"] + sum(replica_checkouts)
+    latencies.sort()
+    print(
+        f"replicas {replicas}  {len(operations) / elapsed:7.0f} ops/s  "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms  "
+        f"primary {primary['checkouts']:6d} checkouts ({primary['checkouts'] / total:4.0%})  "
+        f"avg wait {primary['avg_wait_seconds'] * 1000:5.2f} ms  "
+        f"replicas {replica_checkouts}  cache hits {cache.stats()['hit_ratio']:4.0%}  "
+        f"errors {len(errors)}"
+    )
+    DatabaseObject.close_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--operations", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--rides-per-rider", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--sticky-seconds", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    os.environ["DATABASE_POOL_SIZE"] = str(args.pool_size)
+    # ride times aren't part of the mix, no write-behind thread needed
+    os.environ["RIDE_UPDATE_FLUSH_MS"] = "0"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ridesharing.db")
+        seed(path, args.rides_per_rider, random.Random(args.seed))
+        print(
+            f"{args.operations} operations, {args.write_ratio:.0%} bookings, "
+            f"{args.threads} threads, {args.latency_ms} ms per statement, "
+            f"pools of {args.pool_size}"
+        )
+        for replicas in sorted({0, args.replicas}):
+            run(path, replicas, args)
+
+
+if __name__ == "__main__":
+    main()
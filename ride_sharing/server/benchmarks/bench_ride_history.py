@@ -0,0 +1,98 @@
+"""
+Deep-page ride history latency: OFFSET paging against keyset (cursor) paging
+on the SQLite stand-in.
+
+    python -m benchmarks.bench_ride_history --rides 50000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.services.ride_service import RideService
+from src.utils.constants import PAGE_LIMIT
+from src.utils.pagination import encode_cursor
+
+HEAVY_RIDER = 1
+
+
+def populate(factory, heavy_rides, other_rides, seed):
+    rng = random.Random(seed)
+    conn = factory()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "insert into users (id, user_name, phone_number, country, user_role) values (%s, %s, %s, %s, %s)",
+        [(i, f"user{i}", i, "india", 2 if i > 900 else 1) for i in range(1, 1001)],
+    )
+    rows = [(HEAVY_RIDER,) for _ in range(heavy_rides)]
+    rows += [(rng.randint(2, 900),) for _ in range(other_rides)]
+    rng.shuffle(rows)
+    cursor.executemany(
+        "insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare) values (%s, %s, 0, 0, 1, 1, 14)",
+        [(user_id, rng.randint(901, 1000)) for (user_id,) in rows],
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=50_000, help="heavy rider's rides")
+    parser.add_argument("--other-rides", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = SQLiteStandIn(os.path.join(tmp, "bench.db")).load_schema()
+        populate(factory, args.rides, args.other_rides, args.seed)
+
+        db = DatabaseObject(connection_factory=factory)
+        service = RideService(db)
+        # measure the database, not the read-through cache
+        service.ride_repository.cache = None
+        ride_ids = [
+            row[0]
+            for row in db.fetch_all(
+                "select id from rides where user_id=%s order by id desc",
+                (HEAVY_RIDER,),
+            )
+        ]
+
+        last_page = len(ride_ids) // PAGE_LIMIT
+        print(f"{'page':>8} {'offset ms':>12} {'cursor ms':>12}")
+        for page_num in (1, 10, 100, last_page // 2, last_page):
+            if page_num < 1:
+                continue
+            cursor = None
+            if page_num > 1:
+                cursor = encode_cursor(
+                    HEAVY_RIDER, ride_ids[PAGE_LIMIT * (page_num - 1) - 1]
+                )
+            offset_ms = timed(
+                lambda: service.get_all_rides(HEAVY_RIDER, page_num=page_num),
+                args.repeat,
+            )
+            cursor_ms = timed(
+                lambda: service.get_all_rides(HEAVY_RIDER, cursor=cursor),
+                args.repeat,
+            )
+            print(f"{page_num:>8} {offset_ms * 1000:>12.3f} {cursor_ms * 1000:>12.3f}")
+        DatabaseObject.close_pools()
+
+
+if __name__ == "__main__":
+    main()
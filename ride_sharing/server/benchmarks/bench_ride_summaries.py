@@ -0,0 +1,100 @@
+"""
+A user's ride totals read two ways on the SQLite stand-in, uncached:
+
+  aggregate  count/sum/max over the user's rides joined to users, what a
+             dashboard had to run before summaries existed
+  summary    primary key lookup in ride_summaries
+
+and what keeping summaries costs a booking (the ride insert plus the
+summary upsert, in one transaction).
+
+    python -m benchmarks.bench_ride_summaries --rides 50000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.repositories.ride_repository import RideRepository
+
+HEAVY_RIDER = 1
+AGGREGATE_QUERY = """select count(*), sum(rides.fare), count(rides.ride_end_time), max(rides.id)
+        from rides join users on rides.user_id = users.id where rides.user_id=%s"""
+
+
+def populate(factory, heavy_rides, other_rides, seed):
+    rng = random.Random(seed)
+    conn = factory()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "insert into users (id, user_name, phone_number, country, user_role) values (%s, %s, %s, %s, %s)",
+        [(i, f"user{i}", i, "india", 2 if i > 900 else 1) for i in range(1, 1001)],
+    )
+    rows = [(HEAVY_RIDER,) for _ in range(heavy_rides)]
+    rows += [(rng.randint(2, 900),) for _ in range(other_rides)]
+    rng.shuffle(rows)
+    cursor.executemany(
+        "insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare) values (%s, %s, 0, 0, 1, 1, 14)",
+        [(user_id, rng.randint(901, 1000)) for (user_id,) in rows],
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=50_000, help="heavy rider's rides")
+    parser.add_argument("--other-rides", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = SQLiteStandIn(os.path.join(tmp, "bench.db")).load_schema()
+        populate(factory, args.rides, args.other_rides, args.seed)
+        db = DatabaseObject(connection_factory=factory)
+        rides = RideRepository(db)
+        started = time.perf_counter()
+        rows = rides.summaries.rebuild()
+        print(
+            f"rebuild    {rows} summaries from {args.rides + args.other_rides} rides "
+            f"in {time.perf_counter() - started:.2f} s"
+        )
+
+        aggregate = timed(lambda: db.fetch_all(AGGREGATE_QUERY, (HEAVY_RIDER,)), args.repeat)
+        summary = timed(lambda: rides.summaries.get_summary(HEAVY_RIDER), args.repeat)
+        print(f"aggregate  {aggregate * 1e3:8.3f} ms  ({args.rides} rides)")
+        print(f"summary    {summary * 1e3:8.3f} ms")
+
+        plain = timed(
+            lambda: db.execute(
+                """insert into rides (user_id, driver_id, source_lat, source_lon,
+                destination_lat, destination_lon, fare) values (%s, %s, 0, 0, 1, 1, 14)""",
+                (2, 901),
+            ),
+            args.repeat,
+        )
+        maintained = timed(
+            lambda: rides.create_ride(2, 901, [0, 0], [1, 1], 14), args.repeat
+        )
+        print(f"booking    {plain * 1e3:8.3f} ms insert only, {maintained * 1e3:8.3f} ms with summaries")
+        # the plain inserts above skipped the summaries
+        print(f"drift      {len(rides.summaries.check())} summaries after the plain inserts")
+        DatabaseObject.close_pools()
+
+
+if __name__ == "__main__":
+    main()
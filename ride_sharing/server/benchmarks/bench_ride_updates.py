@@ -0,0 +1,115 @@
+"""
+Burst of ride start/end events: one UPDATE and commit per event against the
+write-behind buffer, on the SQLite stand-in.
+
+    python -m benchmarks.bench_ride_updates --rides 5000 --threads 16
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.repositories.ride_repository import RideRepository
+from src.repositories.ride_update_buffer import RideUpdateBuffer
+
+
+def populate(factory, rides):
+    conn = factory()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+        [(1, "rider", 1, "india"), (2, "driver", 2, "india")],
+    )
+    cursor.executemany(
+        "insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare) values (1, 2, 0, 0, 1, 1, 14)",
+        [() for _ in range(rides)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def events(rides, trip_events=200):
+    # rides end `trip_events` events after they start, interleaved with others
+    all_events = []
+    for ride_id in range(1, rides + trip_events + 1):
+        if ride_id <= rides:
+            all_events.append((ride_id, "ride_start_time"))
+        if ride_id > trip_events:
+            all_events.append((ride_id - trip_events, "ride_end_time"))
+    return all_events
+
+
+def run(apply, all_events, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda event: apply(*event), all_events))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-ms", type=int, default=50)
+    args = parser.parse_args()
+    all_events = events(args.rides)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for mode in ("per-event", "write-behind"):
+            factory = SQLiteStandIn(os.path.join(tmp, f"{mode}.db")).load_schema()
+            populate(factory, args.rides)
+            repository = RideRepository(DatabaseObject(connection_factory=factory))
+
+            if mode == "per-event":
+                elapsed = run(
+                    lambda ride_id, field: repository.update_ride(
+                        field, datetime.now(), ride_id
+                    ),
+                    all_events,
+                    args.threads,
+                )
+            else:
+                buffer = RideUpdateBuffer(
+                    repository,
+                    max_batch_size=args.batch_size,
+                    flush_interval_ms=args.flush_ms,
+                    journal_path=os.path.join(tmp, "journal"),
+                )
+                buffer.start()
+                elapsed = run(
+                    lambda ride_id, field: buffer.record(ride_id, field, datetime.now()),
+                    all_events,
+                    args.threads,
+                )
+                started = time.perf_counter()
+                buffer.stop()
+                # durable throughput includes draining the buffer
+                elapsed += time.perf_counter() - started
+                stats = buffer.stats()
+            results[mode] = len(all_events) / elapsed
+        DatabaseObject.close_pools()
+
+    print(f"events            : {len(all_events)}")
+    print(f"per-event commits : {results['per-event']:10.0f} events/sec")
+    print(f"write-behind      : {results['write-behind']:10.0f} events/sec")
+    print(
+        "flushes           : "
+        f"{stats['flushes']} (avg batch {stats['avg_batch_size']:.0f} rides, "
+        f"max {stats['max_batch_size']}, coalesced {stats['coalesced']})"
+    )
+    print(
+        "flush latency     : "
+        f"avg {stats['avg_flush_seconds'] * 1000:.2f} ms, "
+        f"max {stats['max_flush_seconds'] * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Road routing on a synthetic city grid with about 1M directed edges:
+edge-list load, landmark preprocessing, ALT query latency against plain
+Dijkstra, and memoised repeat queries.
+
+    python -m benchmarks.bench_routing --size 500 --queries 200
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from src.geo.road_graph import RoadGraph
+from src.geo.routing import RoutingEngine
+
+ORIGIN = (12.80, 77.40)
+SPACING = 0.001  # ~110 m blocks
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def write_grid(directory, size, seed):
+    """
+    size x size intersections. Every 10th street is a 60 km/h arterial, the
+    rest 30 km/h; every 7th east-west side street is one way.
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = np.divmod(np.arange(size * size), size)
+    node_ids = 1_000_000_000 + np.arange(size * size)
+    nodes = np.column_stack(
+        [node_ids, ORIGIN[0] + rows * SPACING, ORIGIN[1] + cols * SPACING]
+    )
+    np.savetxt(
+        os.path.join(directory, "nodes.csv"),
+        nodes,
+        fmt=["%d", "%.7f", "%.7f"],
+        delimiter=",",
+        header="id,lat,lon",
+        comments="",
+    )
+
+    east = cols < size - 1
+    north = rows < size - 1
+    sources = np.concatenate([node_ids[east], node_ids[north]])
+    targets = np.concatenate([node_ids[east] + 1, node_ids[north] + size])
+    arterial = np.concatenate([rows[east] % 10 == 0, cols[north] % 10 == 0])
+    one_way = np.concatenate([(rows[east] % 7 == 3), np.zeros(north.sum(), dtype=bool)])
+    lengths = SPACING * 111_000 * rng.uniform(1.0, 1.2, len(sources))
+    speeds = np.where(arterial, 60, 30)
+    edges = np.column_stack([sources, targets, lengths, speeds, one_way & ~arterial])
+    np.savetxt(
+        os.path.join(directory, "edges.csv"),
+        edges,
+        fmt=["%d", "%d", "%.1f", "%d", "%d"],
+        delimiter=",",
+        header="source,target,length_m,speed_kmh,oneway",
+        comments="",
+    )
+
+
+def time_queries(engine, pairs):
+    latencies = []
+    settled = engine.stats()["settled"]
+    for source, target in pairs:
+        started = time.perf_counter()
+        engine.route_nodes(source, target)
+        latencies.append(time.perf_counter() - started)
+    return latencies, (engine.stats()["settled"] - settled) / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=500)
+    parser.add_argument("--landmarks", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_grid(directory, args.size, args.seed)
+        started = time.perf_counter()
+        graph = RoadGraph.from_edge_list(
+            os.path.join(directory, "nodes.csv"), os.path.join(directory, "edges.csv")
+        )
+        print(f"graph                  : {graph.node_count:,} nodes, {graph.edge_count:,} edges")
+        print(f"edge list load         : {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        graph.build_landmarks(count=args.landmarks)
+        print(f"landmark preprocessing : {time.perf_counter() - started:.1f} s ({args.landmarks} landmarks)")
+
+        path = os.path.join(directory, "graph.npz")
+        graph.save(path)
+        started = time.perf_counter()
+        graph = RoadGraph.load(path)
+        print(f"compiled .npz load     : {time.perf_counter() - started:.1f} s")
+
+    rng = random.Random(args.seed)
+    pairs = [
+        (rng.randrange(graph.node_count), rng.randrange(graph.node_count))
+        for _ in range(args.queries)
+    ]
+    baseline = RoutingEngine(graph, active_landmarks=0)  # no bound: plain Dijkstra
+    baseline_pairs = pairs[: max(1, args.queries // 10)]
+    latencies, settled = time_queries(baseline, baseline_pairs)
+    print(f"dijkstra p50 / p99     : {percentile(latencies, 50) * 1000:.1f} / {percentile(latencies, 99) * 1000:.1f} ms, {settled:,.0f} nodes settled")
+
+    engine = RoutingEngine(graph)
+    latencies, settled = time_queries(engine, pairs)
+    print(f"ALT p50 / p99          : {percentile(latencies, 50) * 1000:.1f} / {percentile(latencies, 99) * 1000:.1f} ms, {settled:,.0f} nodes settled")
+    for source, target in baseline_pairs:
+        assert abs(
+            engine.route_nodes(source, target).duration_minutes
+            - baseline.route_nodes(source, target).duration_minutes
+        ) < 1e-6
+
+    latencies, _ = time_queries(engine, pairs)
+    print(f"cached p50             : {percentile(latencies, 50) * 1e6:.1f} us")
+
+    points = [
+        [ORIGIN[0] + rng.uniform(0, args.size * SPACING), ORIGIN[1] + rng.uniform(0, args.size * SPACING)]
+        for _ in range(1000)
+    ]
+    started = time.perf_counter()
+    for point in points:
+        graph.nearest_node(point)
+    print(f"snap to nearest node   : {(time.perf_counter() - started) / len(points) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Worker startup cost for a multi-worker deployment, two ways:
+
+  cold       every worker is a fresh interpreter that imports the app and
+             builds its services itself (no preloading)
+  preforked  the master imports the app and calls create_app() once, then
+             forks the workers; each worker builds its own services on its
+             first request
+
+For each worker: time to the first response (from interpreter start for
+cold workers, from fork for preforked ones), resident memory, and the part
+of it that is private to the worker rather than shared copy-on-write.
+
+    python -m benchmarks.bench_startup --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+FIRST_REQUEST = "/api/v1/ride/quotes"
+PAYLOAD = {"sources": [[0, 0]], "destinations": [[3, 4]]}
+
+
+def memory_kb():
+    """(rss, private) of this process in kB, from /proc."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Private_Clean", "Private_Dirty"):
+                values[name] = int(rest.split()[0])
+    return values["Rss"], values["Private_Clean"] + values["Private_Dirty"]
+
+
+def serve_first_request(app):
+    response = app.test_client().post(FIRST_REQUEST, json=PAYLOAD)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def cold_worker():
+    """Entry point of a cold worker subprocess; prints its measurements."""
+    started = float(os.environ["BENCH_STARTED"])
+    from src.app.main import create_app
+
+    serve_first_request(create_app())
+    elapsed = time.time() - started
+    rss, private = memory_kb()
+    print(json.dumps({"seconds": elapsed, "rss_kb": rss, "private_kb": private}))
+
+
+def run_cold(workers):
+    results = []
+    for _ in range(workers):
+        env = dict(os.environ, BENCH_STARTED=repr(time.time()))
+        output = subprocess.run(
+            [sys.executable, "-c", "from benchmarks.bench_startup import cold_worker; cold_worker()"],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def run_preforked(workers):
+    started = time.perf_counter()
+    from src.app.main import create_app
+
+    app = create_app()
+    master_seconds = time.perf_counter() - started
+
+    results, children = [], []
+    for _ in range(workers):
+        read, write = os.pipe()
+        forked_at = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            try:
+                serve_first_request(app)
+                elapsed = time.perf_counter() - forked_at
+                rss, private = memory_kb()
+                os.write(
+                    write,
+                    json.dumps(
+                        {"seconds": elapsed, "rss_kb": rss, "private_kb": private}
+                    ).encode(),
+                )
+            finally:
+                os._exit(0)
+        os.close(write)
+        children.append((pid, read))
+    for pid, read in children:
+        with os.fdopen(read) as pipe:
+            results.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    return master_seconds, results
+
+
+def report(label, results):
+    for worker, result in enumerate(results):
+        print(
+            f"{label} worker {worker}: first response {result['seconds'] * 1000:7.1f} ms, "
+            f"rss {result['rss_kb'] / 1024:6.1f} MB, private {result['private_kb'] / 1024:6.1f} MB"
+        )
+    print(
+        f"{label} total private memory: "
+        f"{sum(result['private_kb'] for result in results) / 1024:.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        from src.database.sqlite_standin import SQLiteStandIn
+
+        path = os.path.join(directory, "ridesharing.db")
+        SQLiteStandIn(path).load_schema()
+        os.environ.update(
+            DATABASE_BACKEND="sqlite",
+            DATABASE_SQLITE_PATH=path,
+            RIDE_UPDATE_JOURNAL=os.path.join(directory, "ride_updates.journal"),
+        )
+
+        report("cold     ", run_cold(args.workers))
+        master_seconds, results = run_preforked(args.workers)
+        print(f"preforked master import + create_app: {master_seconds * 1000:.1f} ms")
+        report("preforked", results)
+
+
+if __name__ == "__main__":
+    main()
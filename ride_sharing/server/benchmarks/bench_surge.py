@@ -0,0 +1,85 @@
+"""
+Surge heatmap update and read cost under a simulated minute of traffic:
+1M events (ride requests plus driver heartbeats) with their timestamps
+spread over 60 seconds, interleaved with fare-path multiplier reads.
+
+    python -m benchmarks.bench_surge --events 1000000 --drivers 50000
+"""
+
+import argparse
+import random
+import time
+
+from src.geo.surge_heatmap import SurgeHeatmap
+
+CITY = (12.80, 77.40, 13.25, 77.85)
+
+
+def random_point(rng):
+    return [rng.uniform(CITY[0], CITY[2]), rng.uniform(CITY[1], CITY[3])]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+class SimulatedClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--drivers", type=int, default=50_000)
+    parser.add_argument("--request-share", type=float, default=0.2)
+    parser.add_argument("--reads", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    clock = SimulatedClock(time.time())
+    heatmap = SurgeHeatmap(clock=clock)
+    events = [
+        (
+            rng.random() < args.request_share,
+            rng.randrange(args.drivers),
+            random_point(rng),
+        )
+        for _ in range(args.events)
+    ]
+    read_points = [random_point(rng) for _ in range(args.reads)]
+    read_every = max(1, args.events // args.reads)
+    step = args.seconds / args.events
+
+    write_seconds = 0.0
+    read_latencies = []
+    for number, (is_request, driver_id, location) in enumerate(events):
+        clock.now += step
+        started = time.perf_counter()
+        if is_request:
+            heatmap.record_request(location)
+        else:
+            heatmap.record_heartbeat(driver_id, location)
+        write_seconds += time.perf_counter() - started
+        if number % read_every == 0:
+            location = read_points[len(read_latencies) % len(read_points)]
+            started = time.perf_counter()
+            heatmap.multiplier(location)
+            read_latencies.append(time.perf_counter() - started)
+
+    print(f"events                 : {args.events:,} over {args.seconds:.0f} s simulated")
+    print(f"update cost            : {write_seconds / args.events * 1e6:.2f} us/event")
+    print(f"update capacity        : {args.events / write_seconds * 60:,.0f} events/min on one core")
+    print(f"multiplier read p50    : {percentile(read_latencies, 50) * 1e6:.2f} us")
+    print(f"multiplier read p99    : {percentile(read_latencies, 99) * 1e6:.2f} us")
+    print(f"state                  : {heatmap.stats()}")
+
+
+if __name__ == "__main__":
+    main()
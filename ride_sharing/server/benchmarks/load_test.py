@@ -0,0 +1,329 @@
+"""
+End-to-end load test of the Flask API.
+
+The app is built with create_app() in a separate process, served by
+werkzeug's threaded server, with the repositories pointed at the SQLite
+stand-in. Concurrent workers drive a weighted mix of user, booking,
+start/end and history calls, and the report gives requests/sec and latency
+percentiles per route. Results are written as JSON so runs on different
+commits can be compared:
+
+    python -m benchmarks.load_test --duration 20 --workers 16 --output after.json
+    python -m benchmarks.load_test --compare before.json after.json
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+CITY = (12.80, 77.40, 13.25, 77.85)
+
+# weights of each operation in the traffic mix
+MIX = {
+    "create_user": 5,
+    "get_user": 15,
+    "create_ride": 25,
+    "start_ride": 15,
+    "end_ride": 15,
+    "ride_history": 20,
+    "driver_location": 5,
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(path, riders, drivers):
+    from src.database.sqlite_standin import SQLiteStandIn
+
+    factory = SQLiteStandIn(path).load_schema()
+    conn = factory()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "insert into users (id, user_name, phone_number, country, user_role) values (%s, %s, %s, %s, %s)",
+        [
+            (i, f"user{i}", i, "india", 2 if i > riders else 1)
+            for i in range(1, riders + drivers + 1)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def serve(port, env):
+    os.environ.update(env)
+    # per-request access logs would dominate the measurement
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+
+    from src.app.main import create_app
+
+    make_server("127.0.0.1", port, create_app(), threaded=True).serve_forever()
+
+
+class Worker(threading.Thread):
+    def __init__(self, port, args, deadline, seed, results):
+        super().__init__(daemon=True)
+        self.port = port
+        self.args = args
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.results = results  # route -> list of (latency, status)
+        self.rides = []
+        self.operations = list(MIX)
+        self.weights = list(MIX.values())
+
+    def point(self):
+        return [self.rng.uniform(CITY[0], CITY[2]), self.rng.uniform(CITY[1], CITY[3])]
+
+    def request(self, conn, method, path, route, body=None):
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        started = time.perf_counter()
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        self.results[route].append((time.perf_counter() - started, response.status))
+        return response.status, data
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        riders, drivers = self.args.riders, self.args.drivers
+        while time.perf_counter() < self.deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            if operation in ("start_ride", "end_ride") and not self.rides:
+                operation = "create_ride"
+            rider = self.rng.randint(1, riders)
+
+            if operation == "create_user":
+                phone = self.rng.randint(10**9, 10**10)
+                self.request(
+                    conn,
+                    "POST",
+                    "/api/v1/users",
+                    "POST /users",
+                    {"user_name": f"u{phone}"[:16], "country": "india", "phone_number": phone},
+                )
+            elif operation == "get_user":
+                self.request(conn, "GET", f"/api/v1/users/{rider}", "GET /users/<id>")
+            elif operation == "create_ride":
+                status, data = self.request(
+                    conn,
+                    "POST",
+                    "/api/v1/ride/create_ride",
+                    "POST /ride/create_ride",
+                    {
+                        "user_id": rider,
+                        "source_location": self.point(),
+                        "destination_location": self.point(),
+                    },
+                )
+                if status == 201:
+                    self.rides.append(json.loads(data)["data"]["ride_id"])
+            elif operation == "start_ride":
+                ride_id = self.rng.choice(self.rides)
+                self.request(
+                    conn,
+                    "POST",
+                    f"/api/v1/ride/{ride_id}/update_ride_start",
+                    "POST /ride/<id>/update_ride_start",
+                )
+            elif operation == "end_ride":
+                ride_id = self.rides.pop(self.rng.randrange(len(self.rides)))
+                self.request(
+                    conn,
+                    "POST",
+                    f"/api/v1/ride/{ride_id}/ride_end",
+                    "POST /ride/<id>/ride_end",
+                )
+            elif operation == "ride_history":
+                self.request(
+                    conn,
+                    "GET",
+                    f"/api/v1/ride/get_ride_history?user_id={rider}",
+                    "GET /ride/get_ride_history",
+                )
+            elif operation == "driver_location":
+                driver = riders + self.rng.randint(1, drivers)
+                self.request(
+                    conn,
+                    "POST",
+                    f"/api/v1/drivers/{driver}/location",
+                    "POST /drivers/<id>/location",
+                    {"location": self.point()},
+                )
+        conn.close()
+
+
+def percentile(samples, pct):
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def summarise(results, elapsed):
+    report = {}
+    for route, samples in sorted(results.items()):
+        latencies = sorted(latency for latency, _ in samples)
+        statuses = defaultdict(int)
+        for _, status in samples:
+            statuses[str(status)] += 1
+        report[route] = {
+            "requests": len(samples),
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "statuses": dict(statuses),
+        }
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result):
+    print(
+        f"commit {result['commit']}  workers {result['config']['workers']}  "
+        f"total {result['total_rps']:.0f} req/s"
+    )
+    print(f"{'route':<36} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for route, row in result["routes"].items():
+        print(
+            f"{route:<36} {row['requests']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}  {row['statuses']}"
+        )
+
+
+def compare(before_path, after_path):
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f"{before['commit']} -> {after['commit']}")
+    print(f"{'route':<36} {'req/s':>18} {'p99 ms':>18}")
+    for route, row in after["routes"].items():
+        old = before["routes"].get(route)
+        if old is None:
+            print(f"{route:<36} {'(new)':>18}")
+            continue
+        print(
+            f"{route:<36} {old['rps']:>8.1f} -> {row['rps']:<8.1f}"
+            f"{old['p99_ms']:>8.2f} -> {row['p99_ms']:<8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--riders", type=int, default=2000)
+    parser.add_argument("--drivers", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "loadtest.db")
+        seed_database(path, args.riders, args.drivers)
+        port = free_port()
+        env = {
+            "DATABASE_BACKEND": "sqlite",
+            "DATABASE_SQLITE_PATH": path,
+            "RIDE_UPDATE_JOURNAL": os.path.join(tmp, "ride_updates.journal"),
+            # measure what the service sustains, not the per-client rate limits
+            "ADMISSION_ENABLED": os.environ.get("ADMISSION_ENABLED", "0"),
+        }
+        server = multiprocessing.Process(target=serve, args=(port, env), daemon=True)
+        server.start()
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            # bring the driver fleet online before riders start booking
+            rng = random.Random(args.seed)
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            for driver in range(args.riders + 1, args.riders + args.drivers + 1):
+                body = json.dumps(
+                    {
+                        "location": [
+                            rng.uniform(CITY[0], CITY[2]),
+                            rng.uniform(CITY[1], CITY[3]),
+                        ]
+                    }
+                )
+                conn.request(
+                    "POST",
+                    f"/api/v1/drivers/{driver}/location",
+                    body=body,
+                    headers={"Content-Type": "application/json"},
+                )
+                conn.getresponse().read()
+            conn.close()
+
+            results = defaultdict(list)
+            started = time.perf_counter()
+            deadline = started + args.duration
+            workers = []
+            for i in range(args.workers):
+                worker_results = defaultdict(list)
+                workers.append(
+                    (Worker(port, args, deadline, args.seed + i, worker_results), worker_results)
+                )
+            for worker, _ in workers:
+                worker.start()
+            for worker, worker_results in workers:
+                worker.join()
+                for route, samples in worker_results.items():
+                    results[route] += samples
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.join()
+
+    routes = summarise(results, elapsed)
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "duration": args.duration,
+            "workers": args.workers,
+            "riders": args.riders,
+            "drivers": args.drivers,
+            "mix": MIX,
+        },
+        "total_rps": sum(row["requests"] for row in routes.values()) / elapsed,
+        "routes": routes,
+    }
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.constants import RATE_LIMITS
+
+RATE_LIMITED = "rate_limit"
+OVERLOADED = "overload"
+
+
+class TokenBuckets:
+    """
+    One token bucket per key (e.g. a user), refilled lazily at `rate` tokens
+    per second up to `burst`. Only the most recently used `max_keys` buckets
+    are kept; a bucket idle long enough to be evicted has usually refilled
+    anyway.
+    """
+
+    def __init__(self, rate, burst, max_keys=100_000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, refilled_at]
+
+    def take(self, key):
+        """Take a token for `key`. Returns 0 if allowed, else seconds until the next token."""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    At most `max_concurrent` requests run at once. Others wait, but for no
+    longer than `max_queue_seconds`, and only while fewer than `max_queued`
+    are already waiting; past either bound the request is shed. Latency
+    under overload is then capped at roughly the queue time plus the
+    service time instead of growing with the backlog.
+    """
+
+    def __init__(self, max_concurrent, max_queue_seconds=0.1, max_queued=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue_seconds = max_queue_seconds
+        self.max_queued = max_concurrent * 2 if max_queued is None else max_queued
+        self._condition = threading.Condition()
+        self._active = 0
+        self._queued = 0
+
+    def acquire(self):
+        """True once a slot is held, False if the request should be shed."""
+        with self._condition:
+            if self._active < self.max_concurrent:
+                self._active += 1
+                return True
+            if self._queued >= self.max_queued:
+                return False
+            self._queued += 1
+            deadline = time.monotonic() + self.max_queue_seconds
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._queued -= 1
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "max_concurrent": self.max_concurrent,
+            }
+
+
+def parse_rate_limits(text):
+    """`route=rate/burst,...` (rate in requests per second) into {route: (rate, burst)}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        route, _, limit = item.partition("=")
+        rate, _, burst = limit.partition("/")
+        limits[route.strip()] = (float(rate), int(burst or max(1, float(rate))))
+    return limits
+
+
+class AdmissionController:
+    """
+    Admission for incoming requests: a token bucket per (route, client
+    address) for the routes in `rate_limits`, then a slot in the global concurrency
+    limiter. Shed requests are counted in `metrics` as requests_shed_total.
+    """
+
+    def __init__(self, rate_limits=None, limiter: ConcurrencyLimiter = None, metrics=None):
+        self.buckets = {
+            route: TokenBuckets(rate, burst)
+            for route, (rate, burst) in (rate_limits or {}).items()
+        }
+        self.limiter = limiter
+        self.metrics = metrics
+
+    @classmethod
+    def from_env(cls, metrics=None, concurrency=True):
+        """
+        Limits from RATE_LIMITS and MAX_CONCURRENT_REQUESTS (0 turns the
+        concurrency limiter off). An event loop must not block on the
+        limiter, so the asyncio app asks for rate limits only.
+        """
+        rate_limits = dict(RATE_LIMITS)
+        rate_limits.update(parse_rate_limits(os.environ.get("RATE_LIMITS", "")))
+        if not concurrency:
+            return cls(rate_limits, None, metrics)
+        max_concurrent = int(os.environ.get("MAX_CONCURRENT_REQUESTS", 64))
+        limiter = None
+        if max_concurrent:
+            limiter = ConcurrencyLimiter(
+                max_concurrent,
+                max_queue_seconds=float(os.environ.get("MAX_QUEUE_MS", 100)) / 1000,
+                max_queued=int(os.environ.get("MAX_QUEUED_REQUESTS", max_concurrent * 2)),
+            )
+        return cls(rate_limits, limiter, metrics)
+
+    def __shed(self, route, reason):
+        if self.metrics is not None:
+            self.metrics.increment(
+                "requests_shed_total", (("route", route), ("reason", reason))
+            )
+
+    def check_rate(self, route, client):
+        """0 if the client may call the route now, else seconds to wait."""
+        buckets = self.buckets.get(route)
+        if buckets is None:
+            return 0.0
+        retry_after = buckets.take(client)
+        if retry_after:
+            self.__shed(route, RATE_LIMITED)
+        return retry_after
+
+    def enter(self, route):
+        """Take a concurrency slot; False means shed the request."""
+        if self.limiter is None or self.limiter.acquire():
+            return True
+        self.__shed(route, OVERLOADED)
+        return False
+
+    def leave(self):
+        if self.limiter is not None:
+            self.limiter.release()
+
+
+def admission_enabled():
+    """Admission control is opt-in, with ADMISSION_ENABLED=1."""
+    return os.environ.get("ADMISSION_ENABLED", "0") == "1"
@@ -0,0 +1,69 @@
+from math import ceil
+
+from flask import jsonify, request
+
+from src.admission.limiter import AdmissionController
+
+# never shed the scrape that would show the shedding
+EXEMPT_ROUTES = ("/metrics",)
+
+
+def request_user(current):
+    """Who a request is charged to: the user or driver it names, else the client address."""
+    view_args = current.view_args or {}
+    for name in ("user_id", "driver_id"):
+        if name in view_args:
+            return view_args[name]
+    user_id = current.args.get("user_id")
+    if user_id is None and current.is_json:
+        body = current.get_json(silent=True)
+        if isinstance(body, dict):
+            user_id = body.get("user_id")
+    if user_id is not None:
+        try:
+            # "7" from the query string and 7 from a JSON body are one user
+            return int(user_id)
+        except (TypeError, ValueError):
+            pass
+    return current.remote_addr
+
+
+def request_client(current):
+    """
+    Who a request is charged for rate limiting. Nothing authenticates the
+    user_id a request names, so a caller could spread its requests over other
+    users' ids or use up theirs; the client address can't be picked that way.
+    """
+    return current.remote_addr
+
+
+def install_admission(app, controller: AdmissionController):
+    """
+    Run every request through `controller` before its view: a client over
+    the route's rate gets 429 with Retry-After, and a request that can't get a
+    concurrency slot within the queue time gets 503, both without touching
+    the services.
+    """
+
+    @app.before_request
+    def _admit():
+        current = request._get_current_object()
+        rule = current.url_rule
+        if rule is None or rule.rule in EXEMPT_ROUTES:
+            return None
+        retry_after = controller.check_rate(rule.rule, request_client(current))
+        if retry_after:
+            response = jsonify({"error": "Too many requests"})
+            response.headers["Retry-After"] = str(ceil(retry_after))
+            return response, 429
+        if not controller.enter(rule.rule):
+            response = jsonify({"error": "Server is busy, try again shortly"})
+            response.headers["Retry-After"] = "1"
+            return response, 503
+        current.environ["admission.admitted"] = True
+        return None
+
+    @app.teardown_request
+    def _leave(exc=None):
+        if request.environ.pop("admission.admitted", False):
+            controller.leave()
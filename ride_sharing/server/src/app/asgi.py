@@ -0,0 +1,356 @@
+"""
+Asyncio serving mode. `app` is a plain ASGI application, so any ASGI
+server can host it, e.g.
+
+    uvicorn src.app.asgi:app --workers 4
+
+It serves the latency sensitive subset of the Flask API with the same
+paths, validation and responses, through the async services: one worker
+keeps thousands of requests waiting on the database without a thread each.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from math import ceil
+from time import perf_counter
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from src.admission.limiter import AdmissionController, admission_enabled
+from src.database.async_database import AsyncDatabaseObject
+from src.database.databaseObject import DatabaseObject
+from src.geo.driver_index import NoDriverAvailable
+from src.metrics.registry import get_default_registry, metrics_enabled
+from src.services.ride_service import AsyncRideService, RideService
+from src.services.user_service import AsyncUserService
+from src.utils.constants import MAX_QUOTES_PER_REQUEST, VehicleType
+from src.utils.fare_calculator import UnknownVehicleType
+from src.utils.pagination import InvalidCursor
+from src.utils.serializers import (
+    JSON_MIMETYPE,
+    compact_json,
+    history_mimetypes,
+    history_msgpack,
+    negotiate,
+)
+from src.utils.validators import (
+    validate_location,
+    validate_request_body,
+    validate_trip_batch,
+    validate_vehicle_type,
+)
+
+log = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1"
+INVALID_BODY = ({"error": "Invalid Request Body"}, 400)
+
+
+class AsyncAppServices:
+    """
+    AppServices for the ASGI app: built on the first request of each worker
+    process. The RideService behind AsyncRideService keeps its own sync
+    database object for its background writers (ride time buffer, matcher).
+    """
+
+    def __init__(
+        self, db_factory=AsyncDatabaseObject, sync_db_factory=DatabaseObject, cache=None
+    ):
+        self.db_factory = db_factory
+        self.sync_db_factory = sync_db_factory
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._pid = None
+        self._services = None
+
+    def __build(self):
+        db = self.db_factory()
+        ride_service = RideService(self.sync_db_factory(), cache=self.cache)
+        return {
+            "user_service": AsyncUserService(db, cache=self.cache),
+            "ride_service": AsyncRideService(ride_service, db, cache=self.cache),
+        }
+
+    def get(self, name):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._services = self.__build()
+                    self._pid = pid
+        return self._services[name]
+
+    def built(self):
+        return self._pid == os.getpid()
+
+    async def close(self):
+        if self.built():
+            ride_service = self._services["ride_service"].ride_service
+            if ride_service.ride_updates is not None:
+                ride_service.ride_updates.stop()
+            if ride_service.matcher is not None:
+                ride_service.matcher.stop()
+        await AsyncDatabaseObject.close_pools()
+
+
+class Request:
+    def __init__(self, method, path, query_string, body, headers=()):
+        self.method = method
+        self.path = path
+        self.headers = {name.decode().lower(): value.decode() for name, value in headers}
+        self.args = {
+            name: values[-1] for name, values in parse_qs(query_string).items()
+        }
+        self.body = body
+
+    def get_json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    @property
+    def accept_mimetypes(self):
+        return parse_accept_header(self.headers.get("accept"), MIMEAccept)
+
+    def arg_int(self, name):
+        try:
+            return int(self.args[name])
+        except (KeyError, ValueError):
+            return None
+
+
+class AsgiApp:
+    def __init__(self, services: AsyncAppServices = None):
+        self.services = services or AsyncAppServices()
+        self.metrics = get_default_registry() if metrics_enabled() else None
+        self.admission = None
+        if admission_enabled():
+            self.admission = AdmissionController.from_env(self.metrics, concurrency=False)
+        self._routes = []  # (method, pattern, rule, handler)
+        self.__add_routes()
+
+    def route(self, method, rule, handler):
+        pattern = re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)", API_PREFIX + rule)
+        self._routes.append(
+            (method, re.compile(pattern + "$"), API_PREFIX + rule, handler)
+        )
+
+    def __add_routes(self):
+        self.route("POST", "/users", self.create_user)
+        self.route("GET", "/users/<int:user_id>", self.get_user)
+        self.route("POST", "/ride/create_ride", self.create_ride)
+        self.route("GET", "/ride/<int:ride_id>/assignment", self.get_ride_assignment)
+        self.route("POST", "/ride/quotes", self.get_quotes)
+        self.route("POST", "/drivers/<int:driver_id>/location", self.update_driver_location)
+        self.route("POST", "/drivers/<int:driver_id>/offline", self.driver_offline)
+        self.route("POST", "/ride/<int:ride_id>/update_ride_start", self.update_ride_start)
+        self.route("POST", "/ride/<int:ride_id>/ride_end", self.update_ride_end)
+        self.route("GET", "/ride/get_ride_history", self.get_ride_history)
+
+    def __match(self, method, path):
+        allowed = False
+        for route_method, pattern, rule, handler in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if route_method == method:
+                params = {name: int(value) for name, value in match.groupdict().items()}
+                return rule, handler, params
+            allowed = True
+        if allowed:
+            return "<unmatched>", None, ({"error": "Method Not Allowed"}, 405)
+        return "<unmatched>", None, ({"error": "Not Found"}, 404)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.__lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        started = perf_counter()
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        request = Request(
+            scope["method"],
+            scope["path"],
+            scope.get("query_string", b"").decode(),
+            body,
+            scope.get("headers", ()),
+        )
+
+        rule, handler, params = self.__match(request.method, request.path)
+        headers = []
+        mimetype = JSON_MIMETYPE
+        retry_after = 0
+        if handler is not None and self.admission is not None:
+            retry_after = self.admission.check_rate(
+                rule, self.__request_client(scope)
+            )
+        if handler is None:
+            payload, status = params
+        elif retry_after:
+            payload, status = {"error": "Too many requests"}, 429
+            headers.append((b"retry-after", str(ceil(retry_after)).encode()))
+        else:
+            try:
+                payload, status, *rest = await handler(request, **params)
+                if rest:  # already encoded, e.g. a negotiated history page
+                    mimetype = rest[0]
+                    headers.append((b"vary", b"Accept"))
+            except Exception:
+                log.exception("%s %s failed", request.method, request.path)
+                payload, status = {"error": "Internal Server Error"}, 500
+
+        headers.append((b"content-type", mimetype.encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send(
+            {
+                "type": "http.response.body",
+                "body": payload if isinstance(payload, bytes) else compact_json(payload),
+            }
+        )
+        if self.metrics is not None:
+            self.metrics.observe_request(
+                request.method, rule, status, perf_counter() - started
+            )
+
+    @staticmethod
+    def __request_client(scope):
+        # same rule as the Flask middleware: a user id in the request is the
+        # caller's claim, so requests are charged to the client address
+        client = scope.get("client")
+        return client[0] if client else None
+
+    async def __lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.services.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # handlers mirror the Flask routes in src.app.routes
+
+    async def create_user(self, request):
+        data = request.get_json()
+        if data is None or not validate_request_body(
+            data, ["user_name", "country", "phone_number"]
+        ):
+            return INVALID_BODY
+
+        response = await self.services.get("user_service").create_user(data)
+        return response, 201
+
+    async def get_user(self, request, user_id):
+        response = await self.services.get("user_service").get_user(user_id=user_id)
+        if response is None:
+            return {"error": "User not found"}, 404
+        return response, 200
+
+    async def create_ride(self, request):
+        data = request.get_json()
+        if not (
+            data is not None
+            and validate_request_body(
+                data, ("user_id", "source_location", "destination_location")
+            )
+            and validate_location(data["source_location"])
+            and validate_location(data["destination_location"])
+            and validate_vehicle_type(data.get("vehicle_type", VehicleType.CAR.value))
+        ):
+            return INVALID_BODY
+
+        try:
+            response = await self.services.get("ride_service").create_ride(data)
+        except NoDriverAvailable:
+            return {"error": "No drivers available nearby"}, 503
+        return response, 201
+
+    async def get_ride_assignment(self, request, ride_id):
+        response = await self.services.get("ride_service").get_ride_assignment(ride_id)
+        return response, 200
+
+    async def get_quotes(self, request):
+        data = request.get_json()
+        if not (
+            data is not None
+            and validate_request_body(data, ("sources", "destinations"))
+            and validate_trip_batch(
+                data["sources"], data["destinations"], MAX_QUOTES_PER_REQUEST
+            )
+        ):
+            return INVALID_BODY
+
+        try:
+            response = await self.services.get("ride_service").get_quotes(data)
+        except UnknownVehicleType as e:
+            return {"error": str(e)}, 400
+        except ValueError:
+            return INVALID_BODY
+        return response, 200
+
+    async def update_driver_location(self, request, driver_id):
+        data = request.get_json()
+        if not (
+            data is not None
+            and validate_request_body(data, ("location",))
+            and validate_location(data["location"])
+        ):
+            return INVALID_BODY
+
+        response = await self.services.get("ride_service").update_driver_location(
+            driver_id, data
+        )
+        return response, 201
+
+    async def driver_offline(self, request, driver_id):
+        response = await self.services.get("ride_service").driver_offline(driver_id)
+        return response, 201
+
+    async def update_ride_start(self, request, ride_id):
+        response = await self.services.get("ride_service").update_ride_start_time(ride_id)
+        return response, 201
+
+    async def update_ride_end(self, request, ride_id):
+        response = await self.services.get("ride_service").update_ride_end_time(ride_id)
+        return response, 201
+
+    async def get_ride_history(self, request):
+        user_id = request.arg_int("user_id")
+        page_num = request.arg_int("page_num")
+        if user_id is None or (page_num is not None and page_num < 1):
+            return {"error": "Invalid Request"}, 400
+
+        try:
+            response = await self.services.get("ride_service").get_all_rides(
+                user_id=user_id, page_num=page_num, cursor=request.args.get("cursor")
+            )
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}, 400
+
+        mimetype = negotiate(request.accept_mimetypes, history_mimetypes())
+        if mimetype == JSON_MIMETYPE:
+            return compact_json(response), 200, mimetype
+        return history_msgpack(response), 200, mimetype
+
+
+def create_asgi_app(services: AsyncAppServices = None):
+    """Like create_app(): loads the environment, connects to nothing yet."""
+    load_dotenv()
+    return AsgiApp(services)
+
+
+app = create_asgi_app()
@@ -1,16 +1,26 @@
+from dotenv import load_dotenv
 from flask import Flask
 
 from src.app.routes import initialise_routes
 
 
-def create_app():
+def create_app(test_config=None):
+    """
+    Build the app. Nothing here connects to the database or starts a
+    thread: services and connection pools are created by the first request
+    each worker process serves, so the app can be loaded before forking.
+    """
+    load_dotenv()
     app = Flask(__name__)
-    app.config("JSONIFY_PRETTYPRINT_REGULAR") = True
-    
+    app.config["JSONIFY_PRETTYPRINT_REGULAR"] = True
+    if test_config is not None:
+        app.config.update(test_config)
+
     initialise_routes(app=app)
 
     return app
 
+
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,41 @@
+"""
+Maintenance for the ride_summaries table:
+
+    python -m src.app.ride_summaries rebuild   recompute every summary from rides
+    python -m src.app.ride_summaries check     list summaries that drifted, exit 1 if any
+
+Rebuild after creating the table on an existing database, or when check
+finds drift (a ride edited by hand, a write from before summaries existed).
+Serving processes pick rebuilt rows up as their cached summaries expire.
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+from src.database.databaseObject import DatabaseObject
+from src.repositories.ride_summary_repository import RideSummaryRepository
+
+
+def main(argv=None, db: DatabaseObject = None):
+    parser = argparse.ArgumentParser(prog="python -m src.app.ride_summaries")
+    parser.add_argument("command", choices=("rebuild", "check"))
+    parser.add_argument("--limit", type=int, default=20, help="mismatches to print")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    summaries = RideSummaryRepository(db or DatabaseObject())
+    if args.command == "rebuild":
+        print(f"rebuilt {summaries.rebuild()} ride summaries")
+        return 0
+
+    mismatches = summaries.check()
+    for user_id, role, expected, stored in mismatches[: args.limit]:
+        print(f"user {user_id} role {role}: expected {expected}, stored {stored}")
+    print(f"{len(mismatches)} ride summaries differ from the rides table")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
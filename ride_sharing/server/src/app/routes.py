@@ -1,10 +1,41 @@
-from flask import Blueprint, jsonify, request
-from src.services.ride_service import RideService
-from src.services.user_service import UserService
-from src.utils.validators import validate_location, validate_request_body
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from werkzeug.local import LocalProxy
+from src.admission.limiter import AdmissionController, admission_enabled
+from src.admission.middleware import install_admission, request_user
+from src.app.services import get_service, init_app_services
+from src.database.replicas import bind_session
+from src.geo.driver_index import NoDriverAvailable
+from src.metrics.instrumentation import instrument_app
+from src.metrics.registry import get_default_registry, metrics_enabled
+from src.utils.constants import (
+    MAX_PINGS_PER_REQUEST,
+    MAX_QUOTES_PER_REQUEST,
+    MAX_USERS_PER_REQUEST,
+    UserRole,
+    VehicleType,
+)
+from src.utils.exporters import EXPORT_FORMATS
+from src.utils.fare_calculator import UnknownVehicleType
+from src.utils.pagination import InvalidCursor
+from src.utils.serializers import (
+    JSON_MIMETYPE,
+    compact_json,
+    history_mimetypes,
+    history_msgpack,
+    negotiate,
+)
+from src.utils.validators import (
+    validate_location,
+    validate_request_body,
+    validate_trip_batch,
+    validate_vehicle_type,
+)
 
 user_routes = Blueprint("user_routes", __name__)
-user_service = UserService()
+# resolved per request, the services are built lazily by each worker
+user_service = LocalProxy(lambda: get_service("user_service"))
 
 
 @user_routes.route("/users", methods=["POST"])
@@ -17,6 +48,37 @@ def create_user():
     return jsonify(response), 201
 
 
+def create_users(user_role):
+    data = request.get_json()
+    if not (
+        validate_request_body(data, ("users",))
+        and isinstance(data["users"], list)
+        and len(data["users"]) <= MAX_USERS_PER_REQUEST
+    ):
+        return jsonify({"error": "Invalid Request Body"}), 400
+
+    response = user_service.create_users(data["users"], user_role)
+    return jsonify(response), 201
+
+
+@user_routes.route("/users/bulk", methods=["POST"])
+def create_riders():
+    return create_users(UserRole.RIDER)
+
+
+@user_routes.route("/drivers/bulk", methods=["POST"])
+def create_drivers():
+    return create_users(UserRole.DRIVER)
+
+
+@user_routes.route("/users/<int:user_id>", methods=["GET"])
+def get_user(user_id):
+    response = user_service.get_user(user_id=user_id)
+    if response is None:
+        return jsonify({"error": "User not found"}), 404
+    return jsonify(response), 200
+
+
 @user_routes.route("/users/<int:user_id>/block", methods=["POST"])
 def block_user(user_id):
     response = user_service.block_user(user_id=user_id)
@@ -30,7 +92,8 @@ def update_to_driver(user_id):
 
 
 ride_routes = Blueprint("ride_routes", __name__)
-ride_service = RideService()
+ride_service = LocalProxy(lambda: get_service("ride_service"))
+location_service = LocalProxy(lambda: get_service("location_service"))
 
 
 @ride_routes.route("/ride/create_ride", methods=["POST"])
@@ -42,10 +105,84 @@ def create_ride():
         )
         and validate_location(data["source_location"])
         and validate_location(data["destination_location"])
+        and validate_vehicle_type(data.get("vehicle_type", VehicleType.CAR.value))
+    ):
+        return jsonify({"error": "Invalid Request Body"}), 400
+
+    try:
+        response = ride_service.create_ride(data)
+    except NoDriverAvailable:
+        return jsonify({"error": "No drivers available nearby"}), 503
+    return jsonify(response), 201
+
+
+@ride_routes.route("/ride/<int:ride_id>/assignment", methods=["GET"])
+def get_ride_assignment(ride_id):
+    response = ride_service.get_ride_assignment(ride_id)
+    return jsonify(response), 200
+
+
+@ride_routes.route("/ride/quotes", methods=["POST"])
+def get_quotes():
+    data = request.get_json()
+    if not (
+        validate_request_body(data, ("sources", "destinations"))
+        and validate_trip_batch(
+            data["sources"], data["destinations"], MAX_QUOTES_PER_REQUEST
+        )
+    ):
+        return jsonify({"error": "Invalid Request Body"}), 400
+
+    try:
+        response = ride_service.get_quotes(data)
+    except UnknownVehicleType as e:
+        return jsonify({"error": str(e)}), 400
+    except ValueError:
+        return jsonify({"error": "Invalid Request Body"}), 400
+    return jsonify(response), 200
+
+
+@ride_routes.route("/drivers/<int:driver_id>/location", methods=["POST"])
+def update_driver_location(driver_id):
+    data = request.get_json()
+    if not (
+        validate_request_body(data, ("location",))
+        and validate_location(data["location"])
+    ):
+        return jsonify({"error": "Invalid Request Body"}), 400
+
+    response = ride_service.update_driver_location(driver_id, data)
+    return jsonify(response), 201
+
+
+@ride_routes.route("/drivers/locations", methods=["POST"])
+def ingest_driver_locations():
+    data = request.get_json()
+    if not (
+        validate_request_body(data, ("pings",))
+        and isinstance(data["pings"], list)
+        and len(data["pings"]) <= MAX_PINGS_PER_REQUEST
     ):
         return jsonify({"error": "Invalid Request Body"}), 400
 
-    response = ride_service.create_ride(data)
+    try:
+        response = location_service.ingest(data["pings"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid Request Body"}), 400
+    return jsonify(response), 202
+
+
+@ride_routes.route("/drivers/<int:driver_id>/location", methods=["GET"])
+def get_driver_location(driver_id):
+    response = location_service.get_driver_location(driver_id)
+    if response is None:
+        return jsonify({"error": "Driver location not found"}), 404
+    return jsonify(response), 200
+
+
+@ride_routes.route("/drivers/<int:driver_id>/offline", methods=["POST"])
+def driver_offline(driver_id):
+    response = ride_service.driver_offline(driver_id)
     return jsonify(response), 201
 
 
@@ -63,13 +200,73 @@ def update_ride_end(ride_id):
 
 @ride_routes.route("/ride/get_ride_history", methods=["GET"])
 def get_ride_history():
-    user_id = request.args.get("user_id")
-    page_num = request.args.get("page_num", 1)
+    user_id = request.args.get("user_id", type=int)
+    page_num = request.args.get("page_num", type=int)
+    cursor = request.args.get("cursor")
+    if user_id is None or (page_num is not None and page_num < 1):
+        return jsonify({"error": "Invalid Request"}), 400
+
+    try:
+        response = ride_service.get_all_rides(
+            user_id=user_id, page_num=page_num, cursor=cursor
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    mimetype = negotiate(request.accept_mimetypes, history_mimetypes())
+    body = compact_json(response) if mimetype == JSON_MIMETYPE else history_msgpack(response)
+    history = Response(body, status=200, mimetype=mimetype)
+    history.vary.add("Accept")
+    return history
 
-    response = ride_service.get_all_rides(user_id=user_id, page_num=page_num)
+
+@ride_routes.route("/users/<int:user_id>/ride_summary", methods=["GET"])
+def get_ride_summary(user_id):
+    response = ride_service.get_ride_summary(user_id)
     return jsonify(response), 200
 
 
+@ride_routes.route("/ride/export", methods=["GET"])
+def export_rides():
+    user_id = request.args.get("user_id", type=int)
+    export_format = request.args.get("format", "ndjson")
+    try:
+        booked_from, booked_to = (
+            datetime.fromisoformat(request.args[name]) if name in request.args else None
+            for name in ("from", "to")
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid date range"}), 400
+    if export_format not in EXPORT_FORMATS or (
+        user_id is None and (booked_from is None or booked_to is None)
+    ):
+        return jsonify({"error": "Invalid Request"}), 400
+
+    chunks = ride_service.export_rides(export_format, user_id, booked_from, booked_to)
+    return Response(
+        stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format]
+    )
+
+
+def bind_database_sessions(app):
+    """Attribute each request's database calls to its user, for read-your-writes."""
+
+    @app.before_request
+    def _bind():
+        bind_session(request_user(request._get_current_object()))
+
+    @app.teardown_request
+    def _unbind(exc=None):
+        bind_session(None)
+
+
 def initialise_routes(app):
+    init_app_services(app)
+    bind_database_sessions(app)
+    metrics = get_default_registry() if metrics_enabled() else None
+    if metrics is not None:
+        instrument_app(app, metrics)
+    if admission_enabled():
+        install_admission(app, AdmissionController.from_env(metrics))
     app.register_blueprint(user_routes, url_prefix="/api/v1")
     app.register_blueprint(ride_routes, url_prefix="/api/v1")
@@ -0,0 +1,65 @@
+import os
+import threading
+
+from flask import current_app
+
+from src.database.databaseObject import DatabaseObject
+from src.repositories.driver_location_repository import DriverLocationRepository
+from src.services.location_service import LocationService
+from src.services.ride_service import RideService
+from src.services.user_service import UserService
+
+
+class AppServices:
+    """
+    Services of one app, built on first use in the process that serves
+    requests. Importing the routes or calling create_app() opens nothing and
+    starts no threads, so a pre-forking server can load the app in the
+    master and every worker still gets its own pools, caches and background
+    threads. A process that finds services built by its parent (it was
+    forked after first use) builds fresh ones.
+    """
+
+    def __init__(self, db_factory=DatabaseObject):
+        self.db_factory = db_factory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._services = None
+
+    def __build(self):
+        db = self.db_factory()
+        ride_service = RideService(db)
+        location_service = LocationService(
+            DriverLocationRepository(db),
+            ride_service.driver_index,
+            surge=ride_service.surge,
+            persist_interval_seconds=float(
+                os.environ.get("DRIVER_LOCATION_PERSIST_SECONDS", 5)
+            ),
+        )
+        location_service.start()
+        return {
+            "user_service": UserService(db),
+            "ride_service": ride_service,
+            "location_service": location_service,
+        }
+
+    def get(self, name):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._services = self.__build()
+                    self._pid = pid
+        return self._services[name]
+
+    def built(self):
+        return self._pid == os.getpid()
+
+
+def init_app_services(app, services: AppServices = None):
+    app.extensions.setdefault("services", services or AppServices())
+
+
+def get_service(name):
+    return current_app.extensions["services"].get(name)
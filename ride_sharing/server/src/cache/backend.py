@@ -0,0 +1,71 @@
+import time
+from abc import ABC, abstractmethod
+
+
+class CacheBackend(ABC):
+    """
+    Storage used by the repositories' read-through cache. The in-process
+    LRUCache is the default; a shared backend (e.g. Redis) only needs to
+    implement these methods.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Return (found, value)."""
+
+    @abstractmethod
+    def set(self, key, value, tags=(), owner=None):
+        pass
+
+    @abstractmethod
+    def invalidate_tags(self, tags):
+        pass
+
+    @abstractmethod
+    def invalidation_epoch(self):
+        """Counter that moves on every invalidation, used to detect races."""
+
+    @abstractmethod
+    def invalidated_within(self, tags, seconds):
+        """Whether any of `tags` was invalidated in the last `seconds`."""
+
+    @abstractmethod
+    def stats(self):
+        pass
+
+    def get_or_load(self, key, loader, tags=(), owner=None, lag_seconds=0.0):
+        """
+        Read-through lookup. `tags` may be a callable that derives the tags
+        from the loaded value. A value loaded while an invalidation ran is
+        returned but not cached, since it may already be stale. So is one
+        loaded from a replica up to `lag_seconds` behind the primary, when
+        one of its tags was invalidated within that lag: the replica may not
+        have replayed the write behind the invalidation yet.
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+        epoch, started = self.invalidation_epoch(), time.monotonic()
+        value = loader()
+        self.__set_loaded(key, value, tags, owner, epoch, lag_seconds, started)
+        return value
+
+    async def get_or_load_async(self, key, loader, tags=(), owner=None, lag_seconds=0.0):
+        """get_or_load for the async repositories, `loader` is a coroutine function."""
+        found, value = self.get(key)
+        if found:
+            return value
+        epoch, started = self.invalidation_epoch(), time.monotonic()
+        value = await loader()
+        self.__set_loaded(key, value, tags, owner, epoch, lag_seconds, started)
+        return value
+
+    def __set_loaded(self, key, value, tags, owner, epoch, lag_seconds, started):
+        if self.invalidation_epoch() != epoch:
+            return
+        tags = tags(value) if callable(tags) else tags
+        if lag_seconds and self.invalidated_within(
+            tags, lag_seconds + time.monotonic() - started
+        ):
+            return
+        self.set(key, value, tags=tags, owner=owner)
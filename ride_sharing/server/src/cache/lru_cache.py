@@ -0,0 +1,189 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from src.cache.backend import CacheBackend
+
+
+def estimate_size(value):
+    """Rough deep size in bytes of the rows and dicts we cache."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "owner", "tags")
+
+    def __init__(self, value, expires_at, size, owner, tags):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.owner = owner
+        self.tags = tags
+
+
+class LRUCache(CacheBackend):
+    """
+    In-process LRU cache with TTL expiry and a hard byte budget.
+
+    Every entry may belong to an owner (e.g. a user id). An owner that goes
+    over `max_owner_bytes` evicts its own least recently used entries, so one
+    hot rider can't push everyone else out of the cache.
+
+    When each tag was last invalidated is kept for `invalidation_memory_seconds`,
+    which must be longer than the replicas' lag, see CacheBackend.get_or_load.
+    """
+
+    def __init__(
+        self,
+        max_bytes=64 * 1024 * 1024,
+        max_owner_bytes=1024 * 1024,
+        ttl_seconds=300,
+        invalidation_memory_seconds=60,
+    ):
+        self.max_bytes = max_bytes
+        self.max_owner_bytes = max_owner_bytes
+        self.ttl_seconds = ttl_seconds
+        self.invalidation_memory_seconds = invalidation_memory_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._tag_keys: dict = {}  # tag -> set of keys
+        self._owner_keys: dict = {}  # owner -> OrderedDict of keys, LRU first
+        self._owner_bytes: dict = {}
+        self._bytes = 0
+        self._epoch = 0
+        self._invalidated_at: OrderedDict = OrderedDict()  # tag -> time, oldest first
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "owner_evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "rejected": 0,
+        }
+
+    def __remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+        if entry.owner is not None:
+            owner_keys = self._owner_keys[entry.owner]
+            del owner_keys[key]
+            self._owner_bytes[entry.owner] -= entry.size
+            if not owner_keys:
+                del self._owner_keys[entry.owner]
+                del self._owner_bytes[entry.owner]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self.__remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if entry.owner is not None:
+                self._owner_keys[entry.owner].move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry.value
+
+    def set(self, key, value, tags=(), owner=None):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.__remove(key)
+            owner_limit = self.max_owner_bytes if owner is not None else self.max_bytes
+            if size > min(owner_limit, self.max_bytes):
+                self._stats["rejected"] += 1
+                return
+
+            if owner is not None:
+                owner_keys = self._owner_keys.get(owner)
+                while owner_keys and self._owner_bytes[owner] + size > owner_limit:
+                    self.__remove(next(iter(owner_keys)))
+                    self._stats["owner_evictions"] += 1
+                    owner_keys = self._owner_keys.get(owner)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self.__remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+            tags = tuple(tags)
+            self._entries[key] = _Entry(
+                value, time.monotonic() + self.ttl_seconds, size, owner, tags
+            )
+            self._bytes += size
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            if owner is not None:
+                self._owner_keys.setdefault(owner, OrderedDict())[key] = None
+                self._owner_bytes[owner] = self._owner_bytes.get(owner, 0) + size
+
+    def invalidate_tags(self, tags):
+        now = time.monotonic()
+        with self._lock:
+            self._epoch += 1
+            for tag in tags:
+                for key in list(self._tag_keys.get(tag, ())):
+                    self.__remove(key)
+                    self._stats["invalidations"] += 1
+                self._invalidated_at.pop(tag, None)
+                self._invalidated_at[tag] = now
+            forget_before = now - self.invalidation_memory_seconds
+            while self._invalidated_at:
+                tag, invalidated_at = next(iter(self._invalidated_at.items()))
+                if invalidated_at >= forget_before:
+                    break
+                del self._invalidated_at[tag]
+
+    def invalidation_epoch(self):
+        return self._epoch
+
+    def invalidated_within(self, tags, seconds):
+        since = time.monotonic() - seconds
+        with self._lock:
+            return any(self._invalidated_at.get(tag, float("-inf")) >= since for tag in tags)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Process-wide cache shared by every repository, configured from env."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = LRUCache(
+                    max_bytes=int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+                    max_owner_bytes=int(
+                        os.environ.get("CACHE_MAX_OWNER_BYTES", 1024 * 1024)
+                    ),
+                    ttl_seconds=float(os.environ.get("CACHE_TTL_SECONDS", 300)),
+                )
+    return _default_cache
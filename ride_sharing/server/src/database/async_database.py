@@ -0,0 +1,231 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from time import perf_counter
+
+from src.database.async_pool import AsyncConnectionPool
+from src.database.databaseObject import slow_query_log
+from src.database.sqlite_standin import AsyncSQLiteStandIn
+from src.metrics.registry import get_default_registry, metrics_enabled, statement_shape
+
+
+class _AiomysqlConnection:
+    """Adapts an aiomysql connection to the interface the async pool and DB object use."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    async def execute(self, query, params=None):
+        async with self._conn.cursor() as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall() if cursor.description else []
+            return list(rows), cursor.rowcount, cursor.lastrowid
+
+    async def execute_many(self, query, seq_of_params):
+        async with self._conn.cursor() as cursor:
+            await cursor.executemany(query, seq_of_params)
+            return [], cursor.rowcount, cursor.lastrowid
+
+    async def begin(self):
+        await self._conn.begin()
+
+    async def commit(self):
+        await self._conn.commit()
+
+    async def rollback(self):
+        await self._conn.rollback()
+
+    async def close(self):
+        await self._conn.ensure_closed()
+
+
+class AsyncTransaction:
+    """Async counterpart of Transaction, returned by AsyncDatabaseObject.transaction()."""
+
+    def __init__(self, conn, record):
+        self.conn = conn
+        self.rowcount = -1
+        self._record = record
+        self._after_commit = []
+
+    async def __run(self, query, run):
+        started = perf_counter()
+        rows = 0
+        failed = True
+        try:
+            result, self.rowcount, lastrowid = await run()
+            rows = len(result) if result else max(self.rowcount, 0)
+            failed = False
+            return result, lastrowid
+        except Exception as e:
+            print(query)
+            raise Exception(f"Unable to execute query in transaction due to {str(e)}")
+        finally:
+            self._record(query, started, rows, failed)
+
+    async def fetch_all(self, query, params=None):
+        rows, _ = await self.__run(query, lambda: self.conn.execute(query, params))
+        return rows
+
+    async def execute(self, query, params=None):
+        _, lastrowid = await self.__run(query, lambda: self.conn.execute(query, params))
+        return lastrowid
+
+    async def execute_many(self, query, seq_of_params):
+        await self.__run(query, lambda: self.conn.execute_many(query, seq_of_params))
+        return self.rowcount
+
+    def after_commit(self, callback):
+        self._after_commit.append(callback)
+
+    def _committed(self):
+        for callback in self._after_commit:
+            callback()
+
+
+class AsyncDatabaseObject:
+    """
+    DatabaseObject for the asyncio serving mode: the same configuration, the
+    same queries and the same metrics, with every call awaited. MySQL is
+    reached through aiomysql, which only this mode needs; DATABASE_BACKEND=sqlite
+    uses the stand-in, with DATABASE_STANDIN_LATENCY_MS of simulated round
+    trip per statement.
+
+    Asyncio pools belong to the loop that created them, so there is one
+    pool per database target and event loop.
+    """
+
+    _pools: dict = {}
+
+    def __init__(self, database="RIDESHARING", connection_factory=None):
+        self.user_name = os.environ.get("DATABASE_USERNAME")
+        self.password = os.environ.get("DATABASE_PASSWORD")
+        self.server = os.environ.get("DATABASE_SERVER")
+        self.port = int(os.environ.get("DATABASE_PORT", 3306))
+        self.pool_size = int(os.environ.get("DATABASE_POOL_SIZE", 10))
+        self.pool_max_idle_seconds = int(
+            os.environ.get("DATABASE_POOL_MAX_IDLE_SECONDS", 300)
+        )
+        self.database = database
+        if connection_factory is None and os.environ.get("DATABASE_BACKEND") == "sqlite":
+            connection_factory = AsyncSQLiteStandIn(
+                os.environ["DATABASE_SQLITE_PATH"],
+                statement_latency=float(os.environ.get("DATABASE_STANDIN_LATENCY_MS", 0))
+                / 1000,
+            )
+        self.connection_factory = connection_factory or self.new_connection
+        self.metrics = get_default_registry() if metrics_enabled() else None
+        self.slow_query_seconds = float(os.environ.get("SLOW_QUERY_MS", 0)) / 1000
+
+    @property
+    def pool(self) -> AsyncConnectionPool:
+        key = (self.__pool_key(), asyncio.get_running_loop())
+        pool = AsyncDatabaseObject._pools.get(key)
+        if pool is None:
+            # no lock needed, nothing awaits between the check and the insert
+            pool = AsyncConnectionPool(
+                self.connection_factory,
+                pool_size=self.pool_size,
+                max_idle_seconds=self.pool_max_idle_seconds,
+            )
+            AsyncDatabaseObject._pools[key] = pool
+        return pool
+
+    def __pool_key(self):
+        if self.connection_factory == self.new_connection:
+            return ("mysql", self.server, self.port, self.user_name, self.database)
+        return ("custom", self.connection_factory)
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    @classmethod
+    async def close_pools(cls):
+        """Close the pools of the running loop, e.g. on ASGI shutdown."""
+        loop = asyncio.get_running_loop()
+        for key in [key for key in cls._pools if key[1] is loop]:
+            await cls._pools.pop(key).close()
+
+    async def new_connection(self):
+        try:
+            import aiomysql
+        except ImportError:
+            raise Exception("aiomysql is required to serve from MySQL in async mode")
+        try:
+            conn = await aiomysql.connect(
+                host=self.server,
+                user=self.user_name,
+                password=self.password,
+                port=self.port,
+                db=self.database,
+            )
+        except Exception as e:
+            raise Exception(f"Unable to connect to DB due to {str(e)}")
+        return _AiomysqlConnection(conn)
+
+    def __record(self, query, started, rows, failed=False):
+        seconds = perf_counter() - started
+        if self.metrics is not None:
+            self.metrics.observe_query(query, seconds, rows, failed)
+        if self.slow_query_seconds and seconds >= self.slow_query_seconds:
+            slow_query_log.warning(
+                "slow query %.1f ms, %d rows: %s",
+                seconds * 1000,
+                rows,
+                statement_shape(query),
+            )
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Async version of DatabaseObject.transaction():
+
+            async with db.transaction() as tx:
+                await tx.execute(...)
+        """
+        async with self.pool.connection() as conn:
+            await conn.begin()
+            tx = AsyncTransaction(conn, self.__record)
+            yield tx
+            await conn.commit()
+        tx._committed()
+
+    async def __run(self, query, run, message):
+        started = perf_counter()
+        rows = 0
+        failed = True
+        try:
+            async with self.pool.connection() as conn:
+                result = await run(conn)
+                failed = False
+                rows = len(result[0]) if result[0] else max(result[1], 0)
+                return result
+        except Exception as e:
+            print(query)
+            raise Exception(f"{message} due to {str(e)}")
+        finally:
+            self.__record(query, started, rows, failed)
+
+    async def fetch_all(self, query, params=None):
+        rows, _, _ = await self.__run(
+            query, lambda conn: conn.execute(query, params), "Unable to fetch data"
+        )
+        return rows
+
+    async def execute(self, query, params=None):
+        async def run(conn):
+            result = await conn.execute(query, params)
+            await conn.commit()
+            return result
+
+        _, _, lastrowid = await self.__run(query, run, "Unable to execute query")
+        return lastrowid
+
+    async def execute_many(self, query, seq_of_params):
+        async def run(conn):
+            result = await conn.execute_many(query, seq_of_params)
+            await conn.commit()
+            return result
+
+        _, rowcount, _ = await self.__run(query, run, "Unable to execute batch")
+        return rowcount
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from src.database.connection_pool import PoolTimeoutError
+
+
+class AsyncConnectionPool:
+    """
+    Bounded pool of async connections for one event loop, the asyncio
+    counterpart of ConnectionPool. Waiting for a free connection suspends the
+    task instead of a thread, so the number of requests in flight is not tied
+    to the number of connections.
+
+    Connections idle for longer than `max_idle_seconds` are recycled on
+    checkout; one whose statement failed and can't roll back is dropped.
+    """
+
+    def __init__(self, connect, pool_size=10, max_idle_seconds=300, checkout_timeout=10):
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_idle_seconds = max_idle_seconds
+        self.checkout_timeout = checkout_timeout
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle: list = []  # (connection, last_used) pairs, most recent last
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "recycled": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    @staticmethod
+    async def __close_quietly(conn):
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        if self._closed:
+            raise PoolTimeoutError("Connection pool is closed")
+
+        wait_started = time.perf_counter()
+        try:
+            if self._slots.locked():
+                await asyncio.wait_for(self._slots.acquire(), self.checkout_timeout)
+            else:
+                # wait_for costs a task per call, skip it when a slot is free
+                await self._slots.acquire()
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self.checkout_timeout}s waiting for a connection"
+            )
+        waited = time.perf_counter() - wait_started
+
+        try:
+            conn = await self.__checkout_idle()
+            if conn is None:
+                conn = await self._connect()
+                self._stats["created"] += 1
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._in_use += 1
+        self._stats["checkouts"] += 1
+        self._stats["total_wait_seconds"] += waited
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        return conn
+
+    async def __checkout_idle(self):
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            if time.monotonic() - last_used <= self.max_idle_seconds:
+                return conn
+            await self.__close_quietly(conn)
+            self._stats["recycled"] += 1
+        return None
+
+    async def release(self, conn, discard=False):
+        self._in_use -= 1
+        if discard or self._closed:
+            await self.__close_quietly(conn)
+        else:
+            self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        discard = False
+        try:
+            yield conn
+        except BaseException:
+            # a cancelled request may leave a statement half done as well
+            try:
+                await conn.rollback()
+            except BaseException:
+                discard = True
+            raise
+        finally:
+            await self.release(conn, discard=discard)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["pool_size"] = self.pool_size
+        stats["in_use"] = self._in_use
+        stats["idle"] = len(self._idle)
+        checkouts = stats["checkouts"]
+        stats["avg_wait_seconds"] = (
+            stats["total_wait_seconds"] / checkouts if checkouts else 0.0
+        )
+        return stats
+
+    async def close(self):
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await self.__close_quietly(conn)
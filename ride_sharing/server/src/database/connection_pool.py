@@ -0,0 +1,177 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class DatabaseUnavailable(Exception):
+    """The database couldn't be reached, as opposed to rejecting a statement."""
+
+
+class PoolTimeoutError(DatabaseUnavailable):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded, thread safe pool of DB-API connections.
+
+    Connections are health checked when they are checked out and recycled once
+    they have been idle for longer than `max_idle_seconds`.
+    """
+
+    def __init__(
+        self,
+        connect,
+        pool_size=5,
+        max_idle_seconds=300,
+        checkout_timeout=10,
+        health_check=None,
+    ):
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_idle_seconds = max_idle_seconds
+        self.checkout_timeout = checkout_timeout
+        self._health_check = health_check or self.__default_health_check
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._idle: list = []  # (connection, last_used) pairs, most recent last
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    @staticmethod
+    def __default_health_check(conn):
+        if hasattr(conn, "is_connected"):
+            return conn.is_connected()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("select 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        return True
+
+    def __is_healthy(self, conn):
+        try:
+            return bool(self._health_check(conn))
+        except Exception:
+            return False
+
+    @staticmethod
+    def __close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        if self._closed:
+            raise PoolTimeoutError("Connection pool is closed")
+
+        wait_started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self.checkout_timeout}s waiting for a connection"
+            )
+        waited = time.perf_counter() - wait_started
+
+        try:
+            conn = self.__checkout_idle()
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self._stats["created"] += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["total_wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(
+                self._stats["max_wait_seconds"], waited
+            )
+        return conn
+
+    def __checkout_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+
+            if time.monotonic() - last_used > self.max_idle_seconds:
+                self.__close_quietly(conn)
+                with self._lock:
+                    self._stats["recycled"] += 1
+                continue
+
+            if not self.__is_healthy(conn):
+                self.__close_quietly(conn)
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                continue
+
+            return conn
+
+    def release(self, conn, discard=False):
+        with self._lock:
+            self._in_use -= 1
+            keep = not (discard or self._closed)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+        if not keep:
+            self.__close_quietly(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            # roll back whatever the failed statement left open, and drop the
+            # connection if even that is not possible
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    @property
+    def in_use(self):
+        """Connections checked out right now."""
+        return self._in_use
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pool_size"] = self.pool_size
+            stats["in_use"] = self._in_use
+            stats["idle"] = len(self._idle)
+        checkouts = stats["checkouts"]
+        stats["avg_wait_seconds"] = (
+            stats["total_wait_seconds"] / checkouts if checkouts else 0.0
+        )
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self.__close_quietly(conn)
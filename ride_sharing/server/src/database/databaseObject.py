@@ -1,70 +1,360 @@
+import itertools
+import logging
 import os
+import threading
+from functools import partial
+from contextlib import contextmanager
+from time import perf_counter
 
 import mysql.connector
-from dotenv import load_dotenv
-from mysql.connector import Error
+from mysql.connector import Error, InterfaceError, OperationalError
 
-load_dotenv()
+from src.database.connection_pool import ConnectionPool, DatabaseUnavailable
+from src.database.replicas import (
+    LEAST_LOADED,
+    ROUND_ROBIN,
+    ReadYourWrites,
+    current_session,
+    get_default_read_your_writes,
+)
+from src.database.sqlite_standin import SQLiteStandIn
+from src.database.transaction import Transaction
+from src.metrics.registry import get_default_registry, metrics_enabled, statement_shape
+
+log = logging.getLogger(__name__)
+slow_query_log = logging.getLogger("src.database.slow_queries")
 
 
 class DatabaseObject:
-    def __init__(self, database="RIDESHARING"):
+    """
+    Pooled access to the primary database and, when configured, its read
+    replicas. `fetch_all` and `stream` go to a replica, picked round robin
+    or least loaded (fewest connections checked out); writes, transactions
+    and reads passed `primary=True` go to the primary. A session (the user a
+    request is for, see bind_session) that wrote in the last few seconds
+    reads from the primary too, so it sees its own writes. Other sessions may
+    read rows a replica hasn't caught up on yet, so repositories pass
+    replica_lag_seconds() to the cache, which won't keep a row read that
+    soon after an invalidation: it would be served stale until the next one.
+
+    A replica that can't be reached (DatabaseUnavailable) is skipped for the
+    primary; any other error of a replica read is raised as is.
+    """
+
+    # one pool per database target, shared by every service and repository
+    _pools: dict = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(
+        self,
+        database="RIDESHARING",
+        connection_factory=None,
+        replica_factories=None,
+        read_your_writes: ReadYourWrites = None,
+    ):
         self.user_name = os.environ.get("DATABASE_USERNAME")
         self.password = os.environ.get("DATABASE_PASSWORD")
         self.server = os.environ.get("DATABASE_SERVER")
+        self.port = int(os.environ.get("DATABASE_PORT", 3306))
+        self.pool_size = int(os.environ.get("DATABASE_POOL_SIZE", 10))
+        self.pool_max_idle_seconds = int(
+            os.environ.get("DATABASE_POOL_MAX_IDLE_SECONDS", 300)
+        )
         self.database = database
+        if connection_factory is None and os.environ.get("DATABASE_BACKEND") == "sqlite":
+            # local stand-in for load tests and development without MySQL
+            connection_factory = SQLiteStandIn(os.environ["DATABASE_SQLITE_PATH"])
+            if replica_factories is None:
+                replica_factories = [
+                    SQLiteStandIn(path.strip(), read_only=True)
+                    for path in os.environ.get("DATABASE_SQLITE_REPLICA_PATHS", "").split(",")
+                    if path.strip()
+                ]
+        self.connection_factory = connection_factory or self.new_connection
+        self.replicas = self.__replicas(connection_factory, replica_factories)
+        self.replica_selection = os.environ.get("DATABASE_REPLICA_SELECTION", LEAST_LOADED)
+        if self.replica_selection not in (LEAST_LOADED, ROUND_ROBIN):
+            raise ValueError(f"unknown replica selection {self.replica_selection!r}")
+        self._next_replica = itertools.count()
+        self.read_your_writes = read_your_writes or get_default_read_your_writes()
         self.conn = None
+        self.metrics = get_default_registry() if metrics_enabled() else None
+        # 0 turns the slow-query log off
+        self.slow_query_seconds = float(os.environ.get("SLOW_QUERY_MS", 0)) / 1000
 
-    def connect(self):
+    def __replicas(self, connection_factory, replica_factories):
+        """(pool key, connection factory) of every replica."""
+        if replica_factories is not None:
+            return [(("custom", factory), factory) for factory in replica_factories]
+        if connection_factory is not None:
+            return []
+        # "host[:port],host[:port]", same credentials and schema as the primary
+        replicas = []
+        for target in os.environ.get("DATABASE_REPLICAS", "").split(","):
+            if not target.strip():
+                continue
+            server, _, port = target.strip().partition(":")
+            port = int(port or self.port)
+            key = ("mysql", server, port, self.user_name, self.database)
+            replicas.append((key, partial(self.new_connection, server, port)))
+        return replicas
+
+    def __pool_for(self, key, connection_factory) -> ConnectionPool:
+        pool = DatabaseObject._pools.get(key)
+        if pool is None:
+            with DatabaseObject._pools_lock:
+                pool = DatabaseObject._pools.get(key)
+                if pool is None:
+                    pool = ConnectionPool(
+                        connection_factory,
+                        pool_size=self.pool_size,
+                        max_idle_seconds=self.pool_max_idle_seconds,
+                    )
+                    DatabaseObject._pools[key] = pool
+        return pool
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self.__pool_for(self.__pool_key(), self.connection_factory)
+
+    def __pool_key(self):
+        if self.connection_factory == self.new_connection:
+            return ("mysql", self.server, self.port, self.user_name, self.database)
+        return ("custom", self.connection_factory)
+
+    def replica_pools(self):
+        return [self.__pool_for(key, factory) for key, factory in self.replicas]
+
+    def __read_pool(self, primary=False) -> ConnectionPool:
+        if primary or not self.replicas:
+            return self.pool
+        if self.read_your_writes.is_sticky(current_session()):
+            return self.pool
+        pools = self.replica_pools()
+        # rotate the start so least loaded doesn't always break ties the same way
+        start = next(self._next_replica) % len(pools)
+        if self.replica_selection == ROUND_ROBIN:
+            return pools[start]
+        return min(pools[start:] + pools[:start], key=lambda pool: pool.in_use)
+
+    def replica_lag_seconds(self):
+        """
+        How far behind the primary a read made now may be: 0 when it goes to
+        the primary, else the read-your-writes window, which is meant to
+        cover the replicas' usual lag.
+        """
+        if not self.replicas or self.read_your_writes.is_sticky(current_session()):
+            return 0.0
+        return self.read_your_writes.window_seconds
+
+    def __wrote(self):
+        self.read_your_writes.wrote(current_session())
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    def replica_stats(self):
+        return [pool.stats() for pool in self.replica_pools()]
+
+    @classmethod
+    def _forget_pools_after_fork(cls):
+        # a forked child must not touch its parent's sockets, not even to
+        # close them, so just drop the references and start over
+        cls._pools = {}
+        cls._pools_lock = threading.Lock()
+
+    @classmethod
+    def close_pools(cls):
+        with cls._pools_lock:
+            pools, cls._pools = cls._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+    def new_connection(self, server=None, port=None):
         try:
-            self.conn = mysql.connector.connect(
-                host=self.server,
+            return mysql.connector.connect(
+                host=server or self.server,
                 user=self.user_name,
                 password=self.password,
-                port=3306,
+                port=port or self.port,
                 database=self.database,
             )
         except Error as e:
-            raise Exception(f"Unable to connect to DB due to {str(e)}")
+            raise DatabaseUnavailable(f"Unable to connect to DB due to {str(e)}")
 
-    def fetch_all(self, query, params=None):
-        cursor = None
+    def connect(self):
+        self.conn = self.connection_factory()
+
+    def __record(self, query, started, rows, failed=False):
+        seconds = perf_counter() - started
+        if self.metrics is not None:
+            self.metrics.observe_query(query, seconds, rows, failed)
+        if self.slow_query_seconds and seconds >= self.slow_query_seconds:
+            slow_query_log.warning(
+                "slow query %.1f ms, %d rows: %s",
+                seconds * 1000,
+                rows,
+                statement_shape(query),
+            )
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements on one connection as a single transaction:
+
+            with db.transaction() as tx:
+                tx.execute(...)
+                tx.execute(...)
+
+        Commits when the block exits, rolls back if it raises.
+        """
+        with self.pool.connection() as conn:
+            conn.start_transaction()
+            tx = Transaction(conn, self.__record)
+            yield tx
+            conn.commit()
+        self.__wrote()
+        tx._committed()
+
+    def fetch_all(self, query, params=None, primary=False):
+        """Rows of a read; `primary` for reads that must see every committed write."""
+        pool = self.__read_pool(primary)
+        if pool is self.pool:
+            return self.__fetch_all(pool, query, params)
         try:
-            self.connect()
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchall()
+            rows = self.__fetch_all(pool, query, params)
+        except DatabaseUnavailable as e:
+            # a replica that is down shouldn't fail the read
+            log.warning("replica read failed, retrying on the primary: %s", e)
+            self.__count_read("primary_fallback")
+            return self.__fetch_all(self.pool, query, params)
+        self.__count_read("replica")
+        return rows
+
+    def __count_read(self, target):
+        if self.metrics is not None:
+            self.metrics.increment("database_replica_reads_total", labels=(("target", target),))
+
+    def __fetch_all(self, pool: ConnectionPool, query, params):
+        started = perf_counter()
+        rows = []
+        failed = True
+        try:
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+                    failed = False
+                    return rows
+                finally:
+                    cursor.close()
+        except (InterfaceError, OperationalError) as e:
+            # the connection dropped or the server went away mid-query
+            raise DatabaseUnavailable(f"Unable to fetch data due to {str(e)}")
         except Error as e:
             print(query, params)
             raise Exception(f"Unable to fetch data due to {str(e)}")
         finally:
-            if cursor:
-                cursor.close()
-            if self.conn:
-                self.conn.close()
+            self.__record(query, started, len(rows), failed)
 
-    def execute(self, query, params=None):
+    def stream(self, query, params=None, batch_size=1000):
+        """
+        Yield rows one at a time through an unbuffered cursor, fetching
+        `batch_size` rows per round trip, so memory stays flat however many
+        rows the query returns. The connection is held until the generator is
+        exhausted or closed.
+        """
+        pool = self.__read_pool()
+        started = perf_counter()
+        conn = pool.acquire()
+        finished = False
         cursor = None
+        streamed = 0
+        failed = False
         try:
-            self.connect()
-            cursor = self.conn.cursor()
+            cursor = conn.cursor(buffered=False)
             cursor.execute(query, params)
-            self.conn.commit()
-            return cursor.lastrowid
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                streamed += len(rows)
+                yield from rows
+            finished = True
+        except Error as e:
+            failed = True
+            print(query, params)
+            raise Exception(f"Unable to stream data due to {str(e)}")
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    finished = False
+            # a stream abandoned halfway leaves unread rows on the connection
+            pool.release(conn, discard=not finished)
+            # includes the time the caller spent consuming the rows
+            self.__record(query, started, streamed, failed)
+
+    def execute(self, query, params=None):
+        started = perf_counter()
+        rows = 0
+        failed = True
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query, params)
+                    conn.commit()
+                    rows = cursor.rowcount
+                    failed = False
+                    self.__wrote()
+                    return cursor.lastrowid
+                finally:
+                    cursor.close()
         except Exception as e:
             print(query, params)
             raise Exception(f"Unable to execute query due to {str(e)}")
         finally:
-            if cursor:
-                cursor.close()
-            if self.conn:
-                self.conn.close()
+            self.__record(query, started, rows, failed)
+
+    def execute_many(self, query, seq_of_params):
+        started = perf_counter()
+        rows = 0
+        failed = True
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.executemany(query, seq_of_params)
+                    conn.commit()
+                    rows = cursor.rowcount
+                    failed = False
+                    self.__wrote()
+                    return rows
+                finally:
+                    cursor.close()
+        except Exception as e:
+            print(query, len(seq_of_params))
+            raise Exception(f"Unable to execute batch due to {str(e)}")
+        finally:
+            self.__record(query, started, rows, failed)
+
+
+os.register_at_fork(after_in_child=DatabaseObject._forget_pools_after_fork)
 
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
     db = DatabaseObject()
     try:
         db.connect()
         print("Database connection successful!")
     except Exception as e:
         print(f"Failed to connect: {e}")
+    finally:
+        if db.conn:
+            db.conn.close()
@@ -0,0 +1,73 @@
+import contextvars
+import os
+import threading
+import time
+
+# who the database calls in this context are made for, set per request
+_session = contextvars.ContextVar("database_session", default=None)
+
+ROUND_ROBIN = "round_robin"
+LEAST_LOADED = "least_loaded"
+
+
+def bind_session(key):
+    """Attribute this thread's (or task's) database calls to `key`, a user id; None unbinds."""
+    _session.set(key)
+
+
+def current_session():
+    return _session.get()
+
+
+class ReadYourWrites:
+    """
+    Sessions that wrote within the last `window_seconds`. Their reads go to
+    the primary, which has the write, instead of a replica that may not have
+    replayed it yet. The window should cover the replicas' usual lag.
+    """
+
+    def __init__(self, window_seconds=5.0, max_sessions=100_000, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._until: dict = {}  # session -> sticky until, oldest write first
+
+    def wrote(self, session):
+        if session is None or self.window_seconds <= 0:
+            return
+        now = self._clock()
+        with self._lock:
+            self._until.pop(session, None)
+            self._until[session] = now + self.window_seconds
+            if len(self._until) > self.max_sessions:
+                self.__expire(now)
+
+    def __expire(self, now):
+        # entries are in write order, so expired ones are at the front
+        for session, until in list(self._until.items()):
+            if until > now and len(self._until) <= self.max_sessions:
+                break
+            del self._until[session]
+
+    def is_sticky(self, session):
+        if session is None:
+            return False
+        until = self._until.get(session)
+        return until is not None and until > self._clock()
+
+
+_default_read_your_writes = None
+_default_read_your_writes_lock = threading.Lock()
+
+
+def get_default_read_your_writes():
+    """Process-wide stickiness shared by every DatabaseObject."""
+    global _default_read_your_writes
+    if _default_read_your_writes is None:
+        with _default_read_your_writes_lock:
+            if _default_read_your_writes is None:
+                _default_read_your_writes = ReadYourWrites(
+                    window_seconds=float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+                )
+    return _default_read_your_writes
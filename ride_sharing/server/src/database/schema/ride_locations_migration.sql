@@ -0,0 +1,23 @@
+-- One-off MySQL migration for databases created before rides stored their
+-- locations as numbers: split the "[lat, lon]" strings into DOUBLE columns.
+
+ALTER TABLE RIDES
+    ADD COLUMN source_lat DOUBLE,
+    ADD COLUMN source_lon DOUBLE,
+    ADD COLUMN destination_lat DOUBLE,
+    ADD COLUMN destination_lon DOUBLE;
+
+-- str([lat, lon]) is valid JSON
+UPDATE RIDES SET
+    source_lat = JSON_EXTRACT(source_location, '$[0]'),
+    source_lon = JSON_EXTRACT(source_location, '$[1]'),
+    destination_lat = JSON_EXTRACT(destination_location, '$[0]'),
+    destination_lon = JSON_EXTRACT(destination_location, '$[1]');
+
+ALTER TABLE RIDES
+    MODIFY source_lat DOUBLE NOT NULL,
+    MODIFY source_lon DOUBLE NOT NULL,
+    MODIFY destination_lat DOUBLE NOT NULL,
+    MODIFY destination_lon DOUBLE NOT NULL,
+    DROP COLUMN source_location,
+    DROP COLUMN destination_location;
@@ -13,13 +13,48 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE TABLE IF NOT EXISTS RIDES (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
-    driver_id INT NOT NULL,
-    source VARCHAR(30) NOT NULL,
-    destination VARCHAR(30) NOT NULL,
+    driver_id INT DEFAULT NULL, -- NULL while batched matching finds a driver
+    source_lat DOUBLE NOT NULL,
+    source_lon DOUBLE NOT NULL,
+    destination_lat DOUBLE NOT NULL,
+    destination_lon DOUBLE NOT NULL,
     fare INT NOT NULL,
     ride_booking_time DATETIME DEFAULT CURRENT_TIMESTAMP,
     ride_start_time DATETIME DEFAULT NULL,
     ride_end_time DATETIME DEFAULT NULL,
+    unmatched_at DATETIME DEFAULT NULL, -- set when batched matching gave up on the ride
+    -- ride history pages seek on (user_id, id) instead of scanning an OFFSET;
+    -- declared inline so re-running the schema doesn't fail on it
+    INDEX idx_rides_user_id_id (user_id, id),
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (driver_id) REFERENCES users(id)
-);
\ No newline at end of file
+);
+
+-- latest known position per driver, written in coalesced batches
+CREATE TABLE IF NOT EXISTS driver_locations (
+    driver_id INT PRIMARY KEY,
+    latitude DOUBLE NOT NULL,
+    longitude DOUBLE NOT NULL,
+    recorded_at DOUBLE NOT NULL
+);
+
+-- source of truth for who can be booked; bookings lock the row they take
+CREATE TABLE IF NOT EXISTS driver_availability (
+    driver_id INT PRIMARY KEY,
+    vehicle_type INT NOT NULL,
+    is_available BOOLEAN NOT NULL DEFAULT TRUE,
+    FOREIGN KEY (driver_id) REFERENCES users(id)
+);
+
+-- rides and fare per user and role, kept current by every ride write;
+-- backfill or repair with python -m src.app.ride_summaries rebuild
+CREATE TABLE IF NOT EXISTS ride_summaries (
+    user_id INT NOT NULL,
+    role INT NOT NULL,
+    rides INT NOT NULL DEFAULT 0,
+    total_fare BIGINT NOT NULL DEFAULT 0,
+    completed_rides INT NOT NULL DEFAULT 0,
+    last_ride_id INT DEFAULT NULL,
+    last_completed_at DATETIME DEFAULT NULL,
+    PRIMARY KEY (user_id, role)
+);
@@ -0,0 +1,266 @@
+import asyncio
+import os
+import re
+import sqlite3
+import time
+
+from src.database.connection_pool import DatabaseUnavailable
+
+_ROW_LOCKS = re.compile(r"\s+for update(\s+skip locked|\s+nowait)?\s*$", re.IGNORECASE)
+_UPSERT = re.compile(r"\s+on duplicate key update\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_INSERTED_VALUE = re.compile(r"\bvalues\((\w+)\)", re.IGNORECASE)
+_CREATE_TABLE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\);", re.DOTALL)
+_INLINE_INDEX = re.compile(r",(?:\s*--[^\n]*)*\s*INDEX (\w+) \(([^)]*)\)")
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema", "users.sql")
+
+
+def _hoist_indexes(match):
+    """SQLite has no inline INDEX in CREATE TABLE, create them after the table."""
+    table, body = match.groups()
+    indexes = [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns});"
+        for name, columns in _INLINE_INDEX.findall(body)
+    ]
+    body = _INLINE_INDEX.sub("", body)
+    return "\n".join([f"CREATE TABLE IF NOT EXISTS {table} ({body}\n);", *indexes])
+
+
+def _sqlite_upsert(match):
+    assignments = _INSERTED_VALUE.sub(r"excluded.\1", match.group(1))
+    return f" on conflict do update set {assignments}"
+
+
+class _StandInCursor:
+    """
+    Cursor wrapper that accepts the MySQL `%s` placeholders used by the
+    repositories, so the same queries run unchanged on SQLite.
+    """
+
+    def __init__(self, cursor, statement_latency=0.0):
+        self._cursor = cursor
+        self._statement_latency = statement_latency
+
+    @staticmethod
+    def _translate(query):
+        # a stand-in transaction holds the database write lock from its first
+        # statement (begin immediate), which is what row locks buy on MySQL
+        query = _ROW_LOCKS.sub("", query.replace("%s", "?"))
+        # MySQL upserts, VALUES(column) is the row that failed to insert
+        return _UPSERT.sub(_sqlite_upsert, query)
+
+    @staticmethod
+    def _params(params):
+        if params is None:
+            return ()
+        if isinstance(params, (list, tuple, dict)):
+            return params
+        return (params,)
+
+    def execute(self, query, params=None):
+        if self._statement_latency:
+            time.sleep(self._statement_latency)
+        self._cursor.execute(self._translate(query), self._params(params))
+        return self
+
+    def executemany(self, query, seq_of_params):
+        if self._statement_latency:
+            time.sleep(self._statement_latency)
+        self._cursor.executemany(self._translate(query), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class _StandInConnection:
+    def __init__(self, conn, statement_latency=0.0):
+        self._conn = conn
+        self._statement_latency = statement_latency
+
+    def cursor(self, *args, **kwargs):
+        return _StandInCursor(self._conn.cursor(), self._statement_latency)
+
+    def start_transaction(self):
+        self._conn.execute("begin immediate")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteStandIn:
+    """
+    Connection factory for a file backed SQLite database that stands in for
+    MySQL in tests and benchmarks. `connect_latency` simulates the TCP and
+    auth handshake a real MySQL connection pays, `statement_latency` the
+    network round trip of every statement. A `read_only` stand-in opens the
+    file read only, a replica with no lag for routing tests and benchmarks.
+    """
+
+    def __init__(self, path, connect_latency=0.0, statement_latency=0.0, read_only=False):
+        self.path = path
+        self.connect_latency = connect_latency
+        self.statement_latency = statement_latency
+        self.read_only = read_only
+
+    def __key(self):
+        return (
+            type(self),
+            self.path,
+            self.connect_latency,
+            self.statement_latency,
+            self.read_only,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, SQLiteStandIn) and self.__key() == other.__key()
+
+    def __hash__(self):
+        return hash(self.__key())
+
+    def _open(self, timeout=30):
+        if self.read_only:
+            return sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, timeout=timeout, check_same_thread=False
+            )
+        conn = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False)
+        conn.execute("pragma journal_mode=wal")
+        conn.execute("pragma synchronous=normal")
+        return conn
+
+    def __call__(self):
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+        try:
+            conn = self._open()
+        except sqlite3.OperationalError as e:
+            raise DatabaseUnavailable(f"Unable to open {self.path} due to {e}") from e
+        return _StandInConnection(conn, self.statement_latency)
+
+    def load_schema(self, schema_path=SCHEMA_PATH):
+        """Create the MySQL schema in the stand-in database."""
+        with open(schema_path) as schema_file:
+            schema = schema_file.read()
+        schema = re.sub(
+            r"\bINT AUTO_INCREMENT PRIMARY KEY\b",
+            "INTEGER PRIMARY KEY AUTOINCREMENT",
+            schema,
+            flags=re.IGNORECASE,
+        )
+        schema = _CREATE_TABLE.sub(_hoist_indexes, schema)
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.executescript(schema)
+        finally:
+            conn.close()
+        return self
+
+
+class _AsyncStandInConnection:
+    """
+    Async connection over SQLite for the asyncio serving mode. Statements
+    run on the event loop thread, they take microseconds against a local
+    file; the simulated round trip is awaited, so a thousand requests can
+    be waiting on the "network" at once without a thread each.
+
+    SQLite has one writer at a time. A write that finds the database locked
+    yields and retries instead of blocking the loop, which would deadlock
+    against a transaction on this same loop that holds the lock.
+    """
+
+    def __init__(self, conn, statement_latency=0.0, lock_retry_seconds=0.001):
+        self._conn = conn
+        self._statement_latency = statement_latency
+        self._lock_retry_seconds = lock_retry_seconds
+        self._explicit_transaction = False
+
+    async def __run(self, run):
+        if self._statement_latency:
+            await asyncio.sleep(self._statement_latency)
+        while True:
+            try:
+                return run()
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                if not self._explicit_transaction and self._conn.in_transaction:
+                    # a lone write opened an implicit transaction on a snapshot
+                    # that may be outdated by now, retry from a fresh one
+                    self._conn.rollback()
+            await asyncio.sleep(self._lock_retry_seconds)
+
+    async def execute(self, query, params=None):
+        """Run one statement, returning (rows, rowcount, lastrowid)."""
+
+        def run():
+            cursor = self._conn.execute(
+                _StandInCursor._translate(query), _StandInCursor._params(params)
+            )
+            try:
+                return cursor.fetchall(), cursor.rowcount, cursor.lastrowid
+            finally:
+                cursor.close()
+
+        return await self.__run(run)
+
+    async def execute_many(self, query, seq_of_params):
+        def run():
+            cursor = self._conn.executemany(
+                _StandInCursor._translate(query), seq_of_params
+            )
+            try:
+                return [], cursor.rowcount, cursor.lastrowid
+            finally:
+                cursor.close()
+
+        return await self.__run(run)
+
+    async def begin(self):
+        await self.__run(lambda: self._conn.execute("begin immediate"))
+        self._explicit_transaction = True
+
+    async def commit(self):
+        self._explicit_transaction = False
+        self._conn.commit()
+
+    async def rollback(self):
+        self._explicit_transaction = False
+        self._conn.rollback()
+
+    async def close(self):
+        self._conn.close()
+
+
+class AsyncSQLiteStandIn(SQLiteStandIn):
+    """Async connection factory for the stand-in database, see AsyncDatabaseObject."""
+
+    async def __call__(self):
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        # never wait on the lock inside SQLite, that would block the loop
+        return _AsyncStandInConnection(self._open(timeout=0), self.statement_latency)
@@ -0,0 +1,76 @@
+import sqlite3
+from time import perf_counter
+
+from mysql.connector import IntegrityError
+
+
+class IntegrityViolation(Exception):
+    """A statement in a transaction broke a unique or foreign key constraint."""
+
+
+class Transaction:
+    """
+    Unit of work on one pooled connection. Statements run through it share
+    a single database transaction that DatabaseObject.transaction() commits
+    when the block exits cleanly and rolls back otherwise.
+
+    `rowcount` holds the rows affected by the last statement, so callers can
+    tell whether a conditional update won its row.
+    """
+
+    def __init__(self, conn, record):
+        self.conn = conn
+        self.rowcount = -1
+        self._record = record
+        self._after_commit = []
+
+    def __run(self, query, run):
+        started = perf_counter()
+        rows = 0
+        failed = True
+        cursor = self.conn.cursor()
+        try:
+            result = run(cursor)
+            rows = len(result) if isinstance(result, list) else cursor.rowcount
+            self.rowcount = cursor.rowcount
+            failed = False
+            return result
+        except (IntegrityError, sqlite3.IntegrityError) as e:
+            raise IntegrityViolation(
+                f"Unable to execute query in transaction due to {str(e)}"
+            ) from e
+        except Exception as e:
+            print(query)
+            raise Exception(f"Unable to execute query in transaction due to {str(e)}")
+        finally:
+            cursor.close()
+            self._record(query, started, rows, failed)
+
+    def fetch_all(self, query, params=None):
+        def run(cursor):
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+        return self.__run(query, run)
+
+    def execute(self, query, params=None):
+        def run(cursor):
+            cursor.execute(query, params)
+            return cursor.lastrowid
+
+        return self.__run(query, run)
+
+    def execute_many(self, query, seq_of_params):
+        def run(cursor):
+            cursor.executemany(query, seq_of_params)
+            return cursor.rowcount
+
+        return self.__run(query, run)
+
+    def after_commit(self, callback):
+        """Run `callback` once the transaction has committed, e.g. cache invalidation."""
+        self._after_commit.append(callback)
+
+    def _committed(self):
+        for callback in self._after_commit:
+            callback()
@@ -0,0 +1,221 @@
+import heapq
+import threading
+from math import ceil, floor, hypot
+
+
+class NoDriverAvailable(Exception):
+    pass
+
+
+class DriverLocationIndex:
+    """
+    In-memory grid index of driver positions.
+
+    Available drivers are bucketed by (vehicle_type, cell) so a nearest driver
+    lookup only scans the rings of cells around the rider instead of every
+    driver. Busy drivers keep their position but are left out of the buckets.
+
+    The search stops at the cells occupied by drivers of that vehicle type,
+    once every one of them has been seen, or `max_search_distance` away from
+    the rider, whichever comes first.
+    """
+
+    def __init__(self, cell_size=0.01, max_search_distance=2.0):
+        self.cell_size = cell_size
+        self.max_search_radius = ceil(max_search_distance / cell_size)
+        self._lock = threading.Lock()
+        self._cells: dict = {}  # (vehicle_type, cx, cy) -> {driver_id: (x, y)}
+        self._drivers: dict = {}  # driver_id -> [vehicle_type, x, y, available]
+        self._available_count: dict = {}  # vehicle_type -> count
+        # vehicle_type -> (min_cx, min_cy, max_cx, max_cy) of occupied cells
+        self._bounds: dict = {}
+        self._stale_bounds: set = set()  # vehicle types whose edge cell emptied
+
+    def __cell(self, x, y):
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def __grow_bounds(self, vehicle_type, cx, cy):
+        bounds = self._bounds.get(vehicle_type)
+        if bounds is None:
+            self._bounds[vehicle_type] = (cx, cy, cx, cy)
+        else:
+            min_cx, min_cy, max_cx, max_cy = bounds
+            self._bounds[vehicle_type] = (
+                min(min_cx, cx),
+                min(min_cy, cy),
+                max(max_cx, cx),
+                max(max_cy, cy),
+            )
+
+    def __shrink_bounds(self, vehicle_type, cx, cy):
+        bounds = self._bounds.get(vehicle_type)
+        if bounds is not None and (cx in (bounds[0], bounds[2]) or cy in (bounds[1], bounds[3])):
+            # recomputed on the next search rather than on every removal
+            self._stale_bounds.add(vehicle_type)
+
+    def __refresh_bounds(self, vehicle_type):
+        self._stale_bounds.discard(vehicle_type)
+        self._bounds.pop(vehicle_type, None)
+        for cell_type, cx, cy in self._cells:
+            if cell_type == vehicle_type:
+                self.__grow_bounds(vehicle_type, cx, cy)
+
+    def __add_to_bucket(self, driver_id, vehicle_type, x, y):
+        cx, cy = self.__cell(x, y)
+        self._cells.setdefault((vehicle_type, cx, cy), {})[driver_id] = (x, y)
+        self._available_count[vehicle_type] = (
+            self._available_count.get(vehicle_type, 0) + 1
+        )
+        self.__grow_bounds(vehicle_type, cx, cy)
+
+    def __remove_from_bucket(self, driver_id, vehicle_type, x, y):
+        key = (vehicle_type, *self.__cell(x, y))
+        bucket = self._cells.get(key)
+        if bucket is not None and bucket.pop(driver_id, None) is not None:
+            self._available_count[vehicle_type] -= 1
+            if not bucket:
+                del self._cells[key]
+                self.__shrink_bounds(*key)
+
+    def upsert(self, driver_id, vehicle_type, location, available=True):
+        x, y = location
+        with self._lock:
+            current = self._drivers.get(driver_id)
+            if current is not None and current[3]:
+                self.__remove_from_bucket(driver_id, *current[:3])
+            if current is not None and available is None:
+                available = current[3]
+            self._drivers[driver_id] = [vehicle_type, x, y, bool(available)]
+            if available:
+                self.__add_to_bucket(driver_id, vehicle_type, x, y)
+
+    def move(self, driver_id, location):
+        """Update a known driver's position without changing availability."""
+        current = self._drivers.get(driver_id)
+        if current is None:
+            raise KeyError(driver_id)
+        self.upsert(driver_id, current[0], location, available=None)
+
+    def move_many(self, driver_ids, locations):
+        """
+        Move every known driver in one pass under a single lock. Unknown
+        drivers are skipped; returns how many were moved.
+        """
+        moved = 0
+        with self._lock:
+            for driver_id, (x, y) in zip(driver_ids, locations):
+                current = self._drivers.get(driver_id)
+                if current is None:
+                    continue
+                vehicle_type, old_x, old_y, available = current
+                if available:
+                    old_cell = self.__cell(old_x, old_y)
+                    if old_cell == self.__cell(x, y):
+                        # same bucket, only the coordinates change
+                        self._cells[(vehicle_type, *old_cell)][driver_id] = (x, y)
+                    else:
+                        self.__remove_from_bucket(driver_id, vehicle_type, old_x, old_y)
+                        self.__add_to_bucket(driver_id, vehicle_type, x, y)
+                current[1], current[2] = x, y
+                moved += 1
+        return moved
+
+    def remove(self, driver_id):
+        with self._lock:
+            current = self._drivers.pop(driver_id, None)
+            if current is not None and current[3]:
+                self.__remove_from_bucket(driver_id, *current[:3])
+
+    def mark_available(self, driver_id):
+        with self._lock:
+            current = self._drivers.get(driver_id)
+            if current is None or current[3]:
+                return
+            current[3] = True
+            self.__add_to_bucket(driver_id, *current[:3])
+
+    def mark_busy(self, driver_id):
+        self.claim(driver_id)
+
+    def claim(self, driver_id):
+        """Mark a specific driver busy, returning False if they were not available."""
+        with self._lock:
+            current = self._drivers.get(driver_id)
+            if current is None or not current[3]:
+                return False
+            current[3] = False
+            self.__remove_from_bucket(driver_id, *current[:3])
+            return True
+
+    def is_available(self, driver_id):
+        current = self._drivers.get(driver_id)
+        return current is not None and current[3]
+
+    def location_of(self, driver_id):
+        current = self._drivers.get(driver_id)
+        return None if current is None else (current[1], current[2])
+
+    def available_count(self, vehicle_type):
+        return self._available_count.get(vehicle_type, 0)
+
+    def __ring(self, cx, cy, radius):
+        if radius == 0:
+            yield cx, cy
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def __max_radius(self, vehicle_type, cx, cy):
+        if vehicle_type in self._stale_bounds:
+            self.__refresh_bounds(vehicle_type)
+        min_cx, min_cy, max_cx, max_cy = self._bounds[vehicle_type]
+        radius = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy, 0)
+        return min(radius, self.max_search_radius)
+
+    def __nearest(self, location, vehicle_type, k):
+        available = self._available_count.get(vehicle_type)
+        if not available:
+            return []
+        x, y = location
+        cx, cy = self.__cell(x, y)
+        max_radius = self.__max_radius(vehicle_type, cx, cy)
+        candidates = []
+        radius = 0
+        while radius <= max_radius:
+            for cell_x, cell_y in self.__ring(cx, cy, radius):
+                bucket = self._cells.get((vehicle_type, cell_x, cell_y))
+                if bucket:
+                    for driver_id, (dx, dy) in bucket.items():
+                        candidates.append((hypot(dx - x, dy - y), driver_id))
+            if len(candidates) >= k:
+                candidates = heapq.nsmallest(k, candidates)
+                # anything outside the scanned rings is at least this far away
+                if candidates[-1][0] <= radius * self.cell_size:
+                    break
+            elif len(candidates) == available:
+                break  # seen every available driver, there are no more to find
+            radius += 1
+        return heapq.nsmallest(k, candidates)
+
+    def nearest(self, location, vehicle_type, k=1):
+        """Return up to k (distance, driver_id) pairs of available drivers."""
+        with self._lock:
+            return self.__nearest(location, vehicle_type, k)
+
+    def claim_nearest(self, location, vehicle_type):
+        """Atomically pick the nearest available driver and mark them busy."""
+        with self._lock:
+            nearest = self.__nearest(location, vehicle_type, 1)
+            if not nearest:
+                raise NoDriverAvailable(
+                    f"no available driver for vehicle type {vehicle_type}"
+                )
+            driver_id = nearest[0][1]
+            current = self._drivers[driver_id]
+            current[3] = False
+            self.__remove_from_bucket(driver_id, *current[:3])
+            return driver_id
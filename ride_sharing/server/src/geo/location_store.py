@@ -0,0 +1,142 @@
+import threading
+from math import isnan
+
+import numpy as np
+
+
+class LocationStore:
+    """
+    Latest position and a short ring buffer of recent pings for every driver,
+    held in flat NumPy arrays indexed by a per-driver slot.
+
+    Batches are applied with array operations: pings are sorted by driver and
+    time, written into each driver's ring, and the newest one per driver
+    becomes the latest position. Pings older than a driver's latest position
+    are dropped, and so are pings outside the valid lat/lon ranges.
+    """
+
+    def __init__(self, history_size=16, initial_capacity=1024):
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._slots: dict = {}  # driver_id -> slot
+        self._driver_ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._latest = np.full((initial_capacity, 3), np.nan)  # lat, lon, ts
+        self._history = np.full((initial_capacity, history_size, 3), np.nan)
+        self._head = np.zeros(initial_capacity, dtype=np.int64)
+        self._dirty = np.zeros(initial_capacity, dtype=bool)
+        self._stats = {"ingested": 0, "stale": 0, "invalid": 0}
+
+    def __grow(self, needed):
+        capacity = len(self._driver_ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        extra = new_capacity - capacity
+        self._driver_ids = np.concatenate(
+            [self._driver_ids, np.zeros(extra, dtype=np.int64)]
+        )
+        self._latest = np.concatenate([self._latest, np.full((extra, 3), np.nan)])
+        self._history = np.concatenate(
+            [self._history, np.full((extra, self.history_size, 3), np.nan)]
+        )
+        self._head = np.concatenate([self._head, np.zeros(extra, dtype=np.int64)])
+        self._dirty = np.concatenate([self._dirty, np.zeros(extra, dtype=bool)])
+
+    def __slots_for(self, driver_ids):
+        slots = self._slots
+        new_ids = [driver_id for driver_id in set(driver_ids) if driver_id not in slots]
+        if new_ids:
+            self.__grow(len(slots) + len(new_ids))
+            for driver_id in new_ids:
+                slot = len(slots)
+                slots[driver_id] = slot
+                self._driver_ids[slot] = driver_id
+        return np.fromiter(
+            (slots[driver_id] for driver_id in driver_ids),
+            dtype=np.int64,
+            count=len(driver_ids),
+        )
+
+    def ingest(self, pings):
+        """
+        Apply a batch of (driver_id, lat, lon, ts) rows. Returns the ids of
+        drivers whose latest position moved and their new (lat, lon).
+        """
+        pings = np.asarray(pings, dtype=np.float64)
+        if pings.ndim != 2 or pings.shape[1] != 4:
+            raise ValueError("pings must be rows of [driver_id, lat, lon, ts]")
+        if not np.isfinite(pings).all():
+            raise ValueError("pings must only contain finite numbers")
+        # a bad GPS fix must not stretch the driver index across the globe
+        valid = (np.abs(pings[:, 1]) <= 90) & (np.abs(pings[:, 2]) <= 180)
+        if not valid.all():
+            with self._lock:
+                self._stats["invalid"] += int(len(pings) - valid.sum())
+            pings = pings[valid]
+        if not len(pings):
+            return np.empty(0, dtype=np.int64), np.empty((0, 2))
+
+        with self._lock:
+            slots = self.__slots_for(pings[:, 0].astype(np.int64).tolist())
+            # drop pings that are not newer than what we already have
+            latest_ts = self._latest[slots, 2]
+            fresh = np.isnan(latest_ts) | (pings[:, 3] > latest_ts)
+            self._stats["stale"] += int(len(pings) - fresh.sum())
+            slots, pings = slots[fresh], pings[fresh]
+            self._stats["ingested"] += len(pings)
+            if not len(pings):
+                return np.empty(0, dtype=np.int64), np.empty((0, 2))
+
+            order = np.lexsort((pings[:, 3], slots))
+            slots, pings = slots[order], pings[order]
+            group_start = np.r_[True, slots[1:] != slots[:-1]]
+            starts = np.flatnonzero(group_start)
+            counts = np.diff(np.r_[starts, len(slots)])
+            rank = np.arange(len(slots)) - np.repeat(starts, counts)
+
+            # a driver with more pings than the ring holds keeps the newest
+            keep = rank >= np.repeat(counts, counts) - self.history_size
+            ring_position = (self._head[slots] + rank) % self.history_size
+            self._history[slots[keep], ring_position[keep]] = pings[keep, 1:]
+
+            last = np.r_[starts[1:] - 1, len(slots) - 1]
+            moved = slots[last]
+            self._head[moved] = (self._head[moved] + counts) % self.history_size
+            self._latest[moved] = pings[last, 1:]
+            self._dirty[moved] = True
+            return self._driver_ids[moved], pings[last, 1:3]
+
+    def latest(self, driver_id):
+        """(lat, lon, ts) of the driver's newest ping, or None."""
+        slot = self._slots.get(driver_id)
+        if slot is None:
+            return None
+        return tuple(self._latest[slot].tolist())
+
+    def history(self, driver_id):
+        """Recent (lat, lon, ts) pings of the driver, oldest first."""
+        slot = self._slots.get(driver_id)
+        if slot is None:
+            return []
+        with self._lock:
+            ring = np.roll(self._history[slot], -self._head[slot], axis=0)
+        return [tuple(row) for row in ring.tolist() if not isnan(row[2])]
+
+    def drain_dirty(self):
+        """Latest positions that changed since the last drain, for persistence."""
+        with self._lock:
+            slots = np.flatnonzero(self._dirty[: len(self._slots)])
+            self._dirty[slots] = False
+            return self._driver_ids[slots].copy(), self._latest[slots].copy()
+
+    def mark_dirty(self, driver_ids):
+        """Put drained drivers back, for when persisting them failed."""
+        with self._lock:
+            slots = [self._slots[driver_id] for driver_id in np.asarray(driver_ids).tolist()]
+            self._dirty[slots] = True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["drivers"] = len(self._slots)
+        return stats
@@ -0,0 +1,225 @@
+import os
+from array import array
+from heapq import heappop, heappush
+from math import floor, inf
+
+import numpy as np
+
+
+def dijkstra(offsets, targets, weights, source):
+    """Shortest weight from `source` to every node, inf where unreachable."""
+    dist = array("d", [inf]) * (len(offsets) - 1)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = targets[edge]
+            candidate = d + weights[edge]
+            if candidate < dist[v]:
+                dist[v] = candidate
+                heappush(heap, (candidate, v))
+    return dist
+
+
+def _csr(sources, targets, node_count, *columns):
+    """Sort edges by source and build CSR offsets, returning array.array views."""
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=offsets[1:])
+    return (
+        array("q", offsets.tobytes()),
+        array("q", targets[order].astype(np.int64).tobytes()),
+        *(array("d", column[order].astype(np.float64).tobytes()) for column in columns),
+    )
+
+
+class RoadGraph:
+    """
+    Directed road network in compressed sparse row form.
+
+    Nodes carry (lat, lon); every edge has a length in metres and a travel
+    time in seconds. Adjacency is kept in `array.array`s rather than NumPy
+    arrays because the search loops index them one element at a time, which
+    is several times faster on plain arrays.
+
+    Landmark tables for ALT search (shortest travel time from and to a few
+    far-apart landmark nodes) are computed once with `build_landmarks` and
+    saved alongside the graph by `save`.
+    """
+
+    def __init__(self, coordinates, sources, targets, lengths_m, seconds, cell_size=0.005):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.node_count = len(self.coordinates)
+        self.edge_count = len(sources)
+        self._edges = (
+            np.asarray(sources, dtype=np.int64),
+            np.asarray(targets, dtype=np.int64),
+            np.asarray(lengths_m, dtype=np.float64),
+            np.asarray(seconds, dtype=np.float64),
+        )
+        sources, targets, lengths_m, seconds = self._edges
+        self.offsets, self.targets, self.lengths, self.seconds = _csr(
+            sources, targets, self.node_count, lengths_m, seconds
+        )
+        self.reverse_offsets, self.reverse_targets, self.reverse_seconds = _csr(
+            targets, sources, self.node_count, seconds
+        )
+        self.landmarks = []
+        self.from_landmark = []  # per landmark, seconds from it to every node
+        self.to_landmark = []  # per landmark, seconds from every node to it
+        self.cell_size = cell_size
+        self.__build_snap_index()
+
+    @classmethod
+    def from_edge_list(cls, nodes_path, edges_path, default_speed_kmh=30.0):
+        """
+        Load an OSM style export: a nodes CSV of `id,lat,lon` and an edges CSV
+        of `source,target,length_m,speed_kmh,oneway` (both with a header row).
+        Node ids may be arbitrary OSM ids. Edges with oneway=0 are added in
+        both directions; a speed of 0 falls back to `default_speed_kmh`.
+        """
+        # ids are read as integers, OSM ids don't survive a round trip via float
+        node_ids = np.loadtxt(nodes_path, delimiter=",", skiprows=1, usecols=0, dtype=np.int64, ndmin=1)
+        coordinates = np.loadtxt(nodes_path, delimiter=",", skiprows=1, usecols=(1, 2), ndmin=2)
+        edge_ids = np.loadtxt(edges_path, delimiter=",", skiprows=1, usecols=(0, 1), dtype=np.int64, ndmin=2)
+        edges = np.loadtxt(edges_path, delimiter=",", skiprows=1, usecols=(2, 3, 4), ndmin=2)
+        order = np.argsort(node_ids)
+        node_ids, coordinates = node_ids[order], coordinates[order]
+
+        sources = np.minimum(np.searchsorted(node_ids, edge_ids[:, 0]), len(node_ids) - 1)
+        targets = np.minimum(np.searchsorted(node_ids, edge_ids[:, 1]), len(node_ids) - 1)
+        if (node_ids[sources] != edge_ids[:, 0]).any() or (
+            node_ids[targets] != edge_ids[:, 1]
+        ).any():
+            raise ValueError("edge list references a node missing from the nodes file")
+        lengths = edges[:, 0]
+        speeds = np.where(edges[:, 1] > 0, edges[:, 1], default_speed_kmh)
+        seconds = lengths / (speeds / 3.6)
+        two_way = edges[:, 2] == 0
+        return cls(
+            coordinates,
+            np.concatenate([sources, targets[two_way]]),
+            np.concatenate([targets, sources[two_way]]),
+            np.concatenate([lengths, lengths[two_way]]),
+            np.concatenate([seconds, seconds[two_way]]),
+        )
+
+    def save(self, path):
+        """Write the graph and its landmark tables to a compressed .npz file."""
+        sources, targets, lengths, seconds = self._edges
+        np.savez_compressed(
+            path,
+            coordinates=self.coordinates,
+            sources=sources,
+            targets=targets,
+            lengths=lengths,
+            seconds=seconds,
+            landmarks=np.asarray(self.landmarks, dtype=np.int64),
+            from_landmark=self.__landmark_table(self.from_landmark),
+            to_landmark=self.__landmark_table(self.to_landmark),
+        )
+
+    def __landmark_table(self, rows):
+        table = np.empty((len(rows), self.node_count))
+        for row, times in enumerate(rows):
+            table[row] = np.frombuffer(times, dtype=np.float64)
+        return table
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            graph = cls(
+                data["coordinates"],
+                data["sources"],
+                data["targets"],
+                data["lengths"],
+                data["seconds"],
+            )
+            graph.landmarks = data["landmarks"].tolist()
+            graph.from_landmark = [array("d", row.tobytes()) for row in data["from_landmark"]]
+            graph.to_landmark = [array("d", row.tobytes()) for row in data["to_landmark"]]
+        return graph
+
+    @classmethod
+    def load_path(cls, path):
+        """A compiled .npz graph, or a directory holding nodes.csv and edges.csv."""
+        if path.endswith(".npz"):
+            return cls.load(path)
+        graph = cls.from_edge_list(
+            os.path.join(path, "nodes.csv"), os.path.join(path, "edges.csv")
+        )
+        graph.build_landmarks()
+        return graph
+
+    def build_landmarks(self, count=8, seed=0):
+        """
+        Pick `count` far-apart landmarks (farthest-point selection) and store
+        travel times from and to each of them. This is 2 * count full
+        Dijkstra runs, so it is meant to run once before `save`.
+        """
+        rng = np.random.default_rng(seed)
+        start = int(rng.integers(self.node_count))
+        closest = np.frombuffer(
+            dijkstra(self.offsets, self.targets, self.seconds, start), dtype=np.float64
+        )
+        self.landmarks, self.from_landmark, self.to_landmark = [], [], []
+        for _ in range(min(count, self.node_count)):
+            landmark = int(np.argmax(np.where(np.isfinite(closest), closest, -1.0)))
+            from_landmark = dijkstra(self.offsets, self.targets, self.seconds, landmark)
+            to_landmark = dijkstra(
+                self.reverse_offsets, self.reverse_targets, self.reverse_seconds, landmark
+            )
+            self.landmarks.append(landmark)
+            self.from_landmark.append(from_landmark)
+            self.to_landmark.append(to_landmark)
+            # the next landmark is the node farthest from every landmark so far
+            times = np.frombuffer(from_landmark, dtype=np.float64)
+            closest = times if len(self.landmarks) == 1 else np.minimum(closest, times)
+
+    def __build_snap_index(self):
+        cells = np.floor(self.coordinates / self.cell_size).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        cells = cells[order]
+        boundaries = np.flatnonzero((cells[1:] != cells[:-1]).any(axis=1)) + 1
+        self._cells = {
+            (int(cell[0]), int(cell[1])): nodes
+            for cell, nodes in zip(
+                cells[np.r_[0, boundaries]] if len(cells) else [],
+                np.split(order, boundaries) if len(cells) else [],
+            )
+        }
+
+    @staticmethod
+    def __ring(cx, cy, radius):
+        if radius == 0:
+            yield cx, cy
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def nearest_node(self, location, max_radius=20):
+        """Closest node to (lat, lon), searching rings of grid cells outward."""
+        x, y = location
+        cx, cy = floor(x / self.cell_size), floor(y / self.cell_size)
+        best, best_distance = None, inf
+        for radius in range(max_radius + 1):
+            for cell in self.__ring(cx, cy, radius):
+                nodes = self._cells.get(cell)
+                if nodes is None:
+                    continue
+                delta = self.coordinates[nodes] - (x, y)
+                distances = np.hypot(delta[:, 0], delta[:, 1])
+                index = int(np.argmin(distances))
+                if distances[index] < best_distance:
+                    best, best_distance = int(nodes[index]), float(distances[index])
+            # anything in the next ring is at least this far away
+            if best is not None and best_distance <= radius * self.cell_size:
+                break
+        return best
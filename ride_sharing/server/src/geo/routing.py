@@ -0,0 +1,176 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from heapq import heappop, heappush
+from math import asin, cos, inf, radians, sin, sqrt
+
+import numpy as np
+
+from src.geo.road_graph import RoadGraph
+
+Route = namedtuple("Route", ("distance_km", "duration_minutes"))
+
+
+class NoRoute(Exception):
+    pass
+
+
+def haversine_km(source, destination):
+    lat1, lon1 = map(radians, source)
+    lat2, lon2 = map(radians, destination)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * asin(sqrt(a))
+
+
+class RoutingEngine:
+    """
+    Fastest-route queries on a RoadGraph using ALT: A* with lower bounds
+    from precomputed landmark travel times (the triangle inequality gives
+    d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L)).
+
+    Per query only the `active_landmarks` giving the tightest bound at the
+    source are used. Results are memoised per (source node, target node):
+    points are snapped to their nearest node first, so every request between
+    the same two street corners shares one cache entry.
+    """
+
+    def __init__(self, graph: RoadGraph, cache_size=100_000, active_landmarks=4):
+        self.graph = graph
+        self.cache_size = cache_size
+        self.active_landmarks = active_landmarks
+        self._cache = OrderedDict()  # (source, target) -> Route or None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "settled": 0}
+
+    def route(self, source_location, destination_location):
+        """Route between two (lat, lon) points, raising NoRoute if there is none."""
+        source = self.graph.nearest_node(source_location)
+        target = self.graph.nearest_node(destination_location)
+        if source is None or target is None:
+            raise NoRoute("location is too far from the road network")
+        route = self.route_nodes(source, target)
+        if route is None:
+            raise NoRoute(f"no road connects node {source} to node {target}")
+        return route
+
+    def route_nodes(self, source, target):
+        key = (source, target)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._cache[key]
+            self._stats["misses"] += 1
+        route = self.__search(source, target)
+        with self._lock:
+            self._cache[key] = route
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return route
+
+    def distances(self, sources, destinations):
+        """
+        Road distance in km for each trip. Trips with no route (off the map,
+        or a disconnected piece of the graph) fall back to the great-circle
+        distance so a booking is never refused over a gap in the map data.
+        """
+        distances = np.empty(len(sources))
+        for trip, (source, destination) in enumerate(zip(sources, destinations)):
+            try:
+                distances[trip] = self.route(source, destination).distance_km
+            except NoRoute:
+                distances[trip] = haversine_km(source, destination)
+        return distances
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_routes"] = len(self._cache)
+        return stats
+
+    def __landmark_bounds(self, source, target):
+        graph = self.graph
+        bounds = []
+        for from_landmark, to_landmark in zip(graph.from_landmark, graph.to_landmark):
+            from_to_target, target_to_landmark = from_landmark[target], to_landmark[target]
+            if from_to_target == inf or target_to_landmark == inf:
+                continue
+            bound = max(
+                from_to_target - from_landmark[source],
+                to_landmark[source] - target_to_landmark,
+            )
+            bounds.append((bound, from_landmark, from_to_target, to_landmark, target_to_landmark))
+        bounds.sort(key=lambda row: row[0], reverse=True)
+        return bounds[: self.active_landmarks]
+
+    def __search(self, source, target):
+        if source == target:
+            return Route(0.0, 0.0)
+        graph = self.graph
+        offsets, targets = graph.offsets, graph.targets
+        seconds, lengths = graph.seconds, graph.lengths
+        bounds = self.__landmark_bounds(source, target)
+        if bounds and bounds[0][0] == inf:
+            return None  # source can't reach a landmark the target reaches
+        tables = [row[1:] for row in bounds]
+
+        best = {source: 0.0}
+        metres = {source: 0.0}
+        heuristic = {}
+        heap = [(0.0, 0.0, source)]
+        settled = 0
+        route = None
+        while heap:
+            _, time, u = heappop(heap)
+            if time > best[u]:
+                continue
+            settled += 1
+            if u == target:
+                route = Route(metres[u] / 1000, time / 60)
+                break
+            for edge in range(offsets[u], offsets[u + 1]):
+                v = targets[edge]
+                candidate = time + seconds[edge]
+                if candidate >= best.get(v, inf):
+                    continue
+                best[v] = candidate
+                metres[v] = metres[u] + lengths[edge]
+                estimate = heuristic.get(v)
+                if estimate is None:
+                    estimate = 0.0
+                    for from_landmark, from_to_target, to_landmark, target_to_landmark in tables:
+                        bound = from_to_target - from_landmark[v]
+                        if bound > estimate:
+                            estimate = bound
+                        bound = to_landmark[v] - target_to_landmark
+                        if bound > estimate:
+                            estimate = bound
+                    heuristic[v] = estimate
+                if estimate != inf:
+                    heappush(heap, (candidate + estimate, candidate, v))
+        with self._lock:
+            self._stats["settled"] += settled
+        return route
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+
+def get_default_router():
+    """
+    Process-wide routing engine for the graph at ROAD_GRAPH_PATH, or None
+    when no graph is configured and fares use great-circle distance.
+    """
+    global _default_router
+    path = os.environ.get("ROAD_GRAPH_PATH")
+    if not path:
+        return None
+    if _default_router is None:
+        with _default_router_lock:
+            if _default_router is None:
+                _default_router = RoutingEngine(
+                    RoadGraph.load_path(path),
+                    cache_size=int(os.environ.get("ROUTE_CACHE_SIZE", 100_000)),
+                )
+    return _default_router
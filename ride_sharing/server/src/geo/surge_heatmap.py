@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from math import floor
+
+import numpy as np
+
+
+class SurgeHeatmap:
+    """
+    Sliding-window demand and supply counts per grid cell, for surge pricing.
+
+    Time is split into `bucket_seconds` buckets and the window keeps the last
+    `window_seconds` of them. Ride requests add to their bucket and to a
+    running per-cell total; when a bucket falls out of the window its counts
+    are subtracted once, so every event costs O(1) to record and to expire.
+
+    Supply counts distinct drivers: each driver is counted in the cell of
+    their latest heartbeat until it ages out of the window or they become
+    busy or go offline.
+    """
+
+    def __init__(
+        self,
+        cell_size=0.01,
+        window_seconds=300,
+        bucket_seconds=10,
+        sensitivity=0.5,
+        max_multiplier=3.0,
+        clock=time.time,
+    ):
+        self.cell_size = cell_size
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = max(1, int(window_seconds // bucket_seconds))
+        self.sensitivity = sensitivity
+        self.max_multiplier = max_multiplier
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._epoch = None  # newest bucket number seen
+        self._demand: dict = {}  # cell -> requests in the window
+        self._demand_buckets = deque()  # (bucket, {cell: requests})
+        self._supply: dict = {}  # cell -> drivers seen in the window
+        self._supply_buckets = deque()  # (bucket, {driver_id: cell})
+        self._drivers: dict = {}  # driver_id -> (bucket, cell, bucket drivers)
+
+    def __cell(self, location):
+        x, y = location
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def __bucket(self, ts):
+        bucket = int(ts // self.bucket_seconds)
+        if self._epoch is None or bucket > self._epoch:
+            self._epoch = bucket
+            self.__expire(bucket - self.bucket_count)
+        return bucket
+
+    def __expire(self, oldest_dropped):
+        demand = self._demand
+        while self._demand_buckets and self._demand_buckets[0][0] <= oldest_dropped:
+            _, counts = self._demand_buckets.popleft()
+            for cell, count in counts.items():
+                remaining = demand[cell] - count
+                if remaining:
+                    demand[cell] = remaining
+                else:
+                    del demand[cell]
+        while self._supply_buckets and self._supply_buckets[0][0] <= oldest_dropped:
+            _, drivers = self._supply_buckets.popleft()
+            for driver_id, cell in drivers.items():
+                del self._drivers[driver_id]
+                self.__decrement_supply(cell)
+
+    def __decrement_supply(self, cell):
+        remaining = self._supply[cell] - 1
+        if remaining:
+            self._supply[cell] = remaining
+        else:
+            del self._supply[cell]
+
+    @staticmethod
+    def __current(buckets, bucket, empty):
+        # events slightly in the past land in the newest bucket; that only
+        # keeps them in the window a little longer
+        if not buckets or buckets[-1][0] < bucket:
+            buckets.append((bucket, empty()))
+        return buckets[-1][1]
+
+    def __forget_driver(self, driver_id):
+        seen = self._drivers.pop(driver_id, None)
+        if seen is not None:
+            _, cell, drivers = seen
+            del drivers[driver_id]
+            self.__decrement_supply(cell)
+
+    def record_request(self, location, ts=None):
+        with self._lock:
+            bucket = self.__bucket(self.clock() if ts is None else ts)
+            cell = self.__cell(location)
+            counts = self.__current(self._demand_buckets, bucket, dict)
+            counts[cell] = counts.get(cell, 0) + 1
+            self._demand[cell] = self._demand.get(cell, 0) + 1
+
+    def record_heartbeat(self, driver_id, location, ts=None):
+        """Count an available driver in the cell of their latest position."""
+        with self._lock:
+            self.__heartbeat(driver_id, location, self.clock() if ts is None else ts)
+
+    def record_heartbeats(self, driver_ids, locations, ts=None):
+        with self._lock:
+            ts = self.clock() if ts is None else ts
+            for driver_id, location in zip(driver_ids, locations):
+                self.__heartbeat(driver_id, location, ts)
+
+    def __heartbeat(self, driver_id, location, ts):
+        cell = self.__cell(location)
+        drivers = self.__current(self._supply_buckets, self.__bucket(ts), dict)
+        seen = self._drivers.get(driver_id)
+        if seen is not None and seen[2] is drivers and seen[1] == cell:
+            return  # already counted here in this bucket
+        self.__forget_driver(driver_id)
+        drivers[driver_id] = cell
+        self._drivers[driver_id] = (self._supply_buckets[-1][0], cell, drivers)
+        self._supply[cell] = self._supply.get(cell, 0) + 1
+
+    def remove_driver(self, driver_id):
+        """Stop counting a driver who took a ride or went offline."""
+        with self._lock:
+            self.__forget_driver(driver_id)
+
+    def __multiplier(self, cell):
+        demand = self._demand.get(cell, 0)
+        if not demand:
+            return 1.0
+        ratio = demand / max(self._supply.get(cell, 0), 1)
+        multiplier = 1.0 + self.sensitivity * (ratio - 1.0)
+        # tenths, so fares don't jitter on every request
+        return round(min(max(multiplier, 1.0), self.max_multiplier), 1)
+
+    def multiplier(self, location):
+        with self._lock:
+            self.__bucket(self.clock())
+            return self.__multiplier(self.__cell(location))
+
+    def multipliers(self, locations):
+        with self._lock:
+            self.__bucket(self.clock())
+            return np.fromiter(
+                (self.__multiplier(self.__cell(location)) for location in locations),
+                dtype=np.float64,
+                count=len(locations),
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "demand_cells": len(self._demand),
+                "supply_cells": len(self._supply),
+                "requests": sum(self._demand.values()),
+                "drivers": len(self._drivers),
+            }
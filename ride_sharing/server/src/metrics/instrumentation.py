@@ -0,0 +1,37 @@
+from time import perf_counter
+
+from flask import Response, request
+
+from src.metrics.registry import MetricsRegistry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def instrument_app(app, registry: MetricsRegistry):
+    """
+    Time every request from before_request to the response leaving the view
+    and record it under the matched route pattern (not the raw path, so ids
+    don't explode the label set).
+    """
+
+    @app.before_request
+    def _start_timer():
+        request.environ["metrics.started"] = perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        current = request._get_current_object()  # resolve the proxy once
+        started = current.environ.get("metrics.started")
+        if started is not None:
+            rule = current.url_rule
+            registry.observe_request(
+                current.method,
+                rule.rule if rule is not None else "<unmatched>",
+                response.status_code,
+                perf_counter() - started,
+            )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,222 @@
+import os
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+
+# seconds, roughly 2.5x apart from half a millisecond to ten seconds
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_LITERALS = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b|%s|\?"
+)
+_IN_LISTS = re.compile(r"\bin ?\(\?(?:, \?)*\)")
+_VALUE_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+_WHITESPACE = re.compile(r"\s+")
+_COMMAS = re.compile(r"\s*,\s*")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(query):
+    """
+    Collapse a SQL statement to its shape: literals and placeholders become
+    `?`, IN lists and multi-row VALUES collapse, whitespace and case are
+    normalised. Cached, since the repositories only issue a few dozen shapes.
+    """
+    shape = _WHITESPACE.sub(" ", query).strip().lower()
+    shape = _COMMAS.sub(", ", _LITERALS.sub("?", shape))
+    shape = _VALUE_ROWS.sub(r"\1, ...", shape)
+    return _IN_LISTS.sub("in (?...)", shape)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class MetricsRegistry:
+    """
+    Process-wide request and query metrics, rendered in the Prometheus text
+    exposition format. Recording is a dict lookup and a bisect under one lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict = {}  # (method, route, status) -> Histogram
+        self._queries: dict = {}  # statement shape -> Histogram
+        self._query_rows: dict = {}  # statement shape -> rows
+        self._query_errors: dict = {}  # statement shape -> errors
+        self._counters: dict = {}  # (name, labels) -> value
+
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route, status)
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_query(self, query, seconds, rows=0, failed=False):
+        shape = statement_shape(query)
+        with self._lock:
+            histogram = self._queries.get(shape)
+            if histogram is None:
+                histogram = self._queries[shape] = Histogram()
+                self._query_rows[shape] = 0
+                self._query_errors[shape] = 0
+            histogram.observe(seconds)
+            if rows > 0:
+                self._query_rows[shape] += rows
+            if failed:
+                self._query_errors[shape] += 1
+
+    def increment(self, name, labels=(), value=1):
+        """Bump a free-form counter, `labels` being (name, value) pairs."""
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._queries.clear()
+            self._query_rows.clear()
+            self._query_errors.clear()
+            self._counters.clear()
+
+    def query_stats(self):
+        """{shape: {"count", "seconds", "rows", "errors"}} for ad hoc inspection."""
+        with self._lock:
+            return {
+                shape: {
+                    "count": histogram.count,
+                    "seconds": histogram.sum,
+                    "rows": self._query_rows[shape],
+                    "errors": self._query_errors[shape],
+                }
+                for shape, histogram in self._queries.items()
+            }
+
+    @staticmethod
+    def __render_histogram(lines, name, label_names, label_values, histogram):
+        labels = _labels(label_names, label_values)
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def render(self):
+        with self._lock:
+            requests = {key: self.__copy(h) for key, h in self._requests.items()}
+            queries = {key: self.__copy(h) for key, h in self._queries.items()}
+            query_rows = dict(self._query_rows)
+            query_errors = dict(self._query_errors)
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for key in sorted(requests):
+            self.__render_histogram(
+                lines,
+                "http_request_duration_seconds",
+                ("method", "route", "status"),
+                key,
+                requests[key],
+            )
+        lines += [
+            "# HELP db_query_duration_seconds Query latency by statement shape.",
+            "# TYPE db_query_duration_seconds histogram",
+        ]
+        for shape in sorted(queries):
+            self.__render_histogram(
+                lines, "db_query_duration_seconds", ("statement",), (shape,), queries[shape]
+            )
+        lines += [
+            "# HELP db_query_rows_total Rows returned or affected by statement shape.",
+            "# TYPE db_query_rows_total counter",
+        ]
+        for shape in sorted(query_rows):
+            lines.append(
+                f"db_query_rows_total{{{_labels(('statement',), (shape,))}}} {query_rows[shape]}"
+            )
+        lines += [
+            "# HELP db_query_errors_total Failed queries by statement shape.",
+            "# TYPE db_query_errors_total counter",
+        ]
+        for shape in sorted(query_errors):
+            lines.append(
+                f"db_query_errors_total{{{_labels(('statement',), (shape,))}}} {query_errors[shape]}"
+            )
+        declared = set()
+        for name, labels in sorted(counters):
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            label_text = _labels(*zip(*labels)) if labels else ""
+            lines.append(f"{name}{{{label_text}}} {counters[(name, labels)]}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __copy(histogram):
+        copy = Histogram(histogram.bounds)
+        copy.counts = list(histogram.counts)
+        copy.sum = histogram.sum
+        copy.count = histogram.count
+        return copy
+
+
+def metrics_enabled():
+    return os.environ.get("METRICS_ENABLED", "1") != "0"
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    """Process-wide registry shared by the app and every DatabaseObject."""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = MetricsRegistry()
+    return _default_registry
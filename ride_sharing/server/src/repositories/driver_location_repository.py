@@ -0,0 +1,17 @@
+from src.database.databaseObject import DatabaseObject
+
+
+class DriverLocationRepository:
+    def __init__(self, db: DatabaseObject):
+        self.db = db
+
+    def save_latest(self, rows):
+        """Upsert a batch of (driver_id, lat, lon, recorded_at) in one transaction."""
+        query = """replace into driver_locations (driver_id, latitude, longitude, recorded_at)
+        values (%s, %s, %s, %s)"""
+        self.db.execute_many(query=query, seq_of_params=rows)
+
+    def get_latest(self, driver_id):
+        query = "select latitude, longitude, recorded_at from driver_locations where driver_id=%s"
+        rows = self.db.fetch_all(query=query, params=(driver_id,))
+        return rows[0] if rows else None
@@ -0,0 +1,82 @@
+from src.database.async_database import AsyncDatabaseObject, AsyncTransaction
+from src.database.databaseObject import DatabaseObject
+from src.database.transaction import Transaction
+
+SET_AVAILABILITY_QUERY = """replace into driver_availability (driver_id, vehicle_type, is_available)
+        values (%s, %s, %s)"""
+TAKE_DRIVER_QUERY = """update driver_availability set is_available=%s
+            where driver_id=%s and is_available=%s"""
+SET_AVAILABLE_QUERY = "update driver_availability set is_available=%s where driver_id=%s"
+
+
+def _claim_query(candidate_ids):
+    placeholders = ", ".join(["%s"] * len(candidate_ids))
+    ranking = " ".join(["when %s then %s"] * len(candidate_ids))
+    query = f"""select driver_id from driver_availability
+        where driver_id in ({placeholders}) and is_available = %s
+        order by case driver_id {ranking} end
+        limit 1 for update skip locked"""
+    params = [*candidate_ids, True]
+    for rank, driver_id in enumerate(candidate_ids):
+        params += [driver_id, rank]
+    return query, tuple(params)
+
+
+class DriverRepository:
+    def __init__(self, db: DatabaseObject):
+        self.db = db
+
+    def set_availability(self, driver_id, vehicle_type, available):
+        self.db.execute(
+            query=SET_AVAILABILITY_QUERY, params=(driver_id, vehicle_type, bool(available))
+        )
+
+    def release(self, driver_id, tx: Transaction = None):
+        (tx or self.db).execute(query=SET_AVAILABLE_QUERY, params=(True, driver_id))
+
+    def mark_unavailable(self, driver_ids, tx: Transaction = None):
+        params = [(False, driver_id) for driver_id in driver_ids]
+        (tx or self.db).execute_many(query=SET_AVAILABLE_QUERY, seq_of_params=params)
+
+    def claim_first_available(self, candidate_ids, tx: Transaction):
+        """
+        Lock and take the first of `candidate_ids` (nearest first) that is
+        still available. Rows another booking holds are skipped rather than
+        waited on. Returns None when every candidate is taken.
+        """
+        query, params = _claim_query(candidate_ids)
+        rows = tx.fetch_all(query=query, params=params)
+        if not rows:
+            return None
+        driver_id = rows[0][0]
+        # guarded, so a backend without row locks can't hand out a taken driver
+        tx.execute(query=TAKE_DRIVER_QUERY, params=(False, driver_id, True))
+        return driver_id if tx.rowcount == 1 else None
+
+
+class AsyncDriverRepository:
+    """DriverRepository for the asyncio serving mode."""
+
+    def __init__(self, db: AsyncDatabaseObject):
+        self.db = db
+
+    async def set_availability(self, driver_id, vehicle_type, available):
+        await self.db.execute(
+            query=SET_AVAILABILITY_QUERY, params=(driver_id, vehicle_type, bool(available))
+        )
+
+    async def release(self, driver_id):
+        await self.db.execute(query=SET_AVAILABLE_QUERY, params=(True, driver_id))
+
+    async def mark_unavailable(self, driver_ids):
+        params = [(False, driver_id) for driver_id in driver_ids]
+        await self.db.execute_many(query=SET_AVAILABLE_QUERY, seq_of_params=params)
+
+    async def claim_first_available(self, candidate_ids, tx: AsyncTransaction):
+        query, params = _claim_query(candidate_ids)
+        rows = await tx.fetch_all(query=query, params=params)
+        if not rows:
+            return None
+        driver_id = rows[0][0]
+        await tx.execute(query=TAKE_DRIVER_QUERY, params=(False, driver_id, True))
+        return driver_id if tx.rowcount == 1 else None
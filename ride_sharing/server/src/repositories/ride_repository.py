@@ -1,26 +1,350 @@
+from src.cache.backend import CacheBackend
+from src.database.async_database import AsyncDatabaseObject, AsyncTransaction
 from src.database.databaseObject import DatabaseObject
+from src.database.transaction import Transaction
+from src.repositories.driver_repository import TAKE_DRIVER_QUERY
+from src.repositories.ride_summary_repository import (
+    AsyncRideSummaryRepository,
+    RideSummaryRepository,
+    assigned_deltas,
+    booked_deltas,
+    completed_deltas,
+    unmatched_deltas,
+)
+
+CREATE_RIDE_QUERY = """insert into rides (user_id,driver_id,source_lat,source_lon,destination_lat,destination_lon,fare)
+        values (%s,%s,%s,%s,%s,%s,%s)"""
+GET_DRIVER_ID_QUERY = "select driver_id from rides where id=%s"
+GET_MATCH_QUERY = "select driver_id, unmatched_at is not null from rides where id=%s"
+# the first start and end recorded win, a repeated call changes nothing
+UPDATE_RIDE_TIMES_QUERY = """update rides set ride_start_time=coalesce(ride_start_time, %s),
+        ride_end_time=coalesce(ride_end_time, %s) where id=%s"""
+# locked, so two concurrent ends of a ride can't both count it as completed
+ENDING_RIDES_QUERY = """select id, user_id, driver_id from rides
+        where ride_end_time is null and id in ({}) for update"""
+
+
+def _in_query(query, count):
+    return query.format(", ".join(["%s"] * count))
+
+
+def _ride_params(rider_id, driver_id, source_location, destination_location, fare):
+    source_lat, source_lon = source_location
+    destination_lat, destination_lon = destination_location
+    return (
+        rider_id,
+        driver_id,
+        float(source_lat),
+        float(source_lon),
+        float(destination_lat),
+        float(destination_lon),
+        fare,
+    )
+
+
+def _ride_time_params(updates):
+    """execute_many params for (ride_id, start_time, end_time) and the end times by ride."""
+    params = [
+        (start_time, end_time, ride_id) for ride_id, start_time, end_time in updates
+    ]
+    end_times = {
+        ride_id: end_time for ride_id, _, end_time in updates if end_time is not None
+    }
+    return params, end_times
+
+
+def _history_query(user_id, limit, before_ride_id=None, offset=None):
+    query = """select rides.id, source_lat, source_lon, destination_lat, destination_lon, fare,
+        users.user_name, rides.driver_id
+        from rides left join users on rides.driver_id = users.id
+        where rides.user_id=%s"""
+    params = [user_id]
+    if before_ride_id is not None:
+        query += " and rides.id < %s"
+        params.append(before_ride_id)
+    query += " order by rides.id desc limit %s"
+    params.append(limit)
+    if offset is not None:
+        query += " offset %s"
+        params.append(offset)
+    return query, tuple(params)
+
+
+def _history_page(rows):
+    # driver_id is only selected to tag the cache entry
+    return [tuple(row[:-1]) for row in rows], {row[-1] for row in rows}
+
+
+def _history_tags(user_id):
+    # a page goes stale when any ride on it, the rider's set of rides, or
+    # the name of one of its drivers changes
+    def tags(loaded):
+        rows, driver_ids = loaded
+        return (
+            [f"rides_of:{user_id}"]
+            + [f"ride:{row[0]}" for row in rows]
+            + [f"user:{driver_id}" for driver_id in driver_ids if driver_id]
+        )
+
+    return tags
 
 
 class RideRepository:
-    def __init__(self, db):
+    def __init__(self, db, cache: CacheBackend = None):
         self.db: DatabaseObject = db
+        self.cache = cache
+        self.summaries = RideSummaryRepository(db, cache=cache)
+
+    def __invalidate(self, tags, tx: Transaction = None):
+        if self.cache is None:
+            return
+        if tx is not None:
+            # other readers must not cache the old rows before we commit
+            tx.after_commit(lambda: self.cache.invalidate_tags(tags))
+        else:
+            self.cache.invalidate_tags(tags)
 
     def create_ride(
-        self, rider_id, driver_id, source_location, destination_location, fare
+        self,
+        rider_id,
+        driver_id,
+        source_location,
+        destination_location,
+        fare,
+        tx: Transaction = None,
     ):
-        query = """insert into rides (user_id,driver_id,source_location,destination_location,fare)
-        values (%s,%s,%s,%s,%s)"""
-        params = (
-            rider_id,
-            driver_id,
-            str(source_location),
-            str(destination_location),
-            fare,
+        if tx is None:
+            # the ride and its rider's and driver's summaries commit together
+            with self.db.transaction() as tx:
+                return self.create_ride(
+                    rider_id, driver_id, source_location, destination_location, fare, tx
+                )
+        params = _ride_params(
+            rider_id, driver_id, source_location, destination_location, fare
         )
-        ride_id = self.db.execute(query=query, params=params)
+        ride_id = tx.execute(query=CREATE_RIDE_QUERY, params=params)
+        self.summaries.record(booked_deltas(rider_id, driver_id, ride_id, fare), tx)
+        self.__invalidate((f"rides_of:{rider_id}",), tx)
         return ride_id
 
     def update_ride(self, field, value, ride_id):
-        query = f"""update table rides set {field}=%s where id=%s"""
+        query = f"""update rides set {field}=%s where id=%s"""
         params = (value, ride_id)
         self.db.execute(query=query, params=params)
+        self.__invalidate((f"ride:{ride_id}",))
+
+    def update_ride_times(self, updates):
+        """
+        Write a batch of (ride_id, start_time, end_time) in one transaction.
+        A None time, or one already stored, leaves the stored value untouched.
+        Rides ending for the first time count as completed in the rider's and
+        driver's summaries.
+        """
+        params, end_times = _ride_time_params(updates)
+        with self.db.transaction() as tx:
+            ending = []
+            if end_times:
+                ending = tx.fetch_all(
+                    query=_in_query(ENDING_RIDES_QUERY, len(end_times)),
+                    params=tuple(end_times),
+                )
+            tx.execute_many(query=UPDATE_RIDE_TIMES_QUERY, seq_of_params=params)
+            self.summaries.record(
+                completed_deltas(
+                    (user_id, driver_id, end_times[ride_id])
+                    for ride_id, user_id, driver_id in ending
+                ),
+                tx,
+            )
+            self.__invalidate([f"ride:{ride_id}" for ride_id, _, _ in updates], tx)
+
+    def assign_drivers(self, assignments):
+        """
+        Persist a batch of (ride_id, driver_id) assignments in one
+        transaction, taking each driver with the same guarded update a
+        booking uses. Pairs whose driver is no longer available are left out
+        and returned, so the caller can match those rides again.
+        """
+        with self.db.transaction() as tx:
+            won, lost = [], []
+            for ride_id, driver_id in assignments:
+                tx.execute(query=TAKE_DRIVER_QUERY, params=(False, driver_id, True))
+                (won if tx.rowcount == 1 else lost).append((ride_id, driver_id))
+            if not won:
+                return lost
+            drivers = dict(won)
+            fares = tx.fetch_all(
+                query=_in_query("select id, fare from rides where id in ({})", len(drivers)),
+                params=tuple(drivers),
+            )
+            tx.execute_many(
+                query="update rides set driver_id=%s where id=%s",
+                seq_of_params=[(driver_id, ride_id) for ride_id, driver_id in won],
+            )
+            self.summaries.record(
+                assigned_deltas(
+                    (ride_id, drivers[ride_id], fare) for ride_id, fare in fares
+                ),
+                tx,
+            )
+            self.__invalidate([f"ride:{ride_id}" for ride_id, _ in won], tx)
+        return lost
+
+    def mark_unmatched(self, ride_ids):
+        """
+        Record that batched matching gave up on these rides, so every worker
+        reports them unmatched, and take them back out of their riders'
+        ride counts and fares. Rides that got a driver meanwhile are skipped.
+        """
+        with self.db.transaction() as tx:
+            rides = tx.fetch_all(
+                query=_in_query(
+                    """select id, user_id, fare from rides where driver_id is null
+                    and unmatched_at is null and id in ({}) for update""",
+                    len(ride_ids),
+                ),
+                params=tuple(ride_ids),
+            )
+            if not rides:
+                return
+            tx.execute_many(
+                query="update rides set unmatched_at=current_timestamp where id=%s",
+                seq_of_params=[(ride_id,) for ride_id, _, _ in rides],
+            )
+            self.summaries.record(
+                unmatched_deltas((user_id, fare) for _, user_id, fare in rides), tx
+            )
+            self.__invalidate([f"ride:{ride_id}" for ride_id, _, _ in rides], tx)
+
+    def get_driver_id(self, ride_id):
+        # releases the driver when a ride ends, a lagging replica would miss it
+        rows = self.db.fetch_all(query=GET_DRIVER_ID_QUERY, params=(ride_id,), primary=True)
+        return rows[0][0] if rows else None
+
+    def get_match(self, ride_id):
+        """(driver_id, unmatched) of a ride, (None, False) while it is unknown."""
+        rows = self.db.fetch_all(query=GET_MATCH_QUERY, params=(ride_id,))
+        return (rows[0][0], bool(rows[0][1])) if rows else (None, False)
+
+    def get_ride_history(self, user_id, limit, before_ride_id=None, offset=None):
+        """
+        Rides of a user, newest first. Pass `before_ride_id` to seek past the
+        last ride of the previous page, or `offset` for the legacy page_num
+        path. Rides still waiting for a driver have no driver name.
+        """
+        query, params = _history_query(user_id, limit, before_ride_id, offset)
+
+        def load():
+            rows = self.db.fetch_all(query=query, params=params)
+            return _history_page(rows)
+
+        if self.cache is None:
+            return load()[0]
+
+        key = ("ride_history", user_id, limit, before_ride_id, offset)
+        return self.cache.get_or_load(
+            key,
+            load,
+            tags=_history_tags(user_id),
+            owner=user_id,
+            lag_seconds=self.db.replica_lag_seconds(),
+        )[0]
+
+    def stream_rides(self, user_id=None, booked_from=None, booked_to=None):
+        query = """select id, user_id, driver_id, source_lat, source_lon, destination_lat,
+        destination_lon, fare, ride_booking_time, ride_start_time, ride_end_time from rides where 1=1"""
+        params = []
+        if user_id is not None:
+            query += " and user_id=%s"
+            params.append(user_id)
+        if booked_from is not None:
+            query += " and ride_booking_time >= %s"
+            params.append(booked_from)
+        if booked_to is not None:
+            query += " and ride_booking_time < %s"
+            params.append(booked_to)
+        query += " order by id"
+        return self.db.stream(query=query, params=tuple(params))
+
+
+class AsyncRideRepository:
+    """RideRepository for the asyncio serving mode, same queries and cache entries."""
+
+    def __init__(self, db: AsyncDatabaseObject, cache: CacheBackend = None):
+        self.db = db
+        self.cache = cache
+        self.summaries = AsyncRideSummaryRepository(cache=cache)
+
+    def __invalidate(self, tags, tx: AsyncTransaction = None):
+        if self.cache is None:
+            return
+        if tx is not None:
+            tx.after_commit(lambda: self.cache.invalidate_tags(tags))
+        else:
+            self.cache.invalidate_tags(tags)
+
+    async def create_ride(
+        self,
+        rider_id,
+        driver_id,
+        source_location,
+        destination_location,
+        fare,
+        tx: AsyncTransaction = None,
+    ):
+        if tx is None:
+            async with self.db.transaction() as tx:
+                return await self.create_ride(
+                    rider_id, driver_id, source_location, destination_location, fare, tx
+                )
+        params = _ride_params(
+            rider_id, driver_id, source_location, destination_location, fare
+        )
+        ride_id = await tx.execute(query=CREATE_RIDE_QUERY, params=params)
+        await self.summaries.record(
+            booked_deltas(rider_id, driver_id, ride_id, fare), tx
+        )
+        self.__invalidate((f"rides_of:{rider_id}",), tx)
+        return ride_id
+
+    async def update_ride_times(self, updates):
+        params, end_times = _ride_time_params(updates)
+        async with self.db.transaction() as tx:
+            ending = []
+            if end_times:
+                ending = await tx.fetch_all(
+                    query=_in_query(ENDING_RIDES_QUERY, len(end_times)),
+                    params=tuple(end_times),
+                )
+            await tx.execute_many(query=UPDATE_RIDE_TIMES_QUERY, seq_of_params=params)
+            await self.summaries.record(
+                completed_deltas(
+                    (user_id, driver_id, end_times[ride_id])
+                    for ride_id, user_id, driver_id in ending
+                ),
+                tx,
+            )
+            self.__invalidate([f"ride:{ride_id}" for ride_id, _, _ in updates], tx)
+
+    async def get_driver_id(self, ride_id):
+        rows = await self.db.fetch_all(query=GET_DRIVER_ID_QUERY, params=(ride_id,))
+        return rows[0][0] if rows else None
+
+    async def get_match(self, ride_id):
+        rows = await self.db.fetch_all(query=GET_MATCH_QUERY, params=(ride_id,))
+        return (rows[0][0], bool(rows[0][1])) if rows else (None, False)
+
+    async def get_ride_history(self, user_id, limit, before_ride_id=None, offset=None):
+        query, params = _history_query(user_id, limit, before_ride_id, offset)
+
+        async def load():
+            return _history_page(await self.db.fetch_all(query=query, params=params))
+
+        if self.cache is None:
+            return (await load())[0]
+
+        key = ("ride_history", user_id, limit, before_ride_id, offset)
+        loaded = await self.cache.get_or_load_async(
+            key, load, tags=_history_tags(user_id), owner=user_id
+        )
+        return loaded[0]
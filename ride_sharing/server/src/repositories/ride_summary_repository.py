@@ -0,0 +1,183 @@
+import math
+
+from src.cache.backend import CacheBackend
+from src.database.async_database import AsyncTransaction
+from src.database.databaseObject import DatabaseObject
+from src.database.transaction import Transaction
+from src.utils.constants import UserRole
+
+RIDER = UserRole.RIDER.value
+DRIVER = UserRole.DRIVER.value
+SUMMARY_FIELDS = (
+    "rides",
+    "total_fare",
+    "completed_rides",
+    "last_ride_id",
+    "last_completed_at",
+)
+
+# a delta row is (user_id, role, rides, total_fare, completed_rides,
+# last_ride_id, last_completed_at), added onto the stored summary
+UPSERT_SUMMARY_QUERY = """insert into ride_summaries
+        (user_id, role, rides, total_fare, completed_rides, last_ride_id, last_completed_at)
+        values (%s, %s, %s, %s, %s, %s, %s)
+        on duplicate key update rides = rides + values(rides),
+        total_fare = total_fare + values(total_fare),
+        completed_rides = completed_rides + values(completed_rides),
+        last_ride_id = case when last_ride_id is null or values(last_ride_id) > last_ride_id
+            then values(last_ride_id) else last_ride_id end,
+        last_completed_at = case when last_completed_at is null
+            or values(last_completed_at) > last_completed_at
+            then values(last_completed_at) else last_completed_at end"""
+GET_SUMMARY_QUERY = """select role, rides, total_fare, completed_rides, last_ride_id, last_completed_at
+        from ride_summaries where user_id=%s"""
+ALL_SUMMARIES_QUERY = """select user_id, role, rides, total_fare, completed_rides, last_ride_id,
+        last_completed_at from ride_summaries"""
+# the same summaries computed from scratch, what rebuild writes and check compares;
+# a rider's unmatched rides don't count, though the last one booked may be one
+AGGREGATE_QUERY = f"""select user_id, {RIDER}, count(*) - count(unmatched_at),
+        sum(case when unmatched_at is null then fare else 0 end), count(ride_end_time), max(id),
+        max(ride_end_time) from rides group by user_id
+        union all
+        select driver_id, {DRIVER}, count(*), sum(fare), count(ride_end_time), max(id),
+        max(ride_end_time) from rides where driver_id is not null group by driver_id"""
+
+
+def booked_deltas(rider_id, driver_id, ride_id, fare):
+    deltas = [(rider_id, RIDER, 1, fare, 0, ride_id, None)]
+    if driver_id is not None:
+        deltas.append((driver_id, DRIVER, 1, fare, 0, ride_id, None))
+    return deltas
+
+
+def assigned_deltas(rides):
+    """Deltas for (ride_id, driver_id, fare) of rides the matcher gave a driver."""
+    return [(driver_id, DRIVER, 1, fare, 0, ride_id, None) for ride_id, driver_id, fare in rides]
+
+
+def unmatched_deltas(rides):
+    """Deltas taking (user_id, fare) of rides the matcher gave up on back out."""
+    return [(user_id, RIDER, -1, -fare, 0, None, None) for user_id, fare in rides]
+
+
+def completed_deltas(rides):
+    """Deltas for (user_id, driver_id, ride_end_time) of rides that just ended."""
+    deltas = []
+    for user_id, driver_id, end_time in rides:
+        deltas.append((user_id, RIDER, 0, 0, 1, None, end_time))
+        if driver_id is not None:
+            deltas.append((driver_id, DRIVER, 0, 0, 1, None, end_time))
+    return deltas
+
+
+def _ordered(deltas):
+    # every writer upserts in key order, so two transactions never wait on
+    # each other's summary rows in opposite orders
+    return sorted(deltas, key=lambda delta: (delta[0], delta[1]))
+
+
+def _summary_tags(deltas):
+    return list({f"ride_summary:{delta[0]}" for delta in deltas})
+
+
+def _matches(expected, stored):
+    if expected is None or stored is None:
+        return False
+    rides, total_fare, *rest = expected
+    stored_rides, stored_fare, *stored_rest = stored
+    # fares summed in a different order may differ in the last float bit
+    return (
+        rides == stored_rides
+        and math.isclose(total_fare, stored_fare, rel_tol=1e-9)
+        and rest == stored_rest
+    )
+
+
+class RideSummaryRepository:
+    """
+    Per user and role ride counts, total fare and last ride, stored in
+    ride_summaries and updated in the same transaction as the ride write
+    that changes them, so reading one is a primary key lookup instead of an
+    aggregate over the user's rides.
+    """
+
+    def __init__(self, db: DatabaseObject, cache: CacheBackend = None):
+        self.db = db
+        self.cache = cache
+
+    def record(self, deltas, tx: Transaction):
+        if not deltas:
+            return
+        tx.execute_many(query=UPSERT_SUMMARY_QUERY, seq_of_params=_ordered(deltas))
+        if self.cache is not None:
+            tags = _summary_tags(deltas)
+            tx.after_commit(lambda: self.cache.invalidate_tags(tags))
+
+    def get_summary(self, user_id):
+        """Stored (role, *SUMMARY_FIELDS) rows of a user, one per role they rode in."""
+
+        def load():
+            return self.db.fetch_all(query=GET_SUMMARY_QUERY, params=(user_id,))
+
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_load(
+            ("ride_summary", user_id),
+            load,
+            tags=(f"ride_summary:{user_id}", "ride_summaries"),
+            owner=user_id,
+            lag_seconds=self.db.replica_lag_seconds(),
+        )
+
+    def rebuild(self):
+        """
+        Recompute every summary from the rides table in one transaction, for
+        backfill or after a check found drift. Returns the number of rows.
+        """
+        with self.db.transaction() as tx:
+            tx.execute(query="delete from ride_summaries")
+            tx.execute(
+                query="""insert into ride_summaries (user_id, role, rides, total_fare,
+                completed_rides, last_ride_id, last_completed_at) """
+                + AGGREGATE_QUERY
+            )
+            count = tx.fetch_all(query="select count(*) from ride_summaries")[0][0]
+            if self.cache is not None:
+                tx.after_commit(lambda: self.cache.invalidate_tags(("ride_summaries",)))
+        return count
+
+    def check(self):
+        """
+        Compare the stored summaries against the rides table. Returns
+        (user_id, role, expected, stored) for every summary that differs,
+        None standing for a missing row.
+        """
+        # both sides from the primary, replicas may lag by different amounts
+        expected = {
+            (row[0], row[1]): tuple(row[2:])
+            for row in self.db.fetch_all(query=AGGREGATE_QUERY, primary=True)
+        }
+        stored = {
+            (row[0], row[1]): tuple(row[2:])
+            for row in self.db.fetch_all(query=ALL_SUMMARIES_QUERY, primary=True)
+        }
+        mismatches = []
+        for key in sorted(expected.keys() | stored.keys()):
+            if not _matches(expected.get(key), stored.get(key)):
+                mismatches.append((*key, expected.get(key), stored.get(key)))
+        return mismatches
+
+
+class AsyncRideSummaryRepository:
+    """RideSummaryRepository writes for the asyncio serving mode."""
+
+    def __init__(self, cache: CacheBackend = None):
+        self.cache = cache
+
+    async def record(self, deltas, tx: AsyncTransaction):
+        if not deltas:
+            return
+        await tx.execute_many(query=UPSERT_SUMMARY_QUERY, seq_of_params=_ordered(deltas))
+        if self.cache is not None:
+            tags = _summary_tags(deltas)
+            tx.after_commit(lambda: self.cache.invalidate_tags(tags))
@@ -0,0 +1,264 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+RIDE_TIME_FIELDS = ("ride_start_time", "ride_end_time")
+
+log = logging.getLogger(__name__)
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RideUpdateBuffer:
+    """
+    Write-behind buffer for ride start/end times.
+
+    Updates are coalesced per ride and written with one executemany in a
+    single transaction, either when `max_batch_size` rides are pending or
+    every `flush_interval_ms`. A batch the database rejects is appended to a
+    local journal file and replayed on the next flush, so a database outage
+    does not lose ride events. A batch that can't be journaled either goes
+    back into the pending updates for the next flush.
+
+    A `{pid}` in `journal_path` is replaced with the process id, so workers
+    sharing a directory each keep their own journal. On start, journals left
+    by processes that have exited are taken over and replayed.
+    """
+
+    def __init__(
+        self,
+        ride_repository,
+        max_batch_size=500,
+        flush_interval_ms=100,
+        journal_path="ride_updates.{pid}.journal",
+    ):
+        self.ride_repository = ride_repository
+        self.max_batch_size = max_batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.journal_template = journal_path
+        self.journal_path = journal_path and journal_path.replace("{pid}", str(os.getpid()))
+        self._pending: dict = {}  # ride_id -> {field: value}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "recorded": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "flushed_rides": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+            "failed_flushes": 0,
+            "journaled_rides": 0,
+            "corrupt_journal_lines": 0,
+        }
+
+    def record(self, ride_id, field, value):
+        if field not in RIDE_TIME_FIELDS:
+            raise ValueError(f"unsupported buffered field {field}")
+        with self._lock:
+            updates = self._pending.setdefault(ride_id, {})
+            if updates:
+                self._stats["coalesced"] += 1
+            updates[field] = value
+            self._stats["recorded"] += 1
+            full = len(self._pending) >= self.max_batch_size
+        if full:
+            self._wake.set()
+
+    def pending(self, ride_id):
+        with self._lock:
+            return dict(self._pending.get(ride_id, {}))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_rides"] = len(self._pending)
+        flushes = stats["flushes"]
+        stats["avg_batch_size"] = stats["flushed_rides"] / flushes if flushes else 0.0
+        stats["avg_flush_seconds"] = (
+            stats["total_flush_seconds"] / flushes if flushes else 0.0
+        )
+        return stats
+
+    def start(self):
+        if self._thread is None:
+            self._replay_journal()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self.__run, name="ride-update-buffer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.stop)
+        self.flush()
+
+    def __run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_ms / 1000)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # flush keeps its batch on failure, the next tick retries it
+                log.exception("ride update flush loop error")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            try:
+                return self.__flush(batch)
+            except Exception:
+                log.exception(
+                    "ride update flush failed, keeping %d rides for the next one",
+                    len(batch),
+                )
+                self.__requeue(batch)
+                with self._lock:
+                    self._stats["failed_flushes"] += 1
+                return 0
+
+    def __requeue(self, batch):
+        with self._lock:
+            # updates recorded since the batch was taken are newer, they win
+            for ride_id, updates in self._pending.items():
+                batch.setdefault(ride_id, {}).update(updates)
+            self._pending = batch
+
+    def __flush(self, batch):
+        journaled = self.__read_journal(self.journal_path)
+        # journaled updates are older, so live ones win on conflict
+        for ride_id, updates in batch.items():
+            journaled.setdefault(ride_id, {}).update(updates)
+        batch = journaled
+        if not batch:
+            return 0
+
+        rows = [
+            (ride_id, updates.get("ride_start_time"), updates.get("ride_end_time"))
+            for ride_id, updates in batch.items()
+        ]
+        started = time.perf_counter()
+        try:
+            self.ride_repository.update_ride_times(rows)
+        except Exception as e:
+            log.warning("ride update flush failed, journaling %d rides: %s", len(rows), e)
+            self.__write_journal(batch)
+            with self._lock:
+                self._stats["failed_flushes"] += 1
+                self._stats["journaled_rides"] += len(rows)
+            return 0
+        elapsed = time.perf_counter() - started
+
+        self.__clear_journal()
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["flushed_rides"] += len(rows)
+            self._stats["last_batch_size"] = len(rows)
+            self._stats["max_batch_size"] = max(
+                self._stats["max_batch_size"], len(rows)
+            )
+            self._stats["last_flush_seconds"] = elapsed
+            self._stats["max_flush_seconds"] = max(
+                self._stats["max_flush_seconds"], elapsed
+            )
+            self._stats["total_flush_seconds"] += elapsed
+        return len(rows)
+
+    def _replay_journal(self):
+        for orphan in self.__orphaned_journals():
+            self.__adopt_journal(orphan)
+        if self.journal_path and os.path.exists(self.journal_path):
+            self.flush()
+
+    def __orphaned_journals(self):
+        """Journals of other processes from the same template that have exited."""
+        if not self.journal_template or "{pid}" not in self.journal_template:
+            return []
+        prefix, suffix = self.journal_template.split("{pid}", 1)
+        orphans = []
+        for path in glob.glob(glob.escape(prefix) + "*" + glob.escape(suffix)):
+            pid = path[len(prefix) : len(path) - len(suffix)]
+            if pid.isdigit() and int(pid) != os.getpid() and not _process_exists(int(pid)):
+                orphans.append(path)
+        return orphans
+
+    def __adopt_journal(self, orphan):
+        # claimed by renaming first, so two workers starting together can't both take it
+        claimed = f"{self.journal_path}.adopted"
+        try:
+            os.replace(orphan, claimed)
+        except FileNotFoundError:
+            return
+        batch = self.__read_journal(claimed)
+        for ride_id, updates in self.__read_journal(self.journal_path).items():
+            batch.setdefault(ride_id, {}).update(updates)
+        if batch:
+            self.__write_journal(batch)
+        os.remove(claimed)
+
+    def __read_journal(self, path):
+        batch = {}
+        if not (path and os.path.exists(path)):
+            return batch
+        with open(path) as journal:
+            for number, line in enumerate(journal, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    ride_id = entry.pop("ride_id")
+                    updates = {
+                        field: datetime.fromisoformat(value)
+                        for field, value in entry.items()
+                        if field in RIDE_TIME_FIELDS
+                    }
+                except (ValueError, TypeError, KeyError, AttributeError) as e:
+                    # a torn write or a hand edit, the rest of the journal still counts
+                    log.warning("skipping corrupt line %d of %s: %s", number, path, e)
+                    with self._lock:
+                        self._stats["corrupt_journal_lines"] += 1
+                    continue
+                batch.setdefault(ride_id, {}).update(updates)
+        return batch
+
+    def __write_journal(self, batch):
+        # rewritten as a whole since it already holds every earlier failed batch
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w") as journal:
+            for ride_id, updates in batch.items():
+                entry = {field: value.isoformat() for field, value in updates.items()}
+                journal.write(json.dumps({"ride_id": ride_id, **entry}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def __clear_journal(self):
+        if self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
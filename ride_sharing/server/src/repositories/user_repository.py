@@ -1,22 +1,135 @@
+from src.cache.backend import CacheBackend
+from src.database.async_database import AsyncDatabaseObject
 from src.database.databaseObject import DatabaseObject
+from src.database.transaction import IntegrityViolation
+from src.utils.constants import BULK_INSERT_CHUNK
+
+GET_USER_QUERY = """select id, user_name, phone_number, country, email_id, is_active, user_role
+        from users where id=%s"""
+CREATE_USER_QUERY = """insert into users (user_name, phone_number, country, email_id, user_role) values (%s, %s,%s,%s,%s)"""
+
+
+def _registered_query(count):
+    placeholders = ", ".join(["%s"] * count)
+    return f"select id, country, phone_number from users where phone_number in ({placeholders})"
+
+
+def _registration_key(country, phone_number):
+    # the users unique key compares country case-insensitively in MySQL
+    return country.lower(), phone_number
+
+
+def _registered(rows):
+    return {
+        _registration_key(country, phone_number): id for id, country, phone_number in rows
+    }
 
 
 class UserRepository:
-    def __init__(self, db: DatabaseObject):
+    def __init__(self, db: DatabaseObject, cache: CacheBackend = None):
         self.db = db
+        self.cache = cache
+
+    def get_user(self, id):
+        def load():
+            rows = self.db.fetch_all(query=GET_USER_QUERY, params=(id,))
+            return rows[0] if rows else None
+
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_load(
+            ("user", id),
+            load,
+            tags=(f"user:{id}",),
+            owner=id,
+            lag_seconds=self.db.replica_lag_seconds(),
+        )
+
+    def __invalidate(self, id):
+        if self.cache is not None:
+            self.cache.invalidate_tags((f"user:{id}",))
 
     def create_user(self, user_name, phoneNumber, country, user_role, email_id=None):
-        query = """insert into users (user_name, phone_number, country, email_id, user_role) values (%s, %s,%s,%s,%s)"""
         print("type(user_role)", type(user_role))
         params = (user_name, phoneNumber, country, email_id, user_role)
-        self.db.execute(query=query, params=params)
+        user_id = self.db.execute(query=CREATE_USER_QUERY, params=params)
+        # a lookup of this id may have cached "no such user"
+        self.__invalidate(user_id)
+        return user_id
+
+    def create_users(self, rows, chunk_size=BULK_INSERT_CHUNK):
+        """
+        Insert many users, each row the CREATE_USER_QUERY params. Rows go in
+        `chunk_size` at a time, one executemany and one transaction per
+        chunk, so a failure only rolls back its own chunk and no transaction
+        holds locks for the whole batch.
+
+        Returns a user id per row, None where the (country, phone_number)
+        was already registered.
+        """
+        user_ids = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            try:
+                user_ids += self.__create_chunk(chunk)
+            except IntegrityViolation:
+                # a concurrent sign-up took a number between the check and
+                # the insert, the retry sees it as registered
+                user_ids += self.__create_chunk(chunk)
+        return user_ids
+
+    def __create_chunk(self, rows):
+        query = _registered_query(len(rows))
+        phone_numbers = [row[1] for row in rows]
+        with self.db.transaction() as tx:
+            taken = _registered(tx.fetch_all(query, phone_numbers))
+            keys = [_registration_key(row[2], row[1]) for row in rows]
+            fresh = [row for row, key in zip(rows, keys) if key not in taken]
+            if not fresh:
+                return [None] * len(rows)
+            tx.execute_many(CREATE_USER_QUERY, fresh)
+            registered = _registered(tx.fetch_all(query, phone_numbers))
+            user_ids = [None if key in taken else registered[key] for key in keys]
+            if self.cache is not None:
+                # lookups of these ids may have cached "no such user"
+                tags = [f"user:{user_id}" for user_id in user_ids if user_id is not None]
+                tx.after_commit(lambda: self.cache.invalidate_tags(tags))
+        return user_ids
 
     def delete_user(self, id):
         query = "delete from users where id=%s"
-        params = id
+        params = (id,)
         self.db.execute(query=query, params=params)
+        self.__invalidate(id)
 
     def update_user(self, field, value, id):
-        query = f"update table users set {field}=%s where id=%s"
+        query = f"update users set {field}=%s where id=%s"
         params = (value, id)
         self.db.execute(query=query, params=params)
+        self.__invalidate(id)
+
+
+class AsyncUserRepository:
+    """UserRepository for the asyncio serving mode, same queries and cache tags."""
+
+    def __init__(self, db: AsyncDatabaseObject, cache: CacheBackend = None):
+        self.db = db
+        self.cache = cache
+
+    async def get_user(self, id):
+        async def load():
+            rows = await self.db.fetch_all(query=GET_USER_QUERY, params=(id,))
+            return rows[0] if rows else None
+
+        if self.cache is None:
+            return await load()
+        return await self.cache.get_or_load_async(
+            ("user", id), load, tags=(f"user:{id}",), owner=id
+        )
+
+    async def create_user(self, user_name, phoneNumber, country, user_role, email_id=None):
+        params = (user_name, phoneNumber, country, email_id, user_role)
+        user_id = await self.db.execute(query=CREATE_USER_QUERY, params=params)
+        if self.cache is not None:
+            self.cache.invalidate_tags((f"user:{user_id}",))
+        return user_id
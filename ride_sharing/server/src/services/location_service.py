@@ -0,0 +1,112 @@
+import logging
+import threading
+
+from src.geo.driver_index import DriverLocationIndex
+from src.geo.location_store import LocationStore
+from src.geo.surge_heatmap import SurgeHeatmap
+from src.repositories.driver_location_repository import DriverLocationRepository
+
+log = logging.getLogger(__name__)
+
+
+class LocationService:
+    """
+    Takes bulk driver GPS pings into the in-memory LocationStore, moves
+    online drivers in the dispatch index once per batch, and persists only the
+    latest position of each moved driver every `persist_interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        location_repository: DriverLocationRepository,
+        driver_index: DriverLocationIndex,
+        surge: SurgeHeatmap = None,
+        persist_interval_seconds=5,
+        history_size=16,
+    ):
+        self.location_repository = location_repository
+        self.driver_index = driver_index
+        self.surge = surge
+        self.persist_interval_seconds = persist_interval_seconds
+        self.store = LocationStore(history_size=history_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._persisted = 0
+
+    def ingest(self, pings):
+        driver_ids, positions = self.store.ingest(pings)
+        # only drivers that went online through /drivers/<id>/location are dispatchable
+        driver_ids, positions = driver_ids.tolist(), positions.tolist()
+        self.driver_index.move_many(driver_ids, positions)
+        if self.surge is not None:
+            # pings count as supply heartbeats only while the driver is free
+            free = [
+                row
+                for row, driver_id in enumerate(driver_ids)
+                if self.driver_index.is_available(driver_id)
+            ]
+            self.surge.record_heartbeats(
+                [driver_ids[row] for row in free], [positions[row] for row in free]
+            )
+        return {
+            "data": {"accepted": len(pings), "drivers_moved": len(driver_ids)},
+            "message": "pings ingested",
+        }
+
+    def get_driver_location(self, driver_id):
+        latest = self.store.latest(driver_id)
+        if latest is None:
+            latest = self.location_repository.get_latest(driver_id)
+        if latest is None:
+            return None
+        return {
+            "data": {
+                "driver_id": driver_id,
+                "location": [latest[0], latest[1]],
+                "recorded_at": latest[2],
+            }
+        }
+
+    def persist(self):
+        driver_ids, latest = self.store.drain_dirty()
+        if not len(driver_ids):
+            return 0
+        rows = [
+            (driver_id, lat, lon, ts)
+            for driver_id, (lat, lon, ts) in zip(driver_ids.tolist(), latest.tolist())
+        ]
+        try:
+            self.location_repository.save_latest(rows)
+        except Exception:
+            # saved with the next persist, along with anything newer
+            self.store.mark_dirty(driver_ids)
+            raise
+        self._persisted += len(rows)
+        return len(rows)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self.__run, name="location-persister", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.persist()
+
+    def __run(self):
+        while not self._stop.wait(self.persist_interval_seconds):
+            try:
+                self.persist()
+            except Exception:
+                log.exception("persisting driver locations failed")
+
+    def stats(self):
+        stats = self.store.stats()
+        stats["persisted"] = self._persisted
+        return stats
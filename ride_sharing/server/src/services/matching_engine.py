@@ -0,0 +1,249 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from src.geo.driver_index import DriverLocationIndex
+from src.utils.assignment import min_cost_assignment
+
+PENDING = "pending"
+ASSIGNED = "assigned"
+UNMATCHED = "unmatched"
+
+log = logging.getLogger(__name__)
+
+
+class PendingRide:
+    __slots__ = ("ride_id", "vehicle_type", "location", "submitted_at", "windows")
+
+    def __init__(self, ride_id, vehicle_type, location):
+        self.ride_id = ride_id
+        self.vehicle_type = vehicle_type
+        self.location = location
+        self.submitted_at = time.perf_counter()
+        self.windows = 0
+
+
+class BatchMatcher:
+    """
+    Collects ride requests for `window_ms` and assigns drivers to the whole
+    batch at once, minimising the total pickup distance instead of greedily
+    giving each rider their own nearest driver.
+    """
+
+    def __init__(
+        self,
+        ride_repository,
+        driver_index: DriverLocationIndex,
+        window_ms=200,
+        candidates_per_ride=8,
+        max_windows=25,
+        max_tracked_rides=100_000,
+    ):
+        self.ride_repository = ride_repository
+        self.driver_index = driver_index
+        self.window_ms = window_ms
+        self.candidates_per_ride = candidates_per_ride
+        self.max_windows = max_windows
+        self.max_tracked_rides = max_tracked_rides
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._assignments = OrderedDict()  # ride_id -> assignment, oldest first
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "batches": 0,
+            "assigned": 0,
+            "unmatched": 0,
+            "last_batch_size": 0,
+            "total_solve_seconds": 0.0,
+            "total_wait_seconds": 0.0,
+        }
+
+    def submit(self, ride_id, vehicle_type, location):
+        with self._lock:
+            self._queue.append(PendingRide(ride_id, vehicle_type, location))
+            self.__track(ride_id, {"status": PENDING, "driver_id": None})
+
+    def assignment(self, ride_id):
+        with self._lock:
+            return self._assignments.get(ride_id)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+        return stats
+
+    def __track(self, ride_id, assignment):
+        self._assignments[ride_id] = assignment
+        self._assignments.move_to_end(ride_id)
+        while len(self._assignments) > self.max_tracked_rides:
+            self._assignments.popitem(last=False)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self.__run, name="batch-matcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        # hand out whatever was queued when we were asked to stop
+        self.run_once()
+
+    def __run(self):
+        while not self._stop.wait(self.window_ms / 1000):
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("batch matching failed")
+
+    def run_once(self):
+        with self._run_lock:
+            return self.__run_batch()
+
+    def __run_batch(self):
+        with self._lock:
+            batch, self._queue = list(self._queue), deque()
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        by_vehicle_type = {}
+        for pending in batch:
+            by_vehicle_type.setdefault(pending.vehicle_type, []).append(pending)
+
+        matched, leftover = [], []
+        for vehicle_type, rides in by_vehicle_type.items():
+            group_matched, group_leftover = self.__match(vehicle_type, rides)
+            matched += group_matched
+            leftover += group_leftover
+        solve_seconds = time.perf_counter() - started
+
+        if matched:
+            try:
+                lost = self.ride_repository.assign_drivers(
+                    [(pending.ride_id, driver_id) for pending, driver_id in matched]
+                )
+            except Exception:
+                for pending, driver_id in matched:
+                    self.driver_index.mark_available(driver_id)
+                leftover += [pending for pending, _ in matched]
+                matched = []
+            else:
+                # a booking took these drivers in the database first, they
+                # stay claimed here and their riders go to the next window
+                lost_rides = {ride_id for ride_id, _ in lost}
+                leftover += [pending for pending, _ in matched if pending.ride_id in lost_rides]
+                matched = [pair for pair in matched if pair[0].ride_id not in lost_rides]
+
+        finished = time.perf_counter()
+        for pending in leftover:
+            pending.windows += 1
+        retry = [pending for pending in leftover if pending.windows < self.max_windows]
+        gave_up = [pending for pending in leftover if pending.windows >= self.max_windows]
+        if gave_up:
+            # on the ride row, so other workers and later polls see it too
+            try:
+                self.ride_repository.mark_unmatched([pending.ride_id for pending in gave_up])
+            except Exception:
+                log.exception("marking rides unmatched failed, they wait another window")
+                retry += gave_up
+                gave_up = []
+
+        with self._lock:
+            for pending, driver_id in matched:
+                self.__track(
+                    pending.ride_id, {"status": ASSIGNED, "driver_id": driver_id}
+                )
+                self._stats["total_wait_seconds"] += finished - pending.submitted_at
+            for pending in gave_up:
+                self.__track(pending.ride_id, {"status": UNMATCHED, "driver_id": None})
+            self._stats["unmatched"] += len(gave_up)
+            # riders that already waited go first in the next window
+            retry.sort(key=lambda pending: pending.submitted_at)
+            self._queue.extendleft(reversed(retry))
+            self._stats["batches"] += 1
+            self._stats["assigned"] += len(matched)
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["total_solve_seconds"] += solve_seconds
+        return len(matched)
+
+    def __match(self, vehicle_type, rides):
+        candidate_lists = [
+            self.driver_index.nearest(
+                pending.location, vehicle_type, k=self.candidates_per_ride
+            )
+            for pending in rides
+        ]
+        matched, leftover = [], []
+        for rows in self.__independent_groups(candidate_lists):
+            group_matched, group_leftover = self.__solve(
+                [rides[row] for row in rows], [candidate_lists[row] for row in rows]
+            )
+            matched += group_matched
+            leftover += group_leftover
+        return matched, leftover
+
+    @staticmethod
+    def __independent_groups(candidate_lists):
+        """
+        Split riders into groups that share no candidate driver. Each group can
+        be solved on its own, which keeps the cost matrices small when riders
+        are spread over a city.
+        """
+        parent = list(range(len(candidate_lists)))
+
+        def find(row):
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        owner = {}  # driver_id -> first rider row that listed them
+        for row, candidates in enumerate(candidate_lists):
+            for _, driver_id in candidates:
+                other = owner.setdefault(driver_id, row)
+                parent[find(other)] = find(row)
+
+        groups = {}
+        for row in range(len(candidate_lists)):
+            groups.setdefault(find(row), []).append(row)
+        return list(groups.values())
+
+    def __solve(self, rides, candidate_lists):
+        columns = {}  # driver_id -> column in the cost matrix
+        for candidates in candidate_lists:
+            for _, driver_id in candidates:
+                columns.setdefault(driver_id, len(columns))
+        if not columns:
+            return [], rides
+
+        # pairs outside each rider's candidate list are effectively forbidden
+        cost = np.full((len(rides), len(columns)), np.inf)
+        for row, candidates in enumerate(candidate_lists):
+            for distance, driver_id in candidates:
+                cost[row, columns[driver_id]] = distance
+        forbidden = np.isinf(cost)
+        cost[forbidden] = (cost[~forbidden].max() + 1) * (len(rides) + 1)
+
+        driver_ids = list(columns)
+        matched, assigned_rows = [], set()
+        for row, col in min_cost_assignment(cost):
+            driver_id = driver_ids[col]
+            # a greedy booking may have taken the driver since we looked
+            if forbidden[row, col] or not self.driver_index.claim(driver_id):
+                continue
+            matched.append((rides[row], driver_id))
+            assigned_rows.add(row)
+        leftover = [ride for row, ride in enumerate(rides) if row not in assigned_rows]
+        return matched, leftover
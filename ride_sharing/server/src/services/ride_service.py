@@ -1,62 +1,430 @@
+import asyncio
+import os
 from datetime import datetime
 
+import numpy as np
+
+from src.cache.backend import CacheBackend
+from src.cache.lru_cache import get_default_cache
+from src.database.async_database import AsyncDatabaseObject
 from src.database.databaseObject import DatabaseObject
+from src.geo.driver_index import DriverLocationIndex, NoDriverAvailable
+from src.geo.routing import RoutingEngine, get_default_router
+from src.geo.surge_heatmap import SurgeHeatmap
 from src.models.ride import Ride
-from src.repositories.ride_repository import RideRepository
-from src.utils.constants import PAGE_LIMIT
+from src.repositories.driver_repository import AsyncDriverRepository, DriverRepository
+from src.repositories.ride_repository import AsyncRideRepository, RideRepository
+from src.repositories.ride_summary_repository import SUMMARY_FIELDS
+from src.repositories.ride_update_buffer import RideUpdateBuffer
+from src.services.matching_engine import ASSIGNED, PENDING, UNMATCHED, BatchMatcher
+from src.utils.constants import BOOKING_CANDIDATES, PAGE_LIMIT, UserRole, VehicleType
+from src.utils.exporters import csv_lines, ndjson_lines
+from src.utils.fare_calculator import quote_fares, trip_distances
+from src.utils.pagination import decode_cursor, encode_cursor
+
+
+HISTORY_FORMAT = (
+    "ride_id",
+    "source_location",
+    "destination_location",
+    "fare",
+    "driver_name",
+)
 
 
 class RideService:
-    def __init__(self):
-        self.db = DatabaseObject()
-        self.ride_repository = RideRepository()
+    def __init__(
+        self,
+        db: DatabaseObject = None,
+        cache: CacheBackend = None,
+        router: RoutingEngine = None,
+    ):
+        self.db = db or DatabaseObject()
+        self.ride_repository = RideRepository(
+            self.db, cache=cache or get_default_cache()
+        )
+        self.driver_repository = DriverRepository(self.db)
+        self.driver_index = DriverLocationIndex()
+        self.router = router or get_default_router()
+        # demand vs supply per area over the last few minutes, read on every fare
+        self.surge = SurgeHeatmap(
+            window_seconds=int(os.environ.get("SURGE_WINDOW_SECONDS", 300)),
+            max_multiplier=float(os.environ.get("SURGE_MAX_MULTIPLIER", 3.0)),
+        )
+        # a non-zero window switches bookings to batched driver matching
+        self.matching_window_ms = int(os.environ.get("RIDE_MATCHING_WINDOW_MS", 0))
+        self.matcher = None
+        if self.matching_window_ms:
+            self.matcher = BatchMatcher(
+                self.ride_repository,
+                self.driver_index,
+                window_ms=self.matching_window_ms,
+            )
+            self.matcher.start()
+        # ride start/end times are written behind unless the interval is 0
+        self.ride_updates = None
+        flush_interval_ms = int(os.environ.get("RIDE_UPDATE_FLUSH_MS", 100))
+        if flush_interval_ms:
+            self.ride_updates = RideUpdateBuffer(
+                self.ride_repository,
+                max_batch_size=int(os.environ.get("RIDE_UPDATE_BATCH_SIZE", 500)),
+                flush_interval_ms=flush_interval_ms,
+                journal_path=os.environ.get(
+                    "RIDE_UPDATE_JOURNAL", "ride_updates.{pid}.journal"
+                ),
+            )
+            self.ride_updates.start()
 
-    def create_ride(self, data):
-        ride = Ride(
+    # The steps below hold no I/O: AsyncRideService runs the same ones
+    # around awaited repository calls, so both serving modes share them.
+
+    def availability_update(self, driver_id, data):
+        """(driver_id, vehicle_type, available) to store, or None if unchanged."""
+        available = bool(data.get("available", True))
+        # the database only hears about availability changes, not every move
+        if (
+            self.driver_index.location_of(driver_id) is None
+            or self.driver_index.is_available(driver_id) != available
+        ):
+            return driver_id, data.get("vehicle_type", VehicleType.CAR.value), available
+        return None
+
+    def apply_driver_location(self, driver_id, data):
+        available = bool(data.get("available", True))
+        vehicle_type = data.get("vehicle_type", VehicleType.CAR.value)
+        self.driver_index.upsert(
+            driver_id, vehicle_type, data["location"], available=available
+        )
+        if available:
+            self.surge.record_heartbeat(driver_id, data["location"])
+        else:
+            self.surge.remove_driver(driver_id)
+        return {"message": f"driver {driver_id} location updated"}
+
+    def prepare_ride(self, data):
+        self.surge.record_request(data["source_location"])
+        return Ride(
             rider_id=data["user_id"],
+            type=data.get("vehicle_type", VehicleType.CAR.value),
             source_location=data["source_location"],
             destination_location=data["destination_location"],
+            driver_index=self.driver_index,
+            # the booking transaction or the matcher picks the driver
+            assign_driver=False,
+            surge_multiplier=self.surge.multiplier(data["source_location"]),
+            router=self.router,
         )
-        ride_id = self.ride_repository.create_ride(
-            rider_id=ride.rider_id,
-            driver_id=ride.driver_id,
-            source_location=ride.source_location,
-            fare=ride.fare,
-            destination_location=ride.destination_location,
-        )
+
+    def booking_candidates(self, ride: Ride):
+        candidates = [
+            driver_id
+            for _, driver_id in self.driver_index.nearest(
+                ride.source_location, ride.vehicle_type, k=BOOKING_CANDIDATES
+            )
+        ]
+        if not candidates:
+            raise NoDriverAvailable(
+                f"no available driver for vehicle type {ride.vehicle_type}"
+            )
+        return candidates
+
+    def ride_booked(self, ride: Ride, ride_id, driver_id):
+        ride.driver_id = driver_id
+        self.driver_index.claim(driver_id)
+        self.surge.remove_driver(driver_id)
         return {
-            "data": {"ride_id": ride_id},
+            "data": {"ride_id": ride_id, "surge_multiplier": ride.surge_multiplier},
             "message": "Your Ride is successfully booked, your ride is on the way",
         }
 
+    def ride_pending(self, ride: Ride, ride_id):
+        self.matcher.submit(ride_id, ride.vehicle_type, ride.source_location)
+        return {
+            "data": {
+                "ride_id": ride_id,
+                "status": PENDING,
+                "surge_multiplier": ride.surge_multiplier,
+            },
+            "message": "Your Ride is booked, we are finding a driver for you",
+        }
+
+    def assignment_response(self, ride_id, assignment=None, driver_id=None, unmatched=False):
+        if assignment is None:
+            status = PENDING
+            if driver_id is not None:
+                status = ASSIGNED
+            elif unmatched:
+                status = UNMATCHED
+            assignment = {"status": status, "driver_id": driver_id}
+        return {"data": {"ride_id": ride_id, **assignment}}
+
+    @staticmethod
+    def history_page(user_id, page_num=None, cursor=None):
+        """Keyword arguments for RideRepository.get_ride_history."""
+        if page_num is not None:
+            # offset paging, kept for older clients
+            return {"limit": PAGE_LIMIT + 1, "offset": PAGE_LIMIT * (page_num - 1)}
+        before_ride_id = decode_cursor(cursor, user_id) if cursor else None
+        return {"limit": PAGE_LIMIT + 1, "before_ride_id": before_ride_id}
+
+    @staticmethod
+    def history_response(user_id, ride_history):
+        # one extra row tells us whether another page exists
+        next_cursor = None
+        if len(ride_history) > PAGE_LIMIT:
+            ride_history = ride_history[:PAGE_LIMIT]
+            next_cursor = encode_cursor(user_id, ride_history[-1][0])
+
+        return {
+            "data": {
+                "format": list(HISTORY_FORMAT),
+                # locations as [lat, lon] pairs, the way bookings send them
+                "rides": [
+                    [row[0], [row[1], row[2]], [row[3], row[4]], row[5], row[6]]
+                    for row in ride_history
+                ],
+                "next_cursor": next_cursor,
+            },
+            "message": "ride history fetched successfully",
+        }
+
+    def update_driver_location(self, driver_id, data):
+        update = self.availability_update(driver_id, data)
+        if update is not None:
+            self.driver_repository.set_availability(*update)
+        return self.apply_driver_location(driver_id, data)
+
+    def driver_offline(self, driver_id):
+        self.driver_repository.mark_unavailable([driver_id])
+        return self.forget_driver(driver_id)
+
+    def forget_driver(self, driver_id):
+        self.driver_index.remove(driver_id)
+        self.surge.remove_driver(driver_id)
+        return {"message": f"driver {driver_id} is offline"}
+
+    def create_ride(self, data):
+        ride = self.prepare_ride(data)
+        if self.matcher is not None:
+            ride_id = self.ride_repository.create_ride(
+                rider_id=ride.rider_id,
+                driver_id=None,
+                source_location=ride.source_location,
+                fare=ride.fare,
+                destination_location=ride.destination_location,
+            )
+            return self.ride_pending(ride, ride_id)
+
+        candidates = self.booking_candidates(ride)
+        # lock the nearest still-available driver and insert the ride in one
+        # transaction, so concurrent bookings, in this process or another,
+        # can never share a driver
+        with self.db.transaction() as tx:
+            driver_id = self.driver_repository.claim_first_available(candidates, tx)
+            if driver_id is None:
+                raise NoDriverAvailable("every nearby driver was just booked")
+            ride_id = self.ride_repository.create_ride(
+                rider_id=ride.rider_id,
+                driver_id=driver_id,
+                source_location=ride.source_location,
+                fare=ride.fare,
+                destination_location=ride.destination_location,
+                tx=tx,
+            )
+        return self.ride_booked(ride, ride_id, driver_id)
+
+    def get_ride_assignment(self, ride_id):
+        assignment = self.matcher.assignment(ride_id) if self.matcher else None
+        if assignment is not None:
+            return self.assignment_response(ride_id, assignment)
+        # matched by another worker, or forgotten here since
+        driver_id, unmatched = self.ride_repository.get_match(ride_id)
+        return self.assignment_response(ride_id, None, driver_id, unmatched)
+
+    def get_quotes(self, data):
+        distances = trip_distances(
+            data["sources"], data["destinations"], self.router
+        )
+        surge_multipliers = self.surge.multipliers(data["sources"])
+        vehicle_types = data.get("vehicle_types")
+        if vehicle_types is None:
+            vehicle_types = [vehicle_type.value for vehicle_type in VehicleType]
+            fares = quote_fares(
+                distances[:, np.newaxis],
+                [vehicle_types],
+                surge_multipliers[:, np.newaxis],
+            )
+        else:
+            fares = quote_fares(distances, vehicle_types, surge_multipliers)
+        return {
+            "data": {"vehicle_types": vehicle_types, "fares": fares.tolist()},
+            "message": "fares quoted successfully",
+        }
+
+    def ride_time_update(self, field, ride_id):
+        """
+        Buffer a ride start or end time, or without a buffer return the
+        (ride_id, start_time, end_time) row to write now.
+        """
+        now = datetime.now()
+        if self.ride_updates is not None:
+            self.ride_updates.record(ride_id, field, now)
+            return None
+        # the same write the buffer flushes, so summaries see the ride end
+        start_time, end_time = (now, None) if field == "ride_start_time" else (None, now)
+        return ride_id, start_time, end_time
+
+    def __update_ride_time(self, field, ride_id):
+        update = self.ride_time_update(field, ride_id)
+        if update is not None:
+            self.ride_repository.update_ride_times([update])
+
     def update_ride_start_time(self, ride_id):
-        self.ride_repository.update_ride("ride_start_time", datetime.now(), ride_id)
+        self.__update_ride_time("ride_start_time", ride_id)
         return {"message": "ride started"}
 
     def update_ride_end_time(self, ride_id):
-        self.ride_repository.update_ride("ride_end_time", datetime.now(), ride_id)
+        self.__update_ride_time("ride_end_time", ride_id)
+        driver_id = self.ride_repository.get_driver_id(ride_id)
+        if driver_id is not None:
+            self.driver_repository.release(driver_id)
+            self.driver_index.mark_available(driver_id)
         return {"message": "ride ended"}
 
-    def get_all_rides(self, user_id, page_num=1):
-        range_start = PAGE_LIMIT * (page_num - 1)
-        range_end = PAGE_LIMIT * page_num
-
-        query = f"select ride_id, source_location, destination_location, fare, users.user_name from rides join users on rides.driver_id = users.id where user_id=%s LIMIT {range_end} OFFSET {range_start}"
-
-        params = user_id
+    def export_rides(self, export_format, user_id=None, booked_from=None, booked_to=None):
+        """Stream matching rides as NDJSON or CSV text chunks."""
+        fields = (
+            "ride_id",
+            "user_id",
+            "driver_id",
+            "source_lat",
+            "source_lon",
+            "destination_lat",
+            "destination_lon",
+            "fare",
+            "ride_booking_time",
+            "ride_start_time",
+            "ride_end_time",
+        )
+        rows = self.ride_repository.stream_rides(user_id, booked_from, booked_to)
+        if export_format == "csv":
+            return csv_lines(fields, rows)
+        return ndjson_lines(fields, rows)
 
-        ride_history = self.db.fetch_all(query=query, params=params)
+    def get_all_rides(self, user_id, page_num=None, cursor=None):
+        ride_history = self.ride_repository.get_ride_history(
+            user_id, **self.history_page(user_id, page_num, cursor)
+        )
+        return self.history_response(user_id, ride_history)
 
+    def get_ride_summary(self, user_id):
+        rows = self.ride_repository.summaries.get_summary(user_id)
+        by_role = {row[0]: dict(zip(SUMMARY_FIELDS, row[1:])) for row in rows}
+        empty = dict.fromkeys(SUMMARY_FIELDS, 0) | {
+            "last_ride_id": None,
+            "last_completed_at": None,
+        }
         return {
             "data": {
-                "format": [
-                    "ride_id",
-                    "source_location",
-                    "destination_location",
-                    "fare",
-                    "driver_name",
-                ],
-                "rides": ride_history,
+                "user_id": user_id,
+                "rider": by_role.get(UserRole.RIDER.value, empty),
+                "driver": by_role.get(UserRole.DRIVER.value, empty),
             },
-            "message": "ride history fetched successfully",
+            "message": "ride summary fetched successfully",
         }
+
+
+class AsyncRideService:
+    """
+    RideService for the asyncio serving mode. The in-memory state (driver
+    index, surge heatmap, router, matcher) and every decision come from the
+    wrapped RideService; only the database calls differ, awaited through the
+    async repositories.
+    """
+
+    def __init__(
+        self,
+        ride_service: RideService,
+        db: AsyncDatabaseObject = None,
+        cache: CacheBackend = None,
+    ):
+        self.ride_service = ride_service
+        self.db = db or AsyncDatabaseObject()
+        self.ride_repository = AsyncRideRepository(
+            self.db, cache=cache or get_default_cache()
+        )
+        self.driver_repository = AsyncDriverRepository(self.db)
+
+    async def update_driver_location(self, driver_id, data):
+        update = self.ride_service.availability_update(driver_id, data)
+        if update is not None:
+            await self.driver_repository.set_availability(*update)
+        return self.ride_service.apply_driver_location(driver_id, data)
+
+    async def driver_offline(self, driver_id):
+        await self.driver_repository.mark_unavailable([driver_id])
+        return self.ride_service.forget_driver(driver_id)
+
+    async def __update_ride_time(self, field, ride_id):
+        update = self.ride_service.ride_time_update(field, ride_id)
+        if update is not None:
+            await self.ride_repository.update_ride_times([update])
+
+    async def update_ride_start_time(self, ride_id):
+        await self.__update_ride_time("ride_start_time", ride_id)
+        return {"message": "ride started"}
+
+    async def update_ride_end_time(self, ride_id):
+        await self.__update_ride_time("ride_end_time", ride_id)
+        driver_id = await self.ride_repository.get_driver_id(ride_id)
+        if driver_id is not None:
+            await self.driver_repository.release(driver_id)
+            self.ride_service.driver_index.mark_available(driver_id)
+        return {"message": "ride ended"}
+
+    async def create_ride(self, data):
+        service = self.ride_service
+        # pricing routes the trip, CPU work like quoting
+        ride = await asyncio.to_thread(service.prepare_ride, data)
+        if service.matcher is not None:
+            ride_id = await self.ride_repository.create_ride(
+                rider_id=ride.rider_id,
+                driver_id=None,
+                source_location=ride.source_location,
+                fare=ride.fare,
+                destination_location=ride.destination_location,
+            )
+            return service.ride_pending(ride, ride_id)
+
+        candidates = service.booking_candidates(ride)
+        async with self.db.transaction() as tx:
+            driver_id = await self.driver_repository.claim_first_available(candidates, tx)
+            if driver_id is None:
+                raise NoDriverAvailable("every nearby driver was just booked")
+            ride_id = await self.ride_repository.create_ride(
+                rider_id=ride.rider_id,
+                driver_id=driver_id,
+                source_location=ride.source_location,
+                fare=ride.fare,
+                destination_location=ride.destination_location,
+                tx=tx,
+            )
+        return service.ride_booked(ride, ride_id, driver_id)
+
+    async def get_ride_assignment(self, ride_id):
+        matcher = self.ride_service.matcher
+        assignment = matcher.assignment(ride_id) if matcher else None
+        if assignment is not None:
+            return self.ride_service.assignment_response(ride_id, assignment)
+        driver_id, unmatched = await self.ride_repository.get_match(ride_id)
+        return self.ride_service.assignment_response(ride_id, None, driver_id, unmatched)
+
+    async def get_quotes(self, data):
+        # routing a large batch is CPU work, keep it off the event loop
+        return await asyncio.to_thread(self.ride_service.get_quotes, data)
+
+    async def get_all_rides(self, user_id, page_num=None, cursor=None):
+        ride_history = await self.ride_repository.get_ride_history(
+            user_id, **RideService.history_page(user_id, page_num, cursor)
+        )
+        return RideService.history_response(user_id, ride_history)
@@ -1,23 +1,107 @@
+from src.cache.backend import CacheBackend
+from src.cache.lru_cache import get_default_cache
+from src.database.async_database import AsyncDatabaseObject
 from src.database.databaseObject import DatabaseObject
-from src.repositories.user_repository import UserRepository
+from src.repositories.user_repository import AsyncUserRepository, UserRepository
 from src.utils.constants import UserRole
+from src.utils.validators import Field, compile_schema
+
+USER_FIELDS = (
+    "id",
+    "user_name",
+    "phone_number",
+    "country",
+    "email_id",
+    "is_active",
+    "user_role",
+)
+
+# a sign-up record, sized to the users table columns
+validate_new_user = compile_schema(
+    {
+        "user_name": Field(str, max_length=16),
+        "phone_number": Field(int),
+        "country": Field(str, max_length=50),
+        "email": Field(str, required=False, max_length=40, pattern=r"[^@\s]+@[^@\s]+"),
+    }
+)
 
 
 class UserService:
-    def __init__(self):
-        self.db = DatabaseObject()
-        self.user_repository = UserRepository(self.db)
+    def __init__(self, db: DatabaseObject = None, cache: CacheBackend = None):
+        self.db = db or DatabaseObject()
+        self.user_repository = UserRepository(
+            self.db, cache=cache or get_default_cache()
+        )
 
-    def create_user(self, data):
-        user_name = data["user_name"]
-        phone_number = data["phone_number"]
-        country = data["country"]
-        email = data.get("email", None)
+    # the steps below hold no I/O, AsyncUserService runs them too
+
+    @staticmethod
+    def user_response(user):
+        if user is None:
+            return None
+        return {
+            "data": dict(zip(USER_FIELDS, user)),
+            "message": "user fetched successfully",
+        }
 
-        self.user_repository.create_user(
-            user_name, phone_number, country, UserRole.RIDER.value, email
+    @staticmethod
+    def new_user(data):
+        """Arguments for UserRepository.create_user from a sign-up request."""
+        return (
+            data["user_name"],
+            data["phone_number"],
+            data["country"],
+            UserRole.RIDER.value,
+            data.get("email", None),
         )
-        return {"message": f"user {user_name} created successfully"}
+
+    @staticmethod
+    def user_created_response(data):
+        return {"message": f"user {data['user_name']} created successfully"}
+
+    def get_user(self, user_id):
+        return self.user_response(self.user_repository.get_user(user_id))
+
+    def create_user(self, data):
+        self.user_repository.create_user(*self.new_user(data))
+        return self.user_created_response(data)
+
+    def create_users(self, records, user_role=UserRole.RIDER):
+        """
+        Sign up a batch of users with `user_role`. Every record is validated
+        before anything is written; invalid records, phone numbers repeated
+        within the batch and numbers already registered are reported by
+        index and the rest are created.
+        """
+        rows, indexes, errors, seen = [], [], [], set()
+        for index, record in enumerate(records):
+            values, problems = validate_new_user(record)
+            if not problems:
+                key = (values[2].lower(), values[1])
+                if key in seen:
+                    problems = {"phone_number": "is repeated in this request"}
+                seen.add(key)
+            if problems:
+                errors.append({"index": index, "errors": problems})
+                continue
+            user_name, phone_number, country, email = values
+            rows.append((user_name, phone_number, country, email, user_role.value))
+            indexes.append(index)
+
+        user_ids = [None] * len(records)
+        for index, user_id in zip(indexes, self.user_repository.create_users(rows)):
+            if user_id is None:
+                errors.append(
+                    {"index": index, "errors": {"phone_number": "is already registered"}}
+                )
+            user_ids[index] = user_id
+        errors.sort(key=lambda error: error["index"])
+        created = len(records) - len(errors)
+        return {
+            "data": {"created": created, "user_ids": user_ids, "errors": errors},
+            "message": f"{created} users created successfully",
+        }
 
     def block_user(self, user_id):
         self.user_repository.update_user("is_active", 0, user_id)
@@ -26,3 +110,20 @@ class UserService:
     def update_to_driver(self, user_id):
         self.user_repository.update_user("user_role", UserRole.DRIVER.value, user_id)
         return {"message": f"user role updated successfully"}
+
+
+class AsyncUserService:
+    """UserService for the asyncio serving mode, I/O awaited through async repositories."""
+
+    def __init__(self, db: AsyncDatabaseObject = None, cache: CacheBackend = None):
+        self.db = db or AsyncDatabaseObject()
+        self.user_repository = AsyncUserRepository(
+            self.db, cache=cache or get_default_cache()
+        )
+
+    async def get_user(self, user_id):
+        return UserService.user_response(await self.user_repository.get_user(user_id))
+
+    async def create_user(self, data):
+        await self.user_repository.create_user(*UserService.new_user(data))
+        return UserService.user_created_response(data)
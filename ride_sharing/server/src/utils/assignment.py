@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def min_cost_assignment(cost):
+    """
+    Solve the rectangular assignment problem with the Hungarian algorithm.
+
+    Returns (row, col) pairs matching every row (or every column, when there
+    are more rows than columns) so that the summed cost is minimal.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return []
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    # potentials and matching are 1-indexed, column 0 is a virtual start
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        match[0] = row
+        col = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current_row = match[col]
+            free = ~used[1:]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            improved = free & (reduced < min_reduced[1:])
+            min_reduced[1:][improved] = reduced[improved]
+            way[1:][improved] = col
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_col = int(candidates.argmin()) + 1
+            delta = candidates[next_col - 1]
+            u[match[used]] += delta
+            v[used] -= delta
+            min_reduced[1:][free] -= delta
+            col = next_col
+            if match[col] == 0:
+                break
+        # augment along the alternating path back to the virtual column
+        while col:
+            previous = way[col]
+            match[col] = match[previous]
+            col = previous
+
+    pairs = [(int(match[col]) - 1, col - 1) for col in range(1, m + 1) if match[col]]
+    if transposed:
+        pairs = [(col, row) for row, col in pairs]
+    return sorted(pairs)
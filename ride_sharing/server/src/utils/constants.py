@@ -13,3 +13,28 @@ class VehicleType(Enum):
 
 
 PAGE_LIMIT = 10
+
+MINIMUM_BOOKING_FARE = 10
+FARE_PER_DISTANCE = {
+    VehicleType.CAR.value: 4,
+    VehicleType.AUTO.value: 3,
+    VehicleType.BIKE.value: 2,
+}
+MAX_QUOTES_PER_REQUEST = 10000
+# trips a quote request routes over the road graph, bigger batches go great-circle
+MAX_ROUTED_QUOTES = 20
+MAX_PINGS_PER_REQUEST = 50000
+# nearest drivers a booking tries to lock, closest first
+BOOKING_CANDIDATES = 8
+# requests per second and burst per client address, override with RATE_LIMITS;
+# loose, since many riders can share one address behind a NAT or proxy
+RATE_LIMITS = {
+    "/api/v1/ride/create_ride": (20.0, 50),
+    "/api/v1/ride/quotes": (100.0, 200),
+    "/api/v1/users": (5.0, 20),
+    "/api/v1/users/bulk": (1.0, 5),
+    "/api/v1/drivers/bulk": (1.0, 5),
+}
+MAX_USERS_PER_REQUEST = 10000
+# rows per executemany and transaction in bulk onboarding
+BULK_INSERT_CHUNK = 1000
@@ -0,0 +1,40 @@
+import csv
+import io
+import json
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _chunks(lines, rows_per_chunk):
+    # join a few hundred rows per write instead of one tiny write per row
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= rows_per_chunk:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def ndjson_lines(fields, rows, rows_per_chunk=500):
+    # one encoder for the whole export, json.dumps(default=...) builds one per row
+    encode = json.JSONEncoder(default=str, separators=(",", ":")).encode
+    lines = (encode(dict(zip(fields, row))) + "\n" for row in rows)
+    return _chunks(lines, rows_per_chunk)
+
+
+def csv_lines(fields, rows, rows_per_chunk=500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(row):
+        writer.writerow(row)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    lines = (render(row) for row in rows)
+    yield render(fields)
+    yield from _chunks(lines, rows_per_chunk)
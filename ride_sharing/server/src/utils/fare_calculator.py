@@ -0,0 +1,81 @@
+import numpy as np
+
+from src.utils.constants import (
+    FARE_PER_DISTANCE,
+    MAX_ROUTED_QUOTES,
+    MINIMUM_BOOKING_FARE,
+)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class UnknownVehicleType(ValueError):
+    pass
+
+
+# rate lookup table indexed by VehicleType value, NaN marks unknown types
+_RATES = np.full(max(FARE_PER_DISTANCE) + 1, np.nan)
+for _vehicle_type, _rate in FARE_PER_DISTANCE.items():
+    _RATES[_vehicle_type] = _rate
+
+
+def as_points(locations):
+    points = np.asarray(locations, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("locations must be a sequence of [x, y] pairs")
+    return points
+
+
+def great_circle_distances(sources, destinations):
+    """Haversine distance in km between [lat, lon] points, trip by trip."""
+    sources, destinations = as_points(sources), as_points(destinations)
+    if sources.shape != destinations.shape:
+        raise ValueError("sources and destinations must have the same length")
+    lat1, lon1 = np.radians(sources).T
+    lat2, lon2 = np.radians(destinations).T
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def trip_distances(sources, destinations, router=None, max_routed=MAX_ROUTED_QUOTES):
+    """
+    Distance in km for each trip: along the roads when a routing engine is
+    configured, else great-circle. Every trip is a separate route search, so
+    batches of more than `max_routed` trips are all quoted great-circle.
+    """
+    sources, destinations = as_points(sources), as_points(destinations)
+    if router is None or len(sources) > max_routed:
+        return great_circle_distances(sources, destinations)
+    if sources.shape != destinations.shape:
+        raise ValueError("sources and destinations must have the same length")
+    return router.distances(sources.tolist(), destinations.tolist())
+
+
+def quote_fares(distances, vehicle_types, surge_multipliers=1.0):
+    """
+    Fare for each trip distance. `vehicle_types` is an array of VehicleType
+    values, or anything that broadcasts against `distances` (a single value,
+    or a row of types to quote every trip for each of them). Surge
+    multipliers broadcast the same way and scale the whole fare.
+    """
+    distances, vehicle_types = np.broadcast_arrays(
+        np.asarray(distances, dtype=np.float64),
+        np.asarray(vehicle_types, dtype=np.int64),
+    )
+    known = (vehicle_types >= 0) & (vehicle_types < len(_RATES))
+    rates = _RATES[np.where(known, vehicle_types, 0)]
+    unknown = ~known | np.isnan(rates)
+    if unknown.any():
+        raise UnknownVehicleType(
+            f"unknow vehicle type {vehicle_types[unknown][0]}"
+        )
+    return (MINIMUM_BOOKING_FARE + distances * rates) * surge_multipliers
+
+
+def quote_trip_fares(sources, destinations, vehicle_types, surge_multipliers=1.0):
+    return quote_fares(
+        great_circle_distances(sources, destinations), vehicle_types, surge_multipliers
+    )
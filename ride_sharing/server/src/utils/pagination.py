@@ -0,0 +1,24 @@
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(user_id, last_ride_id):
+    payload = json.dumps({"u": int(user_id), "r": int(last_ride_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, user_id):
+    """Return the ride id to seek past, rejecting cursors of another user."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_user_id, last_ride_id = int(payload["u"]), int(payload["r"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(f"invalid cursor {cursor}")
+    if cursor_user_id != int(user_id):
+        raise InvalidCursor("cursor belongs to another user")
+    return last_ride_id
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # optional, history is served as JSON only without it
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def history_mimetypes():
+    """Response types ride history can be served in, preferred first."""
+    if msgpack is None:
+        return [JSON_MIMETYPE]
+    return [JSON_MIMETYPE, *MSGPACK_MIMETYPES]
+
+
+def negotiate(accept, offered):
+    """Best of `offered` for a parsed Accept header (werkzeug MIMEAccept), JSON by default."""
+    return accept.best_match(offered, default=JSON_MIMETYPE) or JSON_MIMETYPE
+
+
+def compact_json(payload):
+    return json.dumps(payload, separators=(",", ":"), default=str).encode()
+
+
+def history_msgpack(response):
+    """
+    A ride history response as MessagePack with typed columns: numbers go
+    as little-endian arrays (`dtype` and `shape` say how to read `data`),
+    so a client maps them straight into typed arrays instead of decoding
+    a value per cell.
+    """
+    data = response["data"]
+    rides = data["rides"]
+    count = len(rides)
+    locations = np.array([ride[1] + ride[2] for ride in rides], dtype=np.float64)
+    microdegrees = np.rint(locations.reshape(count, 4) * 1e6).astype("<i4")
+    columns = {
+        "ride_id": _column(np.fromiter((ride[0] for ride in rides), "<i4", count)),
+        "source_location": _column(microdegrees[:, :2], scale=1e-6),
+        "destination_location": _column(microdegrees[:, 2:], scale=1e-6),
+        "fare": _column(np.fromiter((ride[3] for ride in rides), "<f8", count)),
+        "driver_name": [ride[4] for ride in rides],
+    }
+    return msgpack.packb(
+        {
+            "data": {
+                "format": data["format"],
+                "count": count,
+                "columns": columns,
+                "next_cursor": data["next_cursor"],
+            },
+            "message": response["message"],
+        },
+        use_bin_type=True,
+    )
+
+
+def _column(values, scale=None):
+    column = {
+        "dtype": values.dtype.str,
+        "shape": list(values.shape),
+        "data": np.ascontiguousarray(values).tobytes(),
+    }
+    if scale is not None:
+        column["scale"] = scale
+    return column
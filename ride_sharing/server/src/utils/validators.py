@@ -1,11 +1,120 @@
+import re
+
+from src.utils.constants import VehicleType
+
+_VEHICLE_TYPES = frozenset(vehicle_type.value for vehicle_type in VehicleType)
+
+
 def validate_request_body(data, fields):
+    if not isinstance(data, dict):
+        return False
     for field in fields:
-        if not ((field in data) or (data[field] is None)):
+        if field not in data or data[field] is None:
             return False
     return True
 
 
 def validate_location(location):
+    """A [lat, lon] pair of numbers within the valid coordinate ranges."""
     if not isinstance(location, list) or len(location) != 2:
         return False
-    return all(isinstance(coord, (int, float)) for coord in location)
+    if not all(
+        isinstance(coord, (int, float)) and not isinstance(coord, bool) for coord in location
+    ):
+        return False
+    lat, lon = location
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def validate_vehicle_type(vehicle_type):
+    return (
+        isinstance(vehicle_type, int)
+        and not isinstance(vehicle_type, bool)
+        and vehicle_type in _VEHICLE_TYPES
+    )
+
+
+def validate_trip_batch(sources, destinations, max_size):
+    """Equal length lists of at most `max_size` sources and destinations."""
+    return (
+        isinstance(sources, list)
+        and isinstance(destinations, list)
+        and len(sources) == len(destinations)
+        and len(sources) <= max_size
+    )
+
+
+class Field:
+    """
+    Rules for one field of a record: `kind` is str or int (an int may also
+    come as a string of digits), strings must be non-empty and at most
+    `max_length` long and match `pattern` if given.
+    """
+
+    def __init__(self, kind, required=True, max_length=None, pattern=None):
+        self.kind = kind
+        self.required = required
+        self.max_length = max_length
+        self.pattern = re.compile(pattern) if pattern else None
+
+
+def compile_schema(fields):
+    """
+    Build a validator for records with `fields` (name -> Field) up front, so
+    checking a batch of records runs one closure per field instead of
+    interpreting the rules again for every record.
+
+    The validator takes a record and returns its values in field order and
+    a dict of field -> problem, empty when the record is valid.
+    """
+    checks = tuple((name, _compile_field(field)) for name, field in fields.items())
+
+    def validate(record):
+        if not isinstance(record, dict):
+            return None, {"record": "must be an object"}
+        values, errors = [], {}
+        for name, check in checks:
+            value, error = check(record.get(name))
+            if error is not None:
+                errors[name] = error
+            values.append(value)
+        return tuple(values), errors
+
+    return validate
+
+
+def _compile_field(field):
+    required = field.required
+    if field.kind is int:
+        convert = _to_int
+    else:
+        convert = _string_check(field.max_length, field.pattern)
+
+    def check(value):
+        if value is None:
+            return None, ("is required" if required else None)
+        return convert(value)
+
+    return check
+
+
+def _to_int(value):
+    # bool is an int subclass, but True is not a phone number
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value, None
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value), None
+    return None, "must be a number"
+
+
+def _string_check(max_length, pattern):
+    def check(value):
+        if not isinstance(value, str) or not value:
+            return None, "must be a non-empty string"
+        if max_length is not None and len(value) > max_length:
+            return None, f"must be at most {max_length} characters"
+        if pattern is not None and pattern.fullmatch(value) is None:
+            return None, "is not valid"
+        return value, None
+
+    return check
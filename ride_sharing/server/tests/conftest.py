@@ -14,3 +14,13 @@ def app():
 @pytest.fixture
 def client_app(app):
     return app.test_client()
+
+
+@pytest.fixture
+def standin_db(tmp_path):
+    from src.database.databaseObject import DatabaseObject
+    from src.database.sqlite_standin import SQLiteStandIn
+
+    factory = SQLiteStandIn(str(tmp_path / "ridesharing.db")).load_schema()
+    yield DatabaseObject(connection_factory=factory)
+    DatabaseObject.close_pools()
@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, jsonify
+from src.admission.limiter import (
+    AdmissionController,
+    ConcurrencyLimiter,
+    TokenBuckets,
+    admission_enabled,
+    parse_rate_limits,
+)
+from src.admission.middleware import install_admission
+from src.app.routes import initialise_routes
+from src.metrics.registry import MetricsRegistry
+
+QUOTE = {"sources": [[0, 0]], "destinations": [[3, 4]]}
+
+
+def test_token_bucket_refills_at_the_configured_rate():
+    now = [0.0]
+    buckets = TokenBuckets(rate=2.0, burst=3, clock=lambda: now[0])
+    assert [buckets.take("rider") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("rider") == 0.5
+    assert buckets.take("other rider") == 0.0
+    now[0] = 0.5
+    assert buckets.take("rider") == 0.0
+    assert buckets.take("rider") > 0
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("/api/v1/ride/create_ride=2/10, /api/v1/users=0.5") == {
+        "/api/v1/ride/create_ride": (2.0, 10),
+        "/api/v1/users": (0.5, 1),
+    }
+
+
+def test_rate_limit_is_per_client_and_route(monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", "/api/v1/ride/quotes=0.01/2")
+    registry = MetricsRegistry()
+    app = Flask(__name__)
+    initialise_routes(app)
+    install_admission(app, AdmissionController.from_env(registry))
+    client = app.test_client()
+
+    # the user id is only the caller's claim, a new one doesn't buy more requests
+    statuses = [
+        client.post("/api/v1/ride/quotes", json={**QUOTE, "user_id": user_id}).status_code
+        for user_id in (1, 2, 3)
+    ]
+    assert statuses == [200, 200, 429]
+    limited = client.post("/api/v1/ride/quotes", json=QUOTE)
+    assert int(limited.headers["Retry-After"]) >= 1
+    other = client.post(
+        "/api/v1/ride/quotes", json=QUOTE, environ_base={"REMOTE_ADDR": "10.0.0.2"}
+    )
+    assert other.status_code == 200
+    assert (
+        'requests_shed_total{route="/api/v1/ride/quotes",reason="rate_limit"} 2'
+        in registry.render()
+    )
+
+
+def test_admission_is_opt_in(monkeypatch):
+    monkeypatch.delenv("ADMISSION_ENABLED", raising=False)
+    assert not admission_enabled()
+    monkeypatch.setenv("ADMISSION_ENABLED", "1")
+    assert admission_enabled()
+
+
+def test_overload_is_shed_and_latency_stays_bounded():
+    service_seconds, queue_seconds = 0.02, 0.05
+    registry = MetricsRegistry()
+    limiter = ConcurrencyLimiter(4, max_queue_seconds=queue_seconds)
+    app = Flask(__name__)
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    @app.route("/work")
+    def work():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(service_seconds)
+        with lock:
+            running["now"] -= 1
+        return jsonify({"ok": True})
+
+    install_admission(app, AdmissionController(limiter=limiter, metrics=registry))
+    local = threading.local()
+
+    def call(_):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        started = time.perf_counter()
+        status = local.client.get("/work").status_code
+        return status, time.perf_counter() - started
+
+    # 32 clients against 4 slots: eight times what the service can take
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(call, range(400)))
+
+    statuses = [status for status, _ in results]
+    latencies = sorted(seconds for _, seconds in results)
+    assert set(statuses) == {200, 503}
+    assert statuses.count(503) > len(results) // 2
+    assert running["peak"] <= 4
+    # without shedding each request would queue behind the other 28, about
+    # 32 / 4 * 20 ms; with it nobody waits much longer than the queue time
+    p99 = latencies[int(len(latencies) * 0.99)]
+    assert p99 < queue_seconds + service_seconds + 0.1
+    assert limiter.stats()["active"] == 0
+    assert (
+        f'requests_shed_total{{route="/work",reason="overload"}} {statuses.count(503)}'
+        in registry.render()
+    )
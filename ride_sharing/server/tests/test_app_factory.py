@@ -0,0 +1,40 @@
+import os
+
+from src.app.main import create_app
+from src.app.services import AppServices
+from src.database.databaseObject import DatabaseObject
+
+
+def test_create_app_builds_services_on_first_request(standin_db):
+    services = AppServices(db_factory=lambda: standin_db)
+    app = create_app({"TESTING": True})
+    app.extensions["services"] = services
+    assert not services.built()
+
+    response = app.test_client().get("/api/v1/users/1")
+    assert response.status_code == 404
+    assert services.built()
+    first = services.get("user_service")
+    app.test_client().get("/api/v1/users/1")
+    assert services.get("user_service") is first
+    services.get("location_service").stop()
+
+
+def test_forked_worker_builds_its_own_services(standin_db):
+    services = AppServices(db_factory=lambda: standin_db)
+    parent_service = services.get("ride_service")
+    standin_db.fetch_all("select 1")  # parent now holds a pooled connection
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child
+        try:
+            child_service = services.get("ride_service")
+            fresh_pool = standin_db.pool_stats()["created"] == 0
+            os.write(write, b"1" if child_service is not parent_service and fresh_pool else b"0")
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"1"
+    assert services.get("ride_service") is parent_service
+    assert DatabaseObject._pools  # the parent's pool is untouched
+    services.get("location_service").stop()
@@ -0,0 +1,200 @@
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+from src.app.asgi import AsyncAppServices, create_asgi_app
+from src.cache.lru_cache import LRUCache
+from src.database.async_database import AsyncDatabaseObject
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import AsyncSQLiteStandIn, SQLiteStandIn
+from src.utils.constants import BOOKING_CANDIDATES
+
+DRIVERS = 20
+RIDERS = 60
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "ridesharing.db")
+    SQLiteStandIn(path).load_schema()
+    return path
+
+
+@pytest.fixture
+def asgi_app(db_path, monkeypatch):
+    monkeypatch.setenv("RIDE_UPDATE_FLUSH_MS", "0")
+    services = AsyncAppServices(
+        db_factory=lambda: AsyncDatabaseObject(
+            connection_factory=AsyncSQLiteStandIn(db_path, statement_latency=0.001)
+        ),
+        sync_db_factory=lambda: DatabaseObject(connection_factory=SQLiteStandIn(db_path)),
+        cache=LRUCache(),
+    )
+    yield create_asgi_app(services)
+    DatabaseObject.close_pools()
+
+
+async def call(app, method, path, body=None, query=""):
+    sent = []
+    payload = json.dumps(body).encode() if body is not None else b""
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode()}
+    await app(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+async def shutdown(app):
+    messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await app({"type": "lifespan"}, receive, send)
+    return sent
+
+
+def test_users_round_trip(asgi_app):
+    async def scenario():
+        created = await call(
+            asgi_app,
+            "POST",
+            "/api/v1/users",
+            {"user_name": "asha", "country": "india", "phone_number": 98450},
+        )
+        fetched = await call(asgi_app, "GET", "/api/v1/users/1")
+        missing = await call(asgi_app, "GET", "/api/v1/users/2")
+        invalid = await call(
+            asgi_app,
+            "POST",
+            "/api/v1/ride/create_ride",
+            {"user_id": 1, "source_location": "here", "destination_location": [1, 1]},
+        )
+        bad_vehicle = await call(
+            asgi_app,
+            "POST",
+            "/api/v1/ride/create_ride",
+            {"user_id": 1, "source_location": [1, 1], "destination_location": [1, 2], "vehicle_type": "car"},
+        )
+        bad_quotes = await call(
+            asgi_app, "POST", "/api/v1/ride/quotes", {"sources": 5, "destinations": [[1, 1]]}
+        )
+        await shutdown(asgi_app)
+        return created, fetched, missing, invalid, bad_vehicle, bad_quotes
+
+    created, fetched, missing, invalid, bad_vehicle, bad_quotes = asyncio.run(scenario())
+    assert created == (201, {"message": "user asha created successfully"})
+    assert fetched[0] == 200
+    assert fetched[1]["data"]["user_name"] == "asha"
+    assert missing == (404, {"error": "User not found"})
+    assert invalid[0] == 400
+    assert bad_vehicle[0] == 400
+    assert bad_quotes[0] == 400
+
+
+def test_concurrent_bookings_never_share_a_driver(asgi_app, db_path):
+    db = DatabaseObject(connection_factory=SQLiteStandIn(db_path))
+    db.execute_many(
+        "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+        [
+            (user_id, f"user{user_id}", user_id, "india")
+            for user_id in range(1, DRIVERS + RIDERS + 1)
+        ],
+    )
+
+    async def scenario():
+        for driver_id in range(1, DRIVERS + 1):
+            status, _ = await call(
+                asgi_app,
+                "POST",
+                f"/api/v1/drivers/{driver_id}/location",
+                {"location": [0.001 * driver_id, 0.0]},
+            )
+            assert status == 201
+        bookings = await asyncio.gather(
+            *(
+                call(
+                    asgi_app,
+                    "POST",
+                    "/api/v1/ride/create_ride",
+                    {
+                        "user_id": rider_id,
+                        "source_location": [0.0, 0.0],
+                        "destination_location": [0.01, 0.01],
+                    },
+                )
+                for rider_id in range(DRIVERS + 1, DRIVERS + RIDERS + 1)
+            )
+        )
+        history = await call(
+            asgi_app, "GET", "/api/v1/ride/get_ride_history", query=f"user_id={DRIVERS + 1}"
+        )
+        assert await shutdown(asgi_app) == [
+            "lifespan.startup.complete",
+            "lifespan.shutdown.complete",
+        ]
+        return bookings, history
+
+    bookings, history = asyncio.run(scenario())
+    booked = [body["data"]["ride_id"] for status, body in bookings if status == 201]
+    # every booking raced for the same nearest drivers, losers get a 503
+    assert len(booked) >= BOOKING_CANDIDATES
+    assert all(status == 503 for status, _ in bookings if status != 201)
+
+    drivers = [row[0] for row in db.fetch_all("select driver_id from rides")]
+    assert len(drivers) == len(booked)
+    assert Counter(drivers).most_common(1)[0][1] == 1
+
+    status, body = history
+    assert status == 200
+    assert body["data"]["format"][0] == "ride_id"
+
+
+def test_ride_lifecycle_and_driver_offline(asgi_app, db_path):
+    db = DatabaseObject(connection_factory=SQLiteStandIn(db_path))
+    db.execute_many(
+        "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+        [(1, "driver", 1, "india"), (2, "rider", 2, "india")],
+    )
+
+    async def scenario():
+        await call(asgi_app, "POST", "/api/v1/drivers/1/location", {"location": [0.0, 0.0]})
+        status, body = await call(
+            asgi_app,
+            "POST",
+            "/api/v1/ride/create_ride",
+            {"user_id": 2, "source_location": [0.0, 0.0], "destination_location": [0.01, 0.01]},
+        )
+        assert status == 201
+        ride_id = body["data"]["ride_id"]
+        started = await call(asgi_app, "POST", f"/api/v1/ride/{ride_id}/update_ride_start")
+        ended = await call(asgi_app, "POST", f"/api/v1/ride/{ride_id}/ride_end")
+        released = db.fetch_all("select is_available from driver_availability")
+        offline = await call(asgi_app, "POST", "/api/v1/drivers/1/offline")
+        index = asgi_app.services.get("ride_service").ride_service.driver_index
+        await shutdown(asgi_app)
+        return started, ended, released, offline, index.location_of(1)
+
+    started, ended, released, offline, location = asyncio.run(scenario())
+    assert started == (201, {"message": "ride started"})
+    assert ended == (201, {"message": "ride ended"})
+    assert released == [(1,)]
+    assert offline == (201, {"message": "driver 1 is offline"})
+    assert location is None
+    assert db.fetch_all("select is_available from driver_availability") == [(0,)]
+    times = db.fetch_all("select ride_start_time, ride_end_time from rides")
+    assert all(times[0])
+    assert db.fetch_all("select completed_rides from ride_summaries order by user_id") == [
+        (1,),
+        (1,),
+    ]
@@ -0,0 +1,101 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.cache.lru_cache import LRUCache
+from src.geo.driver_index import NoDriverAvailable
+from src.services.ride_service import RideService
+
+DRIVERS = 30
+RIDERS = 120
+
+
+@pytest.fixture
+def users(standin_db):
+    standin_db.execute_many(
+        "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+        [
+            (user_id, f"user{user_id}", user_id, "india")
+            for user_id in range(1, DRIVERS + RIDERS + 1)
+        ],
+    )
+    return standin_db
+
+
+def online_service(db):
+    service = RideService(db, cache=LRUCache())
+    if service.ride_updates is not None:
+        # write ride times straight through, these tests read them back
+        service.ride_updates.stop()
+        service.ride_updates = None
+    for driver_id in range(1, DRIVERS + 1):
+        service.update_driver_location(
+            driver_id, {"location": [0.001 * driver_id, 0.0]}
+        )
+    return service
+
+
+def test_transaction_rolls_back_every_statement(users):
+    online_service(users)
+    with pytest.raises(RuntimeError):
+        with users.transaction() as tx:
+            tx.execute(
+                "update driver_availability set is_available=%s where driver_id=%s",
+                (False, 1),
+            )
+            tx.execute(
+                """insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare)
+                values (%s, %s, %s, %s, %s, %s, %s)""",
+                (40, 1, 0, 0, 1, 1, 10),
+            )
+            raise RuntimeError("booking failed")
+    assert users.fetch_all("select count(*) from rides") == [(0,)]
+    assert users.fetch_all(
+        "select is_available from driver_availability where driver_id=%s", (1,)
+    ) == [(1,)]
+
+
+def test_parallel_bookings_never_share_a_driver(users):
+    # two services stand in for two worker processes, each with its own
+    # in-memory index that believes every driver is free
+    services = [online_service(users), online_service(users)]
+
+    def book(rider_id):
+        service = services[rider_id % 2]
+        try:
+            return service.create_ride(
+                {
+                    "user_id": rider_id,
+                    "source_location": [0.0, 0.0],
+                    "destination_location": [1.0, 1.0],
+                }
+            )["data"]["ride_id"]
+        except NoDriverAvailable:
+            return None
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        rides = pool.map(book, range(DRIVERS + 1, DRIVERS + RIDERS + 1))
+        booked = [ride_id for ride_id in rides if ride_id is not None]
+
+    drivers = [row[0] for row in users.fetch_all("select driver_id from rides")]
+    assert len(drivers) == len(booked)
+    assert Counter(drivers).most_common(1)[0][1] == 1
+    assert len(booked) > DRIVERS // 2
+    taken = users.fetch_all(
+        "select driver_id from driver_availability where is_available = %s", (False,)
+    )
+    assert sorted(row[0] for row in taken) == sorted(drivers)
+
+
+def test_ride_end_releases_the_driver(users):
+    service = online_service(users)
+    ride_id = service.create_ride(
+        {"user_id": 40, "source_location": [0.0, 0.0], "destination_location": [1, 1]}
+    )["data"]["ride_id"]
+    assert service.driver_index.is_available(1) is False
+
+    service.update_ride_end_time(ride_id)
+    assert service.driver_index.is_available(1) is True
+    assert users.fetch_all(
+        "select is_available from driver_availability where driver_id=%s", (1,)
+    ) == [(1,)]
@@ -0,0 +1,100 @@
+import pytest
+from flask import Flask
+from src.app.routes import initialise_routes
+from src.app.services import AppServices, init_app_services
+from src.cache.lru_cache import LRUCache
+from src.database.transaction import IntegrityViolation
+from src.repositories.user_repository import UserRepository
+from src.utils.constants import UserRole
+from src.utils.validators import validate_request_body
+
+
+@pytest.fixture
+def bulk_client(standin_db, monkeypatch):
+    monkeypatch.setenv("ADMISSION_ENABLED", "0")
+    app = Flask(__name__)
+    init_app_services(app, AppServices(lambda: standin_db))
+    initialise_routes(app)
+    return app.test_client()
+
+
+def driver(number, **fields):
+    return {"user_name": f"driver{number}", "phone_number": number, "country": "india", **fields}
+
+
+def test_validate_request_body_rejects_missing_and_null_fields():
+    assert validate_request_body({"a": 1, "b": 2}, ["a", "b"])
+    assert not validate_request_body({"a": 1}, ["a", "b"])
+    assert not validate_request_body({"a": 1, "b": None}, ["a", "b"])
+    assert not validate_request_body(None, ["a"])
+
+
+def test_bulk_drivers_reports_errors_per_row(bulk_client, standin_db):
+    standin_db.execute(
+        "insert into users (user_name, phone_number, country) values (%s, %s, %s)",
+        ("taken", 3, "india"),
+    )
+    records = [
+        driver(1),
+        driver(2, email="two@fleet.example"),
+        driver(3),  # already registered
+        driver(1),  # repeated in this request
+        driver(4, email="not an email"),
+        {"user_name": "x" * 17, "phone_number": "5", "country": "india"},
+        "not a record",
+        driver("6"),
+    ]
+    response = bulk_client.post("/api/v1/drivers/bulk", json={"users": records})
+    assert response.status_code == 201
+    data = response.get_json()["data"]
+    assert data["created"] == 3
+    assert [error["index"] for error in data["errors"]] == [2, 3, 4, 5, 6]
+    assert data["errors"][0]["errors"] == {"phone_number": "is already registered"}
+    assert set(data["errors"][3]["errors"]) == {"user_name"}
+
+    user_ids = data["user_ids"]
+    assert user_ids[2:7] == [None] * 5
+    for index in (0, 1, 7):
+        user = bulk_client.get(f"/api/v1/users/{user_ids[index]}").get_json()["data"]
+        assert user["user_role"] == UserRole.DRIVER.value
+        assert user["phone_number"] == int(records[index]["phone_number"])
+
+
+def test_bulk_insert_spans_chunks_and_invalidates_cache(standin_db):
+    cache = LRUCache()
+    users = UserRepository(standin_db, cache=cache)
+    assert users.get_user(3) is None
+    rows = [(f"user{n}", n, "india", None, UserRole.RIDER.value) for n in range(1, 8)]
+    user_ids = users.create_users(rows[:2], chunk_size=3)
+    user_ids += users.create_users(rows, chunk_size=3)
+    assert user_ids[2:4] == [None, None]
+    assert sorted(filter(None, user_ids)) == list(range(1, 8))
+    assert users.get_user(3)[1] == "user3"
+
+
+def test_bulk_insert_matches_registered_country_case_insensitively(standin_db):
+    users = UserRepository(standin_db)
+    standin_db.execute(
+        "insert into users (user_name, phone_number, country) values (%s, %s, %s)",
+        ("taken", 5, "India"),
+    )
+    rows = [(f"user{n}", n, "india", None, UserRole.RIDER.value) for n in (4, 5)]
+    user_ids = users.create_users(rows)
+    assert user_ids[1] is None
+    assert users.get_user(user_ids[0])[1] == "user4"
+
+
+def test_duplicate_insert_in_transaction_is_an_integrity_violation(standin_db):
+    query = "insert into users (user_name, phone_number, country) values (%s, %s, %s)"
+    standin_db.execute(query, ("taken", 5, "india"))
+    with pytest.raises(IntegrityViolation):
+        with standin_db.transaction() as tx:
+            tx.execute(query, ("again", 5, "india"))
+
+
+def test_bulk_rejects_oversized_request(bulk_client, monkeypatch):
+    monkeypatch.setattr("src.app.routes.MAX_USERS_PER_REQUEST", 2)
+    response = bulk_client.post(
+        "/api/v1/users/bulk", json={"users": [driver(1), driver(2), driver(3)]}
+    )
+    assert response.status_code == 400
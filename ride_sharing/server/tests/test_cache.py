@@ -0,0 +1,59 @@
+from src.cache.lru_cache import LRUCache, estimate_size
+from src.repositories.ride_repository import RideRepository
+from src.repositories.user_repository import UserRepository
+
+
+def test_lru_eviction_and_ttl():
+    value = "x" * 100
+    cache = LRUCache(max_bytes=estimate_size(value) * 2, max_owner_bytes=10_000)
+    cache.set("a", value)
+    cache.set("b", value)
+    assert cache.get("a") == (True, value)
+    cache.set("c", value)  # evicts b, the least recently used
+    assert cache.get("b") == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+    expired = LRUCache(ttl_seconds=0)
+    expired.set("a", value)
+    assert expired.get("a") == (False, None)
+    assert expired.stats()["expirations"] == 1
+
+
+def test_hot_owner_only_evicts_own_entries():
+    value = "x" * 100
+    size = estimate_size(value)
+    cache = LRUCache(max_bytes=size * 100, max_owner_bytes=size * 2)
+    cache.set("other", value, owner=2)
+    for page in range(10):
+        cache.set(("hot", page), value, owner=1)
+
+    assert cache.get("other") == (True, value)
+    assert cache.get(("hot", 9)) == (True, value)
+    assert cache.get(("hot", 0)) == (False, None)
+    assert cache.stats()["owner_evictions"] == 8
+
+
+def test_writes_invalidate_cached_reads(standin_db):
+    cache = LRUCache()
+    users = UserRepository(standin_db, cache=cache)
+    rides = RideRepository(standin_db, cache=cache)
+    rider = users.create_user("rider", 1, "india", 1)
+    driver = users.create_user("driver", 2, "india", 2)
+    ride_id = rides.create_ride(rider, driver, [0, 0], [1, 1], 14)
+
+    assert users.get_user(rider)[5] == 1
+    history = rides.get_ride_history(rider, 10)
+    assert history == rides.get_ride_history(rider, 10)
+    assert cache.stats()["hits"] == 1
+
+    users.update_user("is_active", 0, rider)
+    assert users.get_user(rider)[5] == 0
+
+    users.update_user("user_name", "renamed", driver)
+    assert rides.get_ride_history(rider, 10)[0][6] == "renamed"
+
+    rides.update_ride("fare", 20, ride_id)
+    assert rides.get_ride_history(rider, 10)[0][5] == 20
+
+    rides.create_ride(rider, driver, [0, 0], [2, 2], 18)
+    assert len(rides.get_ride_history(rider, 10)) == 2
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+from src.database.connection_pool import ConnectionPool, PoolTimeoutError
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+
+
+@pytest.fixture
+def standin(tmp_path):
+    factory = SQLiteStandIn(str(tmp_path / "pool.db"))
+    conn = factory()
+    cursor = conn.cursor()
+    cursor.execute("create table items (id integer primary key, name text)")
+    conn.commit()
+    conn.close()
+    yield factory
+    DatabaseObject.close_pools()
+
+
+def test_pool_reuses_connections(standin):
+    db = DatabaseObject(connection_factory=standin)
+    for i in range(20):
+        db.execute("insert into items (name) values (%s)", (f"item{i}",))
+        db.fetch_all("select count(*) from items")
+
+    stats = db.pool_stats()
+    assert stats["created"] == 1
+    assert stats["checkouts"] == 40
+    assert stats["in_use"] == 0
+    assert db.fetch_all("select count(*) from items") == [(20,)]
+
+
+def test_services_share_one_pool(standin):
+    assert DatabaseObject(connection_factory=standin).pool is DatabaseObject(
+        connection_factory=standin
+    ).pool
+
+
+def test_pool_is_bounded():
+    pool = ConnectionPool(lambda: object(), pool_size=2, checkout_timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_unhealthy_and_idle_connections_are_replaced(standin):
+    healthy = threading.Event()
+    healthy.set()
+    pool = ConnectionPool(
+        standin, pool_size=1, health_check=lambda conn: healthy.is_set()
+    )
+    pool.release(pool.acquire())
+    healthy.clear()
+    pool.release(pool.acquire())
+    assert pool.stats()["health_check_failures"] == 1
+
+    pool.max_idle_seconds = 0
+    healthy.set()
+    pool.release(pool.acquire())
+    stats = pool.stats()
+    assert stats["recycled"] == 1
+    assert stats["created"] == 3
+    pool.close()
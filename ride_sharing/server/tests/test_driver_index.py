@@ -0,0 +1,87 @@
+import random
+from math import hypot
+
+import pytest
+from src.geo.driver_index import DriverLocationIndex, NoDriverAvailable
+from src.utils.constants import VehicleType
+
+CAR = VehicleType.CAR.value
+BIKE = VehicleType.BIKE.value
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(1)
+    index = DriverLocationIndex(cell_size=0.05)
+    drivers = {}
+    for driver_id in range(500):
+        location = [rng.uniform(0, 1), rng.uniform(0, 1)]
+        drivers[driver_id] = location
+        index.upsert(driver_id, CAR, location)
+
+    for _ in range(50):
+        x, y = rng.uniform(-0.2, 1.2), rng.uniform(-0.2, 1.2)
+        expected = sorted(
+            (hypot(dx - x, dy - y), driver_id)
+            for driver_id, (dx, dy) in drivers.items()
+        )[:5]
+        assert index.nearest([x, y], CAR, k=5) == expected
+
+
+def test_claim_filters_vehicle_type_and_marks_busy():
+    index = DriverLocationIndex()
+    index.upsert(1, CAR, [0.0, 0.0])
+    index.upsert(2, BIKE, [0.0, 0.001])
+    index.upsert(3, CAR, [0.5, 0.5])
+
+    assert index.claim_nearest([0.0, 0.002], CAR) == 1
+    assert index.claim_nearest([0.0, 0.002], CAR) == 3
+    with pytest.raises(NoDriverAvailable):
+        index.claim_nearest([0.0, 0.002], CAR)
+
+    index.mark_available(1)
+    assert index.nearest([0.0, 0.0], CAR) == [(0.0, 1)]
+
+
+def test_moving_driver_updates_bucket():
+    index = DriverLocationIndex(cell_size=0.01)
+    index.upsert(1, CAR, [0.0, 0.0])
+    index.move(1, [1.0, 1.0])
+    assert index.nearest([1.0, 1.0], CAR) == [(0.0, 1)]
+    index.remove(1)
+    assert index.nearest([1.0, 1.0], CAR) == []
+    assert index.available_count(CAR) == 0
+
+
+def test_move_many_skips_unknown_and_keeps_busy_drivers_out():
+    index = DriverLocationIndex(cell_size=0.01)
+    index.upsert(1, CAR, [0.0, 0.0])
+    index.upsert(2, CAR, [0.0, 0.0])
+    index.claim(2)
+
+    assert index.move_many([1, 2, 3], [[0.001, 0.0], [1.0, 1.0], [2.0, 2.0]]) == 2
+    assert index.nearest([0.0, 0.0], CAR) == [(0.001, 1)]
+    index.move_many([1], [[1.0, 1.0]])
+    assert index.nearest([1.0, 1.0], CAR, k=2) == [(0.0, 1)]
+    assert index.location_of(2) == (1.0, 1.0)
+    assert index.available_count(CAR) == 1
+
+
+def test_bounds_shrink_once_a_stray_driver_leaves():
+    index = DriverLocationIndex(cell_size=0.01)
+    index.upsert(1, CAR, [0.0, 0.0])  # a bad fix far from the city
+    for driver_id in range(2, 5):
+        index.upsert(driver_id, CAR, [12.9 + driver_id * 0.001, 77.6])
+    index.remove(1)
+
+    # fewer available drivers than asked for: stops once all are seen
+    nearest = index.nearest([12.9, 77.6], CAR, k=8)
+    assert [driver_id for _, driver_id in nearest] == [2, 3, 4]
+    assert index._bounds[CAR] == index._DriverLocationIndex__cell(12.902, 77.6) * 2
+
+
+def test_search_stops_at_max_distance():
+    index = DriverLocationIndex(cell_size=0.01, max_search_distance=0.5)
+    index.upsert(1, CAR, [0.0, 0.0])
+    index.upsert(2, CAR, [10.0, 10.0])
+    assert index.nearest([0.0, 0.1], CAR, k=2) == [(0.1, 1)]
+    assert index.nearest([10.0, 9.0], CAR) == []
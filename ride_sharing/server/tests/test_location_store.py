@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from src.geo.driver_index import DriverLocationIndex
+from src.geo.location_store import LocationStore
+from src.repositories.driver_location_repository import DriverLocationRepository
+from src.services.location_service import LocationService
+from src.utils.constants import VehicleType
+
+
+def test_batch_keeps_newest_ping_per_driver():
+    store = LocationStore(history_size=4, initial_capacity=2)
+    pings = [
+        [1, 0.0, 0.0, 10.0],
+        [2, 5.0, 5.0, 10.0],
+        [1, 0.3, 0.3, 13.0],
+        [1, 0.1, 0.1, 11.0],
+        [3, 9.0, 9.0, 1.0],
+    ]
+    driver_ids, positions = store.ingest(pings)
+
+    moved = dict(zip(driver_ids.tolist(), positions.tolist()))
+    assert moved == {1: [0.3, 0.3], 2: [5.0, 5.0], 3: [9.0, 9.0]}
+    assert store.latest(1) == (0.3, 0.3, 13.0)
+    assert [ts for _, _, ts in store.history(1)] == [10.0, 11.0, 13.0]
+
+
+def test_ring_buffer_wraps_and_drops_stale_pings():
+    store = LocationStore(history_size=3)
+    store.ingest([[7, float(ts), 0.0, float(ts)] for ts in range(5)])
+    store.ingest([[7, 9.0, 0.0, 2.0], [7, 5.0, 0.0, 5.0]])
+
+    assert [ts for _, _, ts in store.history(7)] == [3.0, 4.0, 5.0]
+    assert store.latest(7) == (5.0, 0.0, 5.0)
+    assert store.stats() == {"ingested": 6, "stale": 1, "invalid": 0, "drivers": 1}
+
+
+def test_drain_dirty_returns_each_moved_driver_once():
+    store = LocationStore()
+    store.ingest(np.array([[1, 0, 0, 1], [1, 1, 1, 2], [2, 2, 2, 1]], dtype=float))
+    driver_ids, latest = store.drain_dirty()
+    assert sorted(zip(driver_ids.tolist(), latest.tolist())) == [
+        (1, [1.0, 1.0, 2.0]),
+        (2, [2.0, 2.0, 1.0]),
+    ]
+    assert len(store.drain_dirty()[0]) == 0
+
+
+def test_service_moves_online_drivers_and_persists_latest(standin_db):
+    index = DriverLocationIndex()
+    index.upsert(1, VehicleType.CAR.value, [0.0, 0.0])
+    service = LocationService(DriverLocationRepository(standin_db), index)
+
+    response = service.ingest([[1, 0.5, 0.5, 1.0], [1, 0.6, 0.6, 2.0], [2, 1, 1, 1]])
+    assert response["data"] == {"accepted": 3, "drivers_moved": 2}
+    # unknown drivers are tracked but not made dispatchable
+    assert index.location_of(1) == (0.6, 0.6)
+    assert index.location_of(2) is None
+
+    assert service.persist() == 2
+    assert service.persist() == 0
+    rows = standin_db.fetch_all(
+        "select driver_id, latitude, longitude, recorded_at from driver_locations order by driver_id"
+    )
+    assert rows == [(1, 0.6, 0.6, 2.0), (2, 1.0, 1.0, 1.0)]
+
+
+def test_failed_persist_keeps_drivers_dirty(standin_db):
+    class FailingOnce(DriverLocationRepository):
+        failed = False
+
+        def save_latest(self, rows):
+            if not self.failed:
+                self.failed = True
+                raise RuntimeError("database unavailable")
+            super().save_latest(rows)
+
+    service = LocationService(FailingOnce(standin_db), DriverLocationIndex())
+    service.ingest([[1, 0.5, 0.5, 1.0], [2, 1, 1, 1]])
+    with pytest.raises(RuntimeError):
+        service.persist()
+    assert service.persist() == 2
+
+
+def test_ingest_route_rejects_malformed_pings(client_app):
+    response = client_app.post(
+        "/api/v1/drivers/locations", json={"pings": [[1, 0.0, 0.0]]}
+    )
+    assert response.status_code == 400
+    for pings in (5, None):
+        response = client_app.post("/api/v1/drivers/locations", json={"pings": pings})
+        assert response.status_code == 400
+    response = client_app.post(
+        "/api/v1/drivers/locations", json={"pings": [[1, 0.0, 0.0, 1.0]]}
+    )
+    assert response.status_code == 202
+
+
+def test_out_of_range_pings_are_dropped():
+    store = LocationStore()
+    driver_ids, _ = store.ingest([[1, 91.0, 0.0, 1.0], [2, 12.9, 181.0, 1.0], [3, 12.9, 77.6, 1.0]])
+    assert driver_ids.tolist() == [3]
+    assert store.latest(1) is None
+    assert store.stats()["invalid"] == 2
@@ -0,0 +1,96 @@
+import pytest
+from src.geo.driver_index import DriverLocationIndex
+from src.repositories.driver_repository import DriverRepository
+from src.repositories.ride_repository import RideRepository
+from src.services.matching_engine import ASSIGNED, PENDING, UNMATCHED, BatchMatcher
+from src.utils.constants import VehicleType
+
+CAR = VehicleType.CAR.value
+
+
+@pytest.fixture
+def ride_repository(standin_db):
+    for user_id in range(1, 6):
+        standin_db.execute(
+            "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+            (user_id, f"user{user_id}", user_id, "india"),
+        )
+    for driver_id in (4, 5):
+        DriverRepository(standin_db).set_availability(driver_id, CAR, True)
+    return RideRepository(standin_db)
+
+
+def create_ride(ride_repository, rider_id, location):
+    return ride_repository.create_ride(rider_id, None, location, [5, 5], 10)
+
+
+def test_batch_minimises_total_pickup_distance(ride_repository):
+    index = DriverLocationIndex(cell_size=0.5)
+    index.upsert(4, CAR, [0.4, 0.0])
+    index.upsert(5, CAR, [1.9, 0.0])
+    matcher = BatchMatcher(ride_repository, index)
+
+    # greedy would give rider 1 driver 4 and leave rider 2 with driver 5
+    first = create_ride(ride_repository, 1, [1.0, 0.0])
+    second = create_ride(ride_repository, 2, [0.0, 0.0])
+    matcher.submit(first, CAR, [1.0, 0.0])
+    matcher.submit(second, CAR, [0.0, 0.0])
+    assert matcher.assignment(first)["status"] == PENDING
+
+    assert matcher.run_once() == 2
+    assert matcher.assignment(first) == {"status": ASSIGNED, "driver_id": 5}
+    assert matcher.assignment(second) == {"status": ASSIGNED, "driver_id": 4}
+    assert ride_repository.get_driver_id(first) == 5
+    assert ride_repository.get_driver_id(second) == 4
+    assert index.available_count(CAR) == 0
+
+
+def test_riders_without_driver_wait_then_go_unmatched(ride_repository):
+    index = DriverLocationIndex()
+    index.upsert(4, CAR, [0.0, 0.0])
+    matcher = BatchMatcher(ride_repository, index, max_windows=2)
+    rides = [create_ride(ride_repository, rider, [0.0, 0.0]) for rider in (1, 2)]
+    for ride_id in rides:
+        matcher.submit(ride_id, CAR, [0.0, 0.0])
+
+    assert matcher.run_once() == 1
+    assert matcher.stats()["queued"] == 1
+    matcher.run_once()
+    statuses = sorted(matcher.assignment(ride_id)["status"] for ride_id in rides)
+    assert statuses == [ASSIGNED, UNMATCHED]
+    assert matcher.stats()["queued"] == 0
+
+
+def test_unmatched_ride_is_recorded_on_the_ride_row(ride_repository):
+    matcher = BatchMatcher(ride_repository, DriverLocationIndex(), max_windows=1)
+    ride_id = create_ride(ride_repository, 1, [0.0, 0.0])
+    matcher.submit(ride_id, CAR, [0.0, 0.0])
+
+    matcher.run_once()
+    assert matcher.assignment(ride_id)["status"] == UNMATCHED
+    # what a worker that never saw the ride, or evicted it, reads
+    assert ride_repository.get_match(ride_id) == (None, True)
+    # the rider is not charged for a ride that never happened
+    assert [row[:3] for row in ride_repository.summaries.get_summary(1)] == [(1, 0, 0)]
+    assert ride_repository.summaries.check() == []
+
+
+def test_rider_is_matched_again_when_a_booking_took_the_driver(ride_repository, standin_db):
+    index = DriverLocationIndex()
+    index.upsert(4, CAR, [0.0, 0.0])
+    matcher = BatchMatcher(ride_repository, index)
+    ride_id = create_ride(ride_repository, 1, [0.0, 0.0])
+    matcher.submit(ride_id, CAR, [0.0, 0.0])
+    # taken in the database by a booking the index hasn't heard about
+    standin_db.execute(
+        "update driver_availability set is_available=%s where driver_id=%s", (False, 4)
+    )
+
+    assert matcher.run_once() == 0
+    assert matcher.assignment(ride_id) == {"status": PENDING, "driver_id": None}
+    assert matcher.stats()["queued"] == 1
+    assert ride_repository.get_driver_id(ride_id) is None
+
+    index.upsert(5, CAR, [0.0, 0.1])
+    assert matcher.run_once() == 1
+    assert matcher.assignment(ride_id) == {"status": ASSIGNED, "driver_id": 5}
@@ -0,0 +1,69 @@
+import logging
+
+from src.metrics.registry import MetricsRegistry, get_default_registry, statement_shape
+
+
+def test_statement_shape_collapses_literals_and_lists():
+    assert (
+        statement_shape("SELECT *  FROM users\n WHERE id = 42 AND name='bob'")
+        == "select * from users where id = ? and name=?"
+    )
+    assert statement_shape("select 1 from t where id in (%s,%s, %s)") == (
+        "select ? from t where id in (?...)"
+    )
+    assert statement_shape("insert into t (a, b) values (%s, %s), (%s,%s)") == (
+        "insert into t (a, b) values (?, ?), ..."
+    )
+
+
+def test_render_cumulative_buckets():
+    registry = MetricsRegistry()
+    registry.observe_request("GET", "/api/v1/users/<int:user_id>", 200, 0.002)
+    registry.observe_request("GET", "/api/v1/users/<int:user_id>", 200, 0.2)
+    registry.observe_query("select * from users where id=%s", 0.001, rows=1)
+    registry.observe_query("select * from users where id=7", 0.001, failed=True)
+    registry.increment("requests_shed_total", (("reason", "rate_limit"),))
+
+    text = registry.render()
+    labels = 'method="GET",route="/api/v1/users/<int:user_id>",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.001"}} 0' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.0025"}} 1' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in text
+    shape = 'statement="select * from users where id=?"'
+    assert f"db_query_duration_seconds_count{{{shape}}} 2" in text
+    assert f"db_query_rows_total{{{shape}}} 1" in text
+    assert f"db_query_errors_total{{{shape}}} 1" in text
+    assert 'requests_shed_total{reason="rate_limit"} 1' in text
+
+
+def test_metrics_endpoint_reports_routes(client_app):
+    get_default_registry().reset()
+    client_app.post("/api/v1/ride/quotes", json={"sources": [[0, 0]], "destinations": [[3, 4]]})
+    response = client_app.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert (
+        'http_request_duration_seconds_count{method="POST",route="/api/v1/ride/quotes",status="200"} 1'
+        in response.get_data(as_text=True)
+    )
+
+
+def test_queries_are_timed_and_slow_ones_logged(standin_db, caplog):
+    registry = MetricsRegistry()
+    standin_db.metrics = registry
+    standin_db.slow_query_seconds = 1e-9
+    with caplog.at_level(logging.WARNING, logger="src.database.slow_queries"):
+        standin_db.execute(
+            "insert into users (user_name, country, phone_number) values (%s, %s, %s)",
+            ("rider", "IN", "1"),
+        )
+        assert len(standin_db.fetch_all("select id from users where id=%s", (1,))) == 1
+
+    stats = registry.query_stats()
+    assert stats["select id from users where id=?"]["rows"] == 1
+    assert stats["insert into users (user_name, country, phone_number) values (?, ?, ?)"][
+        "count"
+    ] == 1
+    assert "slow query" in caplog.text
+    assert "rider" not in caplog.text  # parameters never reach the log
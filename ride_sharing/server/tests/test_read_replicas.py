@@ -0,0 +1,146 @@
+import shutil
+
+import pytest
+from flask import Flask, request
+from src.admission.middleware import request_user
+from src.cache.lru_cache import LRUCache
+from src.database.connection_pool import DatabaseUnavailable
+from src.database.databaseObject import DatabaseObject
+from src.database.replicas import ReadYourWrites, bind_session
+from src.database.sqlite_standin import SQLiteStandIn
+from src.repositories.user_repository import UserRepository
+
+INSERT_USER = "insert into users (user_name, phone_number, country) values (%s, %s, %s)"
+COUNT_USERS = "select count(*) from users"
+
+
+@pytest.fixture
+def stand_ins(tmp_path):
+    """A primary and a replica that is a snapshot of it, i.e. lagging behind."""
+    primary = str(tmp_path / "primary.db")
+    replica = str(tmp_path / "replica.db")
+    SQLiteStandIn(primary).load_schema()
+    shutil.copy(primary, replica)
+    yield primary, replica
+    bind_session(None)
+    DatabaseObject.close_pools()
+
+
+def test_reads_go_to_replica_until_a_session_writes(stand_ins):
+    primary, replica = stand_ins
+    now = [0.0]
+    db = DatabaseObject(
+        connection_factory=SQLiteStandIn(primary),
+        replica_factories=[SQLiteStandIn(replica, read_only=True)],
+        read_your_writes=ReadYourWrites(window_seconds=5, clock=lambda: now[0]),
+    )
+
+    bind_session(1)
+    db.execute(INSERT_USER, ("rider", 1, "india"))
+    assert db.fetch_all(COUNT_USERS) == [(1,)]  # sticky, read from the primary
+
+    bind_session(2)
+    assert db.fetch_all(COUNT_USERS) == [(0,)]  # the replica hasn't caught up
+    assert db.fetch_all(COUNT_USERS, primary=True) == [(1,)]
+
+    now[0] = 6.0
+    bind_session(1)
+    assert db.fetch_all(COUNT_USERS) == [(0,)]
+    with db.transaction() as tx:
+        assert tx.fetch_all(COUNT_USERS) == [(1,)]
+    assert db.fetch_all(COUNT_USERS) == [(1,)]
+
+
+def test_replica_selection(stand_ins, monkeypatch):
+    primary, replica = stand_ins
+    # two pools over the same file, a different latency makes them distinct
+    replicas = [
+        SQLiteStandIn(replica, read_only=True),
+        SQLiteStandIn(replica, statement_latency=0.0001, read_only=True),
+    ]
+
+    monkeypatch.setenv("DATABASE_REPLICA_SELECTION", "round_robin")
+    db = DatabaseObject(connection_factory=SQLiteStandIn(primary), replica_factories=replicas)
+    for _ in range(10):
+        db.fetch_all(COUNT_USERS)
+    assert [stats["checkouts"] for stats in db.replica_stats()] == [5, 5]
+    assert db.pool_stats()["checkouts"] == 0
+
+    monkeypatch.setenv("DATABASE_REPLICA_SELECTION", "least_loaded")
+    db = DatabaseObject(connection_factory=SQLiteStandIn(primary), replica_factories=replicas)
+    before = [stats["checkouts"] for stats in db.replica_stats()]
+    busy = db.replica_pools()[0]
+    conn = busy.acquire()
+    try:
+        for _ in range(4):
+            db.fetch_all(COUNT_USERS)
+    finally:
+        busy.release(conn)
+    after = [stats["checkouts"] for stats in db.replica_stats()]
+    # the held connection is the busy pool's only extra checkout
+    assert [a - b for a, b in zip(after, before)] == [1, 4]
+
+
+def test_failed_replica_falls_back_to_primary(stand_ins, tmp_path):
+    primary, _ = stand_ins
+
+    def unreachable():
+        raise DatabaseUnavailable("replica is down")
+
+    db = DatabaseObject(connection_factory=SQLiteStandIn(primary), replica_factories=[unreachable])
+    assert db.fetch_all(COUNT_USERS) == [(0,)]
+    assert db.pool_stats()["checkouts"] == 1
+
+    # a replica file that isn't there is unreachable too
+    missing = SQLiteStandIn(str(tmp_path / "missing.db"), read_only=True)
+    db = DatabaseObject(connection_factory=SQLiteStandIn(primary), replica_factories=[missing])
+    assert db.fetch_all(COUNT_USERS) == [(0,)]
+
+
+def test_failed_query_on_a_replica_is_not_retried(stand_ins):
+    primary, replica = stand_ins
+    db = DatabaseObject(
+        connection_factory=SQLiteStandIn(primary),
+        replica_factories=[SQLiteStandIn(replica, read_only=True)],
+    )
+    with pytest.raises(Exception):
+        db.fetch_all("select count(*) from no_such_table")
+    assert db.pool_stats()["checkouts"] == 0
+
+
+def test_cache_misses_read_replicas_but_skip_rows_that_may_lag(stand_ins):
+    primary, replica = stand_ins
+    db = DatabaseObject(
+        connection_factory=SQLiteStandIn(primary),
+        replica_factories=[SQLiteStandIn(replica, read_only=True)],
+    )
+    cache = LRUCache()
+    users = UserRepository(db, cache=cache)
+    bind_session(1)
+    user_id = users.create_user("rider", 1, "india", 1)
+    # the writer reads its own write from the primary, fine to cache
+    assert users.get_user(user_id) is not None
+    assert cache.stats()["entries"] == 1
+    cache.invalidate_tags((f"user:{user_id}",))
+
+    # another session misses the cache and reads the lagging replica
+    bind_session(2)
+    assert users.get_user(user_id) is None
+    assert db.replica_stats()[0]["checkouts"] == 1
+    # that "no such user" may be stale, so it isn't kept
+    assert cache.stats()["entries"] == 0
+    # rows nothing invalidated lately are cached from the replica
+    assert users.get_user(user_id + 1) is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_session_key_is_the_same_for_query_and_body_user_ids():
+    app = Flask(__name__)
+    with app.test_request_context("/?user_id=7"):
+        from_query = request_user(request)
+    with app.test_request_context("/", method="POST", json={"user_id": 7}):
+        from_body = request_user(request)
+    with app.test_request_context("/?user_id=seven", environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        unparsable = request_user(request)
+    assert from_query == from_body == 7
+    assert unparsable == "10.0.0.1"
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from src.cache.lru_cache import LRUCache
+from src.services.ride_service import RideService
+
+EXPORT_ROWS = 1_000_000
+
+
+def populate(db, rides):
+    conn = db.pool.acquire()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+        [(1, "rider", 1, "india"), (2, "driver", 2, "india")],
+    )
+    cursor.executemany(
+        "insert into rides (user_id, driver_id, source_lat, source_lon, destination_lat, destination_lon, fare, ride_booking_time) values (1, 2, 0.0, 0.0, 1.0, 1.0, 14, '2025-01-01 10:00:00')",
+        (() for _ in range(rides)),
+    )
+    conn.commit()
+    db.pool.release(conn)
+
+
+def test_export_formats(standin_db):
+    populate(standin_db, 3)
+    service = RideService(standin_db, cache=LRUCache())
+
+    lines = "".join(service.export_rides("ndjson", user_id=1)).splitlines()
+    assert [json.loads(line)["ride_id"] for line in lines] == [1, 2, 3]
+
+    rows = list(csv.reader(io.StringIO("".join(service.export_rides("csv", user_id=1)))))
+    assert rows[0][:3] == ["ride_id", "user_id", "driver_id"]
+    assert [row[0] for row in rows[1:]] == ["1", "2", "3"]
+
+
+def test_abandoned_export_releases_connection(standin_db):
+    populate(standin_db, 5000)
+    service = RideService(standin_db, cache=LRUCache())
+    chunks = service.export_rides("ndjson", user_id=1)
+    next(chunks)
+    chunks.close()
+    assert standin_db.pool_stats()["in_use"] == 0
+
+
+def resident_memory():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs procfs")
+def test_export_of_a_million_rows_keeps_memory_flat(standin_db):
+    populate(standin_db, EXPORT_ROWS)
+    service = RideService(standin_db, cache=LRUCache())
+
+    exported_rows = exported_bytes = 0
+    baseline = peak = None
+    for chunk in service.export_rides("ndjson", user_id=1):
+        exported_rows += chunk.count("\n")
+        exported_bytes += len(chunk)
+        if exported_rows % 50_000 == 0:
+            # sampled after the stream has warmed up, then tracked to the end
+            if baseline is None:
+                baseline = resident_memory()
+            peak = max(peak or 0, resident_memory())
+
+    assert exported_rows == EXPORT_ROWS
+    # the whole export is well over 100MB, the stream only ever holds a few batches
+    assert exported_bytes > 100 * 1024 * 1024
+    assert peak - baseline < 10 * 1024 * 1024
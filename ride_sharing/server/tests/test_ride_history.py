@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from flask import Flask
+from src.app.routes import initialise_routes
+from src.app.services import AppServices, init_app_services
+from src.cache.lru_cache import LRUCache
+from src.services.ride_service import RideService
+from src.utils.constants import PAGE_LIMIT
+from src.utils.pagination import InvalidCursor
+
+
+@pytest.fixture
+def ride_service(standin_db):
+    standin_db.execute(
+        "insert into users (user_name, phone_number, country) values (%s, %s, %s)",
+        ("rider", 1, "india"),
+    )
+    standin_db.execute(
+        "insert into users (user_name, phone_number, country, user_role) values (%s, %s, %s, 2)",
+        ("driver", 2, "india"),
+    )
+    service = RideService(standin_db, cache=LRUCache())
+    for _ in range(25):
+        service.ride_repository.create_ride(1, 2, [0, 0], [1, 1], 14)
+    return service
+
+
+def test_cursor_pages_walk_full_history(ride_service):
+    seen, cursor = [], None
+    while True:
+        data = ride_service.get_all_rides(user_id=1, cursor=cursor)["data"]
+        seen += [ride[0] for ride in data["rides"]]
+        assert len(data["rides"]) <= PAGE_LIMIT
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == list(range(25, 0, -1))
+
+
+def test_page_num_returns_page_limit_rows(ride_service):
+    first = ride_service.get_all_rides(user_id=1, page_num=1)["data"]
+    third = ride_service.get_all_rides(user_id=1, page_num=3)["data"]
+    assert [ride[0] for ride in first["rides"]] == list(range(25, 15, -1))
+    assert [ride[0] for ride in third["rides"]] == list(range(5, 0, -1))
+    assert third["next_cursor"] is None
+
+
+def test_cursor_of_another_user_is_rejected(ride_service):
+    cursor = ride_service.get_all_rides(user_id=1)["data"]["next_cursor"]
+    with pytest.raises(InvalidCursor):
+        ride_service.get_all_rides(user_id=2, cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        ride_service.get_all_rides(user_id=1, cursor="not-a-cursor")
+
+
+def test_history_locations_are_numeric_pairs(ride_service):
+    rides = ride_service.get_all_rides(user_id=1)["data"]["rides"]
+    assert rides[0] == [25, [0.0, 0.0], [1.0, 1.0], 14, "driver"]
+
+
+@pytest.fixture
+def history_client(ride_service, standin_db, monkeypatch):
+    monkeypatch.setenv("ADMISSION_ENABLED", "0")
+    app = Flask(__name__)
+    init_app_services(app, AppServices(lambda: standin_db))
+    initialise_routes(app)
+    return app.test_client()
+
+
+def test_history_is_compact_json_by_default(history_client):
+    response = history_client.get("/api/v1/ride/get_ride_history?user_id=1")
+    assert response.mimetype == "application/json"
+    assert "Accept" in response.headers["Vary"]
+    assert b", " not in response.data
+    assert response.get_json()["data"]["rides"][0][1] == [0.0, 0.0]
+
+
+def test_history_as_msgpack_columns(history_client):
+    msgpack = pytest.importorskip("msgpack")
+    response = history_client.get(
+        "/api/v1/ride/get_ride_history?user_id=1",
+        headers={"Accept": "application/msgpack"},
+    )
+    assert response.mimetype == "application/msgpack"
+    data = msgpack.unpackb(response.data)["data"]
+    columns = data["columns"]
+
+    def column(name):
+        values = columns[name]
+        array = np.frombuffer(values["data"], dtype=values["dtype"]).reshape(values["shape"])
+        return array * values["scale"] if "scale" in values else array
+
+    assert data["count"] == PAGE_LIMIT
+    assert column("ride_id").tolist() == list(range(25, 15, -1))
+    assert column("destination_location").tolist() == [[1.0, 1.0]] * PAGE_LIMIT
+    assert columns["source_location"]["dtype"] == "<i4"
+    assert column("fare").tolist() == [14.0] * PAGE_LIMIT
+    assert columns["driver_name"] == ["driver"] * PAGE_LIMIT
+    assert data["next_cursor"] is not None
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_create_ride(client):
     payload = {
         "user_id": 1,
@@ -11,3 +14,53 @@ def test_create_ride(client):
         == "Your Ride is successfully booked, your ride is on the way"
     )
     assert type(response.get_json()["data"]["ride_id"]) == type(int)
+
+
+def test_get_quotes_for_given_vehicle_types(client):
+    payload = {
+        "sources": [[0, 0], [1, 1]],
+        "destinations": [[0, 0.09], [1, 1]],
+        "vehicle_types": [1, 3],
+    }
+    response = client.post("/api/v1/ride/quotes", json=payload)
+    assert response.status_code == 200
+    # 0.09 degrees of longitude on the equator is about 10 km
+    assert response.get_json()["data"]["fares"] == pytest.approx([50.0, 10.0], abs=0.05)
+
+
+def test_get_quotes_for_all_vehicle_types(client):
+    payload = {"sources": [[0, 0]], "destinations": [[0, 0.09]]}
+    response = client.post("/api/v1/ride/quotes", json=payload)
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert data["vehicle_types"] == [1, 2, 3]
+    assert data["fares"][0] == pytest.approx([50.0, 40.0, 30.0], abs=0.05)
+
+
+def test_get_quotes_unknown_vehicle_type(client):
+    payload = {"sources": [[0, 0]], "destinations": [[3, 4]], "vehicle_types": [9]}
+    response = client.post("/api/v1/ride/quotes", json=payload)
+    assert response.status_code == 400
+
+
+def test_create_ride_rejects_unknown_vehicle_type(client):
+    payload = {
+        "user_id": 1,
+        "source_location": [12.9, 77.6],
+        "destination_location": [12.95, 77.65],
+    }
+    for vehicle_type in ("car", 9, True):
+        response = client.post(
+            "/api/v1/ride/create_ride", json={**payload, "vehicle_type": vehicle_type}
+        )
+        assert response.status_code == 400
+
+
+def test_get_quotes_rejects_malformed_batches(client):
+    for payload in (
+        {"sources": 5, "destinations": [[3, 4]]},
+        {"sources": [[0, 0]], "destinations": "x"},
+        {"sources": [[0, 0], [1, 1]], "destinations": [[3, 4]]},
+    ):
+        response = client.post("/api/v1/ride/quotes", json=payload)
+        assert response.status_code == 400
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from src.app.ride_summaries import main as ride_summaries
+from src.app.routes import initialise_routes
+from src.app.services import AppServices, init_app_services
+from src.cache.lru_cache import LRUCache
+from src.repositories.ride_repository import RideRepository
+
+
+@pytest.fixture
+def rides(standin_db):
+    for number, role in ((1, 1), (2, 2), (3, 2)):
+        standin_db.execute(
+            "insert into users (user_name, phone_number, country, user_role) values (%s, %s, %s, %s)",
+            (f"user{number}", number, "india", role),
+        )
+    return RideRepository(standin_db, cache=LRUCache())
+
+
+def test_summaries_follow_bookings_assignments_and_ride_ends(rides):
+    booked = rides.create_ride(1, 2, [0, 0], [1, 1], 14)
+    pending = rides.create_ride(1, None, [0, 0], [2, 2], 20)
+    assert [row[:5] for row in rides.summaries.get_summary(3)] == []
+
+    rides.db.execute(
+        "insert into driver_availability (driver_id, vehicle_type, is_available) values (%s, %s, %s)",
+        (3, 1, True),
+    )
+    assert rides.assign_drivers([(pending, 3)]) == []
+    ended = datetime(2026, 10, 18, 9, 0)
+    rides.update_ride_times([(booked, None, ended)])
+    # ending a ride again neither counts it twice nor moves its end time
+    rides.update_ride_times([(booked, None, datetime(2026, 10, 18, 10, 0))])
+    stored = rides.db.fetch_all("select ride_end_time from rides where id=%s", (booked,))
+    assert str(stored[0][0]).startswith("2026-10-18 09:00")
+
+    summary = {row[0]: row[1:5] for row in rides.summaries.get_summary(1)}
+    assert summary == {1: (2, 34, 1, pending)}
+    assert [row[:5] for row in rides.summaries.get_summary(2)] == [(2, 1, 14, 1, booked)]
+    assert [row[:5] for row in rides.summaries.get_summary(3)] == [(2, 1, 20, 0, pending)]
+    assert rides.summaries.check() == []
+
+
+def test_check_finds_drift_and_rebuild_repairs_it(rides, standin_db, capsys):
+    ride_id = rides.create_ride(1, 2, [0, 0], [1, 1], 14)
+    rides.create_ride(1, 2, [0, 0], [1, 1], 16)
+    standin_db.execute("update rides set fare=%s where id=%s", (40, ride_id))
+
+    assert ride_summaries(["check"], db=standin_db) == 1
+    assert "2 ride summaries differ" in capsys.readouterr().out
+    assert ride_summaries(["rebuild"], db=standin_db) == 0
+    assert rides.summaries.check() == []
+    assert rides.summaries.get_summary(1)[0][2] == 56
+
+
+def test_summary_endpoint(rides, standin_db, monkeypatch):
+    monkeypatch.setenv("RIDE_UPDATE_FLUSH_MS", "0")
+    rides.create_ride(1, 2, [0, 0], [1, 1], 14)
+    app = Flask(__name__)
+    init_app_services(app, AppServices(lambda: standin_db))
+    initialise_routes(app)
+    client = app.test_client()
+
+    data = client.get("/api/v1/users/2/ride_summary").get_json()["data"]
+    assert data["driver"]["rides"] == 1
+    assert data["driver"]["total_fare"] == 14
+    assert data["rider"] == {
+        "rides": 0,
+        "total_fare": 0,
+        "completed_rides": 0,
+        "last_ride_id": None,
+        "last_completed_at": None,
+    }
+
+    client.post("/api/v1/ride/1/ride_end")
+    data = client.get("/api/v1/users/1/ride_summary").get_json()["data"]
+    assert data["rider"]["completed_rides"] == 1
+    assert data["rider"]["last_completed_at"] is not None
@@ -0,0 +1,108 @@
+import os
+from datetime import datetime
+
+import pytest
+from src.database.databaseObject import DatabaseObject
+from src.database.sqlite_standin import SQLiteStandIn
+from src.repositories.ride_repository import RideRepository
+from src.repositories.ride_update_buffer import RideUpdateBuffer
+
+
+@pytest.fixture
+def ride_repository(standin_db):
+    for user_id in (1, 2):
+        standin_db.execute(
+            "insert into users (id, user_name, phone_number, country) values (%s, %s, %s, %s)",
+            (user_id, f"user{user_id}", user_id, "india"),
+        )
+    repository = RideRepository(standin_db)
+    for _ in range(3):
+        repository.create_ride(1, 2, [0, 0], [1, 1], 14)
+    return repository
+
+
+def ride_times(repository, ride_id):
+    return repository.db.fetch_all(
+        "select ride_start_time, ride_end_time from rides where id=%s", (ride_id,)
+    )[0]
+
+
+def test_updates_are_coalesced_per_ride(ride_repository, tmp_path):
+    buffer = RideUpdateBuffer(ride_repository, journal_path=str(tmp_path / "journal"))
+    start, end = datetime(2025, 1, 1, 10), datetime(2025, 1, 1, 11)
+    buffer.record(1, "ride_start_time", start)
+    buffer.record(1, "ride_end_time", end)
+    buffer.record(2, "ride_start_time", start)
+
+    assert ride_times(ride_repository, 1) == (None, None)
+    assert buffer.flush() == 2
+    assert ride_times(ride_repository, 1) == (str(start), str(end))
+    assert ride_times(ride_repository, 2) == (str(start), None)
+    stats = buffer.stats()
+    assert stats["coalesced"] == 1
+    assert stats["last_batch_size"] == 2
+
+
+def test_failed_flush_is_journaled_and_replayed(ride_repository, tmp_path):
+    journal_path = tmp_path / "journal"
+    broken = RideRepository(
+        DatabaseObject(connection_factory=SQLiteStandIn(str(tmp_path / "empty.db")))
+    )
+    buffer = RideUpdateBuffer(broken, journal_path=str(journal_path))
+    start = datetime(2025, 1, 1, 10)
+    buffer.record(3, "ride_start_time", start)
+    assert buffer.flush() == 0
+    assert journal_path.exists()
+
+    # a restarted process picks the journal up before taking new updates
+    restarted = RideUpdateBuffer(ride_repository, journal_path=str(journal_path))
+    restarted.start()
+    restarted.stop()
+    assert ride_times(ride_repository, 3) == (str(start), None)
+    assert not journal_path.exists()
+
+
+def test_batch_is_kept_when_it_cannot_be_journaled(ride_repository, tmp_path):
+    broken = RideRepository(
+        DatabaseObject(connection_factory=SQLiteStandIn(str(tmp_path / "empty.db")))
+    )
+    # the journal's directory doesn't exist, so journaling fails too
+    buffer = RideUpdateBuffer(broken, journal_path=str(tmp_path / "missing" / "journal"))
+    start, end = datetime(2025, 1, 1, 10), datetime(2025, 1, 1, 11)
+    buffer.record(1, "ride_start_time", start)
+    assert buffer.flush() == 0
+    buffer.record(1, "ride_end_time", end)
+    assert buffer.pending(1) == {"ride_start_time": start, "ride_end_time": end}
+
+    buffer.ride_repository = ride_repository
+    assert buffer.flush() == 1
+    assert ride_times(ride_repository, 1) == (str(start), str(end))
+
+
+def test_corrupt_journal_lines_are_skipped(ride_repository, tmp_path):
+    journal_path = tmp_path / "journal"
+    journal_path.write_text(
+        '{"ride_id": 1, "ride_start_time": "2025-01-01T10:00:00"}\n'
+        '{"ride_id": 2, "ride_start_ti\n'
+        '{"ride_start_time": "2025-01-01T10:00:00"}\n'
+        '{"ride_id": 3, "ride_start_time": "yesterday"}\n'
+    )
+    buffer = RideUpdateBuffer(ride_repository, journal_path=str(journal_path))
+    assert buffer.flush() == 1
+    assert ride_times(ride_repository, 1) == (str(datetime(2025, 1, 1, 10)), None)
+    assert buffer.stats()["corrupt_journal_lines"] == 3
+    assert not journal_path.exists()
+
+
+def test_journal_is_per_process_and_orphans_are_replayed(ride_repository, tmp_path):
+    template = str(tmp_path / "ride_updates.{pid}.journal")
+    buffer = RideUpdateBuffer(ride_repository, journal_path=template)
+    assert buffer.journal_path == str(tmp_path / f"ride_updates.{os.getpid()}.journal")
+
+    # no process has that pid, so its journal was left behind by one that exited
+    orphan = tmp_path / "ride_updates.999999999.journal"
+    orphan.write_text('{"ride_id": 2, "ride_end_time": "2025-01-01T11:00:00"}\n')
+    buffer.start()
+    buffer.stop()
+    assert ride_times(ride_repository, 2) == (None, str(datetime(2025, 1, 1, 11)))
+    assert not orphan.exists()
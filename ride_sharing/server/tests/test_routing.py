@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+import pytest
+from src.geo.driver_index import DriverLocationIndex
+from src.geo.road_graph import RoadGraph, dijkstra
+from src.geo.routing import NoRoute, RoutingEngine
+from src.models.ride import Ride
+from src.utils.constants import VehicleType
+from src.utils.fare_calculator import great_circle_distances, trip_distances
+
+
+def grid_graph(size=15, spacing=0.001, seed=3):
+    rng = random.Random(seed)
+    coordinates = [
+        (row * spacing, col * spacing) for row in range(size) for col in range(size)
+    ]
+    sources, targets, lengths, seconds = [], [], [], []
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            neighbours = []
+            if col + 1 < size:
+                neighbours.append(node + 1)
+            if row + 1 < size:
+                neighbours.append(node + size)
+            for neighbour in neighbours:
+                length = 111.0 * rng.uniform(0.9, 1.3)
+                for u, v in ((node, neighbour), (neighbour, node)):
+                    sources.append(u)
+                    targets.append(v)
+                    lengths.append(length)
+                    seconds.append(length / (rng.choice([30, 50, 80]) / 3.6))
+    return RoadGraph(coordinates, sources, targets, lengths, seconds, cell_size=0.002)
+
+
+def test_alt_matches_dijkstra():
+    graph = grid_graph()
+    graph.build_landmarks(count=4)
+    engine = RoutingEngine(graph, active_landmarks=2)
+    rng = random.Random(5)
+    for _ in range(40):
+        source, target = rng.randrange(graph.node_count), rng.randrange(graph.node_count)
+        expected = dijkstra(graph.offsets, graph.targets, graph.seconds, source)[target]
+        assert engine.route_nodes(source, target).duration_minutes == pytest.approx(expected / 60)
+
+
+def test_repeated_queries_hit_the_cache():
+    graph = grid_graph()
+    graph.build_landmarks(count=2)
+    engine = RoutingEngine(graph, cache_size=1)
+    first = engine.route([0.0, 0.0], [0.0141, 0.0139])
+    assert engine.route([0.0001, 0.0], [0.014, 0.014]) == first
+    assert engine.stats()["hits"] == 1
+    engine.route([0.0, 0.0], [0.005, 0.0])
+    assert len(engine._cache) == 1
+
+
+def test_load_edge_list_with_one_way_streets(tmp_path):
+    (tmp_path / "nodes.csv").write_text(
+        "id,lat,lon\n9000000001,0.0,0.0\n9000000002,0.0,0.01\n9000000003,0.01,0.01\n"
+    )
+    (tmp_path / "edges.csv").write_text(
+        "source,target,length_m,speed_kmh,oneway\n"
+        "9000000001,9000000002,1000,60,1\n"
+        "9000000002,9000000003,1000,0,0\n"
+    )
+    graph = RoadGraph.load_path(str(tmp_path))
+    graph.save(tmp_path / "graph.npz")
+    engine = RoutingEngine(RoadGraph.load(tmp_path / "graph.npz"))
+
+    route = engine.route([0.0, 0.0], [0.01, 0.01])
+    assert route.distance_km == pytest.approx(2.0)
+    assert route.duration_minutes == pytest.approx(1.0 + 2.0)  # 60 km/h then default 30
+    with pytest.raises(NoRoute):
+        engine.route([0.01, 0.01], [0.0, 0.0])
+    # no road back, the fare falls back to the great-circle distance
+    assert engine.distances([[0.01, 0.01]], [[0.0, 0.0]])[0] == pytest.approx(1.57, abs=0.01)
+
+
+def test_ride_fare_uses_road_distance():
+    graph = grid_graph(size=3, spacing=0.01)
+    engine = RoutingEngine(graph)
+    index = DriverLocationIndex()
+    index.upsert(1, VehicleType.CAR.value, [0.0, 0.0])
+    ride = Ride(1, VehicleType.CAR.value, [0.0, 0.0], [0.02, 0.02], index, router=engine)
+    distance = engine.route([0.0, 0.0], [0.02, 0.02]).distance_km
+    assert distance > 0.4  # four blocks of ~110 m, not the 0.028 degree diagonal
+    assert ride.fare == pytest.approx(10 + distance * 4)
+
+
+def test_large_quote_batches_are_not_routed():
+    engine = RoutingEngine(grid_graph(size=3, spacing=0.01))
+    sources, destinations = [[0.0, 0.0]] * 3, [[0.02, 0.02]] * 3
+    routed = trip_distances(sources, destinations, engine, max_routed=3)
+    assert routed[0] == pytest.approx(engine.route([0.0, 0.0], [0.02, 0.02]).distance_km)
+    misses = engine.stats()["misses"]
+    # same unit either way, only the route searches are skipped
+    capped = trip_distances(sources, destinations, engine, max_routed=2)
+    assert capped.tolist() == great_circle_distances(sources, destinations).tolist()
+    assert engine.stats()["misses"] == misses
+    assert capped[0] == pytest.approx(3.14, abs=0.01)
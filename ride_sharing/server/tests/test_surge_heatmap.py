@@ -0,0 +1,78 @@
+import pytest
+from src.geo.surge_heatmap import SurgeHeatmap
+from src.utils.fare_calculator import quote_fares
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_multiplier_rises_with_demand_over_supply():
+    clock = FakeClock()
+    heatmap = SurgeHeatmap(cell_size=1.0, sensitivity=0.5, clock=clock)
+    heatmap.record_heartbeat(1, [0.5, 0.5])
+    heatmap.record_heartbeat(2, [0.5, 0.5])
+    for _ in range(6):
+        heatmap.record_request([0.2, 0.2])
+
+    # 6 requests for 2 drivers: 1 + 0.5 * (3 - 1)
+    assert heatmap.multiplier([0.9, 0.9]) == 2.0
+    assert heatmap.multiplier([5.0, 5.0]) == 1.0
+    assert heatmap.multipliers([[0.9, 0.9], [5.0, 5.0]]).tolist() == [2.0, 1.0]
+
+
+def test_counts_expire_with_the_window():
+    clock = FakeClock()
+    heatmap = SurgeHeatmap(
+        cell_size=1.0, window_seconds=60, bucket_seconds=10, clock=clock
+    )
+    for _ in range(10):
+        heatmap.record_request([0.5, 0.5])
+    clock.now += 30
+    heatmap.record_request([0.5, 0.5])
+    assert heatmap.stats()["requests"] == 11
+
+    clock.now += 35
+    assert heatmap.multiplier([0.5, 0.5]) == 1.0
+    assert heatmap.stats()["requests"] == 1
+    clock.now += 60
+    # expiry happens lazily on the next read or write
+    assert heatmap.stats()["requests"] == 1
+    heatmap.multiplier([0.5, 0.5])
+    assert heatmap.stats() == {
+        "demand_cells": 0,
+        "supply_cells": 0,
+        "requests": 0,
+        "drivers": 0,
+    }
+
+
+def test_drivers_are_counted_once_in_their_latest_cell():
+    clock = FakeClock()
+    heatmap = SurgeHeatmap(
+        cell_size=1.0, window_seconds=60, bucket_seconds=10, clock=clock
+    )
+    heatmap.record_heartbeat(1, [0.5, 0.5])
+    heatmap.record_heartbeat(1, [0.6, 0.6])
+    clock.now += 20
+    heatmap.record_heartbeat(1, [1.5, 0.5])
+    heatmap.record_heartbeat(2, [1.5, 0.5])
+    assert heatmap.stats()["drivers"] == 2
+    assert heatmap.stats()["supply_cells"] == 1
+
+    heatmap.remove_driver(2)
+    clock.now += 55
+    heatmap.multiplier([0.0, 0.0])
+    assert heatmap.stats()["drivers"] == 1
+    clock.now += 10
+    heatmap.multiplier([0.0, 0.0])
+    assert heatmap.stats()["drivers"] == 0
+
+
+def test_surge_scales_quoted_fares():
+    fares = quote_fares([10.0, 10.0], 1, [1.0, 1.5])
+    assert fares.tolist() == [50.0, pytest.approx(75.0)]